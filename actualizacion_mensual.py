@@ -0,0 +1,257 @@
+"""
+Actualización incremental: anexa los meses que publica el BCE sin rehacer el ETL.
+
+Artefactos (junto al parquet base del ETL):
+  importaciones_meses/AAAA-MM.parquet   detalle a nivel subpartida de cada mes
+                                        anexado, con el mismo esquema que la base
+  agregado_mensual/base.parquet         agregado Grupo-Subgrupo-País-Mes (ETL)
+  agregado_mensual/AAAA-MM.parquet      una parte del agregado por mes anexado
+  ventana_reciente.parquet              últimos 35 meses por subpartida × país:
+                                        estado de la suma móvil 12M y la banda
+                                        de 24M del screener de precio implícito
+
+Anexar un mes escribe un archivo de detalle, una parte del agregado y desplaza
+la ventana un mes (entra el nuevo, sale el más antiguo): el trabajo es
+proporcional a un mes de datos, no a los 26 años.
+
+Uso:
+    python actualizacion_mensual.py Columnas.csv
+    python actualizacion_mensual.py 2026.zip
+
+El ZIP anual del BCE es acumulado: solo se anexan los meses posteriores al
+último presente, en orden.
+"""
+import argparse
+import os
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agregados import mes_ordinal
+from screener_precios import VENTANA, BANDA
+
+_BASE         = os.path.dirname(os.path.abspath(__file__))
+PARQUET_PATH  = os.path.join(_BASE, "importaciones_ecuador.parquet")
+MESES_DIR     = os.path.join(_BASE, "importaciones_meses")
+AGREGADO_DIR  = os.path.join(_BASE, "agregado_mensual")
+VENTANA_PATH  = os.path.join(_BASE, "ventana_reciente.parquet")
+
+MESES_VENTANA   = VENTANA + BANDA - 1
+TEXTO_ARROW     = pd.StringDtype("pyarrow")   # texto sin un objeto Python por celda
+CLAVES_AGREGADO = ["Mes_ord", "Cod_Grupo", "Cod_Subgrupo", "Pais_Origen"]
+COLS_AGREGADO   = ["Anio", "Mes", "Cod_Grupo", "Cod_Subgrupo", "Pais_Origen", "CIF", "FOB", "TM"]
+CLAVES_VENTANA  = ["Anio", "Mes", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida", "Pais_Origen"]
+_TEXTO          = ["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
+                   "Cod_Subpartida", "Subpartida", "Pais_Origen"]
+_AGREGADO_BASE  = os.path.join(AGREGADO_DIR, "base.parquet")
+
+
+def _etiqueta(t):
+    """Mes ordinal → 'AAAA-MM'."""
+    return f"{int(t) // 12:04d}-{int(t) % 12 + 1:02d}"
+
+
+def _listar(directorio, excluir=()):
+    if not os.path.isdir(directorio):
+        return []
+    return sorted(os.path.join(directorio, f) for f in os.listdir(directorio)
+                  if f.endswith(".parquet") and f not in excluir)
+
+
+def archivos_detalle():
+    """Parquet base + meses anexados, en orden cronológico."""
+    return [PARQUET_PATH] + _listar(MESES_DIR)
+
+
+def partes_agregado():
+    """Partes del agregado materializado (lista vacía si aún no se generó)."""
+    if not os.path.exists(_AGREGADO_BASE):
+        return []
+    return [_AGREGADO_BASE] + _listar(AGREGADO_DIR, excluir=("base.parquet",))
+
+
+def agregar_mensual(df):
+    """Filas a nivel subpartida → agregado Grupo-Subgrupo-País-Mes (miles USD).
+
+    El tiempo entra al groupby como una sola clave entera (Mes_ord) en lugar
+    de Fecha + Anio + Mes; Anio y Mes se derivan después sobre las filas ya
+    agregadas. Las columnas Categorical se agrupan tal cual y se convierten a
+    texto Arrow también después."""
+    mes_ord = pd.Series(mes_ordinal(df["Anio"], df["Mes"]).astype("int32"),
+                        index=df.index, name="Mes_ord")
+    agg = (df.groupby([mes_ord] + CLAVES_AGREGADO[1:], observed=True)
+             .agg(CIF=("CIF", "sum"), FOB=("FOB", "sum"), TM=("TM", "sum"))
+             .reset_index())
+    agg.insert(1, "Anio", (agg["Mes_ord"] // 12).astype("int16"))
+    agg.insert(2, "Mes", (agg["Mes_ord"] % 12 + 1).astype("int8"))
+    for col in ["Cod_Grupo", "Cod_Subgrupo", "Pais_Origen"]:
+        agg[col] = agg[col].astype(TEXTO_ARROW).str.strip()
+    return agg
+
+
+def _ventana(df):
+    """Últimos MESES_VENTANA meses de `df` por subpartida × país (miles USD)."""
+    t = mes_ordinal(df["Anio"], df["Mes"])
+    recientes = df.loc[t > t.max() - MESES_VENTANA, CLAVES_VENTANA + ["CIF", "TM"]]
+    v = (recientes.groupby(CLAVES_VENTANA, observed=True)[["CIF", "TM"]]
+                  .sum().reset_index())
+    for col in ["Cod_Subgrupo", "Cod_Subpartida", "Subpartida", "Pais_Origen"]:
+        v[col] = v[col].astype(str).str.strip()
+    return v
+
+
+def _escribir(datos, ruta):
+    """Escritura atómica: los lectores nunca ven un archivo a medio escribir."""
+    tmp = ruta + ".tmp"
+    if isinstance(datos, pa.Table):
+        pq.write_table(datos, tmp)
+    else:
+        datos.to_parquet(tmp, index=False)
+    os.replace(tmp, ruta)
+
+
+def _mes_de_archivo(ruta):
+    """'.../AAAA-MM.parquet' → mes ordinal."""
+    anio, mes = os.path.basename(ruta)[:-len(".parquet")].split("-")
+    return int(anio) * 12 + int(mes) - 1
+
+
+def meses_posteriores(df):
+    """Meses anexados posteriores al último mes de `df` (detalle del ETL).
+
+    El ETL solo lee los años de su lista y salta los ZIP que fallan, así que
+    puede terminar antes que los meses ya anexados: esos no los cubre y hay
+    que conservarlos. Falla si no continúan a `df` sin huecos."""
+    ultimo = int(mes_ordinal(df["Anio"], df["Mes"]).max())
+    posteriores = [r for r in _listar(MESES_DIR) if _mes_de_archivo(r) > ultimo]
+    if posteriores and _mes_de_archivo(posteriores[0]) != ultimo + 1:
+        raise ValueError(f"el detalle termina en {_etiqueta(ultimo)} pero el primer mes "
+                         f"anexado posterior es {os.path.basename(posteriores[0])}")
+    return posteriores
+
+
+def materializar(df):
+    """Regenera agregado base y ventana desde el detalle del ETL, ya escrito
+    en PARQUET_PATH.
+
+    Los meses anexados que el nuevo parquet cubre se borran (detalle y parte
+    del agregado) después de escribir el nuevo agregado base; los posteriores
+    se conservan y entran en la ventana."""
+    posteriores = meses_posteriores(df)
+    os.makedirs(AGREGADO_DIR, exist_ok=True)
+    _escribir(agregar_mensual(df), _AGREGADO_BASE)
+
+    t = mes_ordinal(df["Anio"], df["Mes"])
+    recientes = [df.loc[t > t.max() - MESES_VENTANA, CLAVES_VENTANA + ["CIF", "TM"]]]
+    recientes += [pd.read_parquet(r, columns=CLAVES_VENTANA + ["CIF", "TM"]) for r in posteriores]
+    _escribir(_ventana(pd.concat(recientes, ignore_index=True)), VENTANA_PATH)
+
+    conservar = {os.path.basename(r) for r in posteriores}
+    cubiertos = [os.path.join(d, f) for d in (MESES_DIR, AGREGADO_DIR)
+                 for f in map(os.path.basename, _listar(d, excluir=("base.parquet",)))
+                 if f not in conservar]
+    for ruta in cubiertos:
+        os.remove(ruta)
+
+
+def _asegurar_materializado():
+    """Genera agregado base y ventana una sola vez si el ETL es anterior a ellos."""
+    archivos = archivos_detalle()
+    if not os.path.exists(_AGREGADO_BASE):
+        os.makedirs(AGREGADO_DIR, exist_ok=True)
+        _escribir(agregar_mensual(pq.read_table(archivos, columns=COLS_AGREGADO).to_pandas()),
+                  _AGREGADO_BASE)
+    if not os.path.exists(VENTANA_PATH):
+        import pyarrow.compute as pc   # solo la primera vez; data_loader importa este módulo
+        anios = pq.read_table(archivos, columns=["Anio"]).column("Anio")
+        desde = pc.max(anios).as_py() - MESES_VENTANA // 12 - 1
+        recientes = pq.read_table(archivos, columns=CLAVES_VENTANA + ["CIF", "TM"],
+                                  filters=[("Anio", ">=", desde)]).to_pandas()
+        _escribir(_ventana(recientes), VENTANA_PATH)
+
+
+def ultimo_mes():
+    """Mes ordinal más reciente del dataset (leído de la ventana, no del detalle)."""
+    v = pd.read_parquet(VENTANA_PATH, columns=["Anio", "Mes"])
+    return int(mes_ordinal(v["Anio"], v["Mes"]).max())
+
+
+def anexar_mes(df_mes):
+    """Anexa las filas de UN mes (formato de leer_columnas_csv). Devuelve 'AAAA-MM'.
+
+    El mes debe ser el siguiente al último presente; si se repite el último
+    mes anexado (p. ej. tras un fallo a medias) sus archivos se sobrescriben."""
+    t = np.unique(mes_ordinal(df_mes["Anio"], df_mes["Mes"]))
+    if len(t) != 1:
+        raise ValueError("df_mes debe contener exactamente un mes")
+    t = int(t[0])
+    _asegurar_materializado()
+    ventana = pd.read_parquet(VENTANA_PATH)
+    t_v = mes_ordinal(ventana["Anio"], ventana["Mes"])
+    ultimo = int(t_v.max())
+    clave = _etiqueta(t)
+    reintento = t == ultimo and os.path.exists(os.path.join(MESES_DIR, f"{clave}.parquet"))
+    if t != ultimo + 1 and not reintento:
+        raise ValueError(f"se esperaba el mes {_etiqueta(ultimo + 1)}, llegó {clave}")
+    if reintento:
+        ventana = ventana[t_v != t]
+
+    # 1. Detalle con el esquema exacto del parquet base (mismas categorías/tipos)
+    df_mes = df_mes.copy()
+    for col in _TEXTO:
+        df_mes[col] = df_mes[col].astype("category")
+    esquema = pq.read_schema(PARQUET_PATH)
+    tabla = pa.Table.from_pandas(df_mes[esquema.names], schema=esquema, preserve_index=False)
+    os.makedirs(MESES_DIR, exist_ok=True)
+    _escribir(tabla, os.path.join(MESES_DIR, f"{clave}.parquet"))
+
+    # 2. Parte del agregado materializado
+    _escribir(agregar_mensual(df_mes), os.path.join(AGREGADO_DIR, f"{clave}.parquet"))
+
+    # 3. Ventana: entra el mes nuevo y sale el que queda fuera de los 35 meses
+    ventana = pd.concat([ventana, _ventana(df_mes)], ignore_index=True)
+    ventana = ventana[mes_ordinal(ventana["Anio"], ventana["Mes"]) > t - MESES_VENTANA]
+    _escribir(ventana, VENTANA_PATH)
+    return clave
+
+
+def leer_archivo(ruta):
+    """Columnas.csv o ZIP del BCE → filas limpias (mismo parseo que el ETL)."""
+    # Import diferido: el ETL importa este módulo
+    from etl_zips_to_parquet import leer_columnas_csv
+    if ruta.lower().endswith(".zip"):
+        with zipfile.ZipFile(ruta) as z, z.open("Columnas.csv") as f:
+            return leer_columnas_csv(f)
+    return leer_columnas_csv(ruta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Anexa meses nuevos del BCE sin rehacer el ETL")
+    parser.add_argument("archivo", help="Columnas.csv o ZIP anual del BCE")
+    args = parser.parse_args(argv)
+
+    df = leer_archivo(args.archivo)
+    _asegurar_materializado()
+    ultimo = ultimo_mes()
+    t = mes_ordinal(df["Anio"], df["Mes"])
+    nuevos = sorted(set(t[t > ultimo].tolist()))
+    if not nuevos:
+        print(f"Sin meses nuevos (último presente: {_etiqueta(ultimo)})")
+        return
+    for mes in nuevos:
+        t0 = time.perf_counter()
+        filas = df[t == mes]
+        clave = anexar_mes(filas)
+        print(f"  {clave}: {len(filas):,} filas ({time.perf_counter() - t0:.2f}s)")
+
+    # Series desestacionalizadas de la nueva versión (las páginas solo las leen)
+    from desestacionalizacion import actualizar as desestacionalizar
+    desestacionalizar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Agregados compartidos entre el dashboard y los reportes en lote.
+
+Funciones puras de pandas (sin Streamlit) sobre el DataFrame de
+load_data_aggregated(): las páginas y reportes_batch.py calculan exactamente
+las mismas series, tops y participaciones.
+
+El eje de tiempo es un entero denso por mes (Mes_ord = Año*12 + Mes-1):
+"los 12 meses anteriores" es aritmética entera y la conversión a fecha se
+hace solo sobre el resultado, para graficar.
+"""
+import numpy as np
+import pandas as pd
+
+
+def mes_ordinal(anio, mes):
+    """Índice entero de mes (Año*12 + Mes-1), vectorizado."""
+    return np.asarray(anio, dtype="int64") * 12 + np.asarray(mes, dtype="int64") - 1
+
+
+def fecha_mes(mes_ord):
+    """Mes ordinal → datetime64 del primer día del mes, vectorizado."""
+    meses_desde_1970 = np.asarray(mes_ord, dtype="int64") - 1970 * 12
+    return meses_desde_1970.astype("datetime64[M]").astype("datetime64[ns]")
+
+
+def _suma_movil(serie, por, cols, ventana=12):
+    """Suma de `cols` en los meses (t-ventana, t] de cada serie de `por`.
+
+    Acumulado sobre un arreglo denso series × meses indexado por Mes_ord: un
+    mes sin fila cuenta como cero. NaN hasta completar `ventana` meses desde
+    el primer mes de la serie (igual que rolling(min_periods=ventana))."""
+    t = serie["Mes_ord"].to_numpy(dtype="int64")
+    if not len(t):
+        for col in cols:
+            serie[f"{col}_{ventana}M"] = np.nan
+        return serie
+    sid = (serie.groupby(por, observed=True, sort=False).ngroup().to_numpy()
+           if por else np.zeros(len(t), dtype="int64"))
+    t0 = t.min()
+    n_meses, n_series = int(t.max() - t0) + 1, int(sid.max()) + 1
+    plano = sid * n_meses + (t - t0)
+    fin = t - t0 + 1
+    ini = np.maximum(fin - ventana, 0)
+    t_primero = pd.Series(t).groupby(sid).transform("min").to_numpy()
+    completo = t - t_primero >= ventana - 1
+    for col in cols:
+        denso = np.bincount(plano, weights=serie[col].to_numpy(dtype="float64"),
+                            minlength=n_series * n_meses).reshape(n_series, n_meses)
+        acum = np.concatenate([np.zeros((n_series, 1)), np.cumsum(denso, axis=1)], axis=1)
+        serie[f"{col}_{ventana}M"] = np.where(completo, acum[sid, fin] - acum[sid, ini], np.nan)
+    return serie
+
+
+def aplicar_filtros(df, rango=None, grupos=(), subgrupos=(), regiones=(), paises=()):
+    """Mismos filtros que filtros_sidebar(), sin widgets. Vacío = todos."""
+    if rango:
+        df = df[(df["Anio"] >= rango[0]) & (df["Anio"] <= rango[1])]
+    if grupos:
+        df = df[df["Grupo"].isin(grupos)]
+    if subgrupos:
+        df = df[df["Subgrupo"].isin(subgrupos)]
+    if regiones:
+        df = df[df["Region"].isin(regiones)]
+    if paises:
+        df = df[df["Pais_Origen"].isin(paises)]
+    return df
+
+
+def filtros_desde_slice(df, dff, rango):
+    """Reconstruye los filtros del sidebar a partir del slice filtrado.
+
+    Los filtros del sidebar son por dimensión (rectángulo), así que los valores
+    únicos de cada dimensión en `dff` los reproducen exactamente. Solo se
+    incluye una dimensión si de verdad restringe respecto a `df`."""
+    filtros = {"rango": tuple(rango)}
+    for col, clave in [("Cod_Grupo", "cod_grupos"), ("Cod_Subgrupo", "cod_subgrupos"),
+                       ("Pais_Origen", "paises")]:
+        valores = dff[col].unique()
+        if len(valores) < df[col].nunique():
+            filtros[clave] = [str(v) for v in valores]
+    return filtros
+
+
+def serie_anual(dff):
+    """CIF y TM por año con tasa de crecimiento anual del CIF (%)."""
+    anual = dff.groupby("Anio").agg(CIF=("CIF", "sum"), TM=("TM", "sum")).reset_index()
+    anual["Var_pct"] = anual["CIF"].pct_change() * 100
+    return anual
+
+
+def top_n(dff, col, n=10):
+    """Top n de `col` por CIF total, de mayor a menor."""
+    return (dff.groupby(col)["CIF"].sum()
+            .sort_values(ascending=False).head(n)
+            .reset_index())
+
+
+def participacion_region(dff):
+    """CIF por región de origen y su participación (%) en el total."""
+    reg = dff.groupby("Region")["CIF"].sum().sort_values(ascending=False).reset_index()
+    reg["Pct"] = reg["CIF"] / reg["CIF"].sum() * 100
+    return reg
+
+
+def suma_movil_12m(dff, por=None):
+    """Serie mensual con suma móvil 12M de CIF y TM (total o por `por`)."""
+    claves = ["Mes_ord"] + ([por] if por else [])
+    serie = dff.groupby(claves, observed=True)[["CIF", "TM"]].sum().reset_index()
+    serie = _suma_movil(serie, [por] if por else [], ["CIF", "TM"])
+    serie.insert(0, "Fecha", fecha_mes(serie["Mes_ord"]))
+    return serie.sort_values(claves).reset_index(drop=True)
+
+
+def participacion_anual(dff, col="Grupo"):
+    """CIF por año y `col` con su participación (%) en el total del año."""
+    anual = dff.groupby(["Anio", col])["CIF"].sum().reset_index()
+    total = anual.groupby("Anio")["CIF"].sum().rename("Total")
+    anual = anual.merge(total, on="Anio")
+    anual["Pct"] = anual["CIF"] / anual["Total"] * 100
+    return anual
+
+
+def precio_implicito_12m(dff, por=("Grupo", "Subgrupo")):
+    """Precio implícito 12M (USD/TM) = CIF 12M / TM 12M, por serie de `por`."""
+    por = list(por)
+    agg = dff.groupby(["Mes_ord"] + por, observed=True)[["CIF", "TM"]].sum().reset_index()
+    agg = _suma_movil(agg, por, ["CIF", "TM"])
+    agg["Precio"]  = agg["CIF_12M"] / agg["TM_12M"] * 1_000_000
+    agg.insert(0, "Fecha", fecha_mes(agg["Mes_ord"]))
+    return agg.sort_values(por + ["Mes_ord"]).reset_index(drop=True)
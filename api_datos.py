@@ -0,0 +1,220 @@
+"""
+API HTTP local (solo lectura) con los agregados del dashboard en JSON o Arrow.
+
+Uso:
+    python api_datos.py --puerto 8600
+
+Endpoints (GET):
+    /anual                   CIF/TM por año y crecimiento
+    /top?col=Subgrupo&n=10   Top n de Subgrupo | Pais_Origen | Grupo | Region
+    /regiones                CIF por región y participación
+    /cuode?col=Grupo         Participación anual por Grupo | Subgrupo
+    /suma_movil?por=Subgrupo Suma móvil 12M (total o por columna)
+    /precio_implicito        Precio implícito 12M por Grupo-Subgrupo
+    /version                 Versión del dataset
+
+Filtros (todos opcionales, repetibles): anio_desde, anio_hasta, grupo,
+subgrupo, region, pais. Formato: ?formato=arrow o "Accept:
+application/vnd.apache.arrow.stream"; por defecto JSON.
+
+Las respuestas se guardan en un LRU por (ruta, parámetros, formato) y llevan
+ETag ligado a la versión del dataset: If-None-Match devuelve 304. El servidor
+atiende clientes concurrentes con un hilo por conexión.
+"""
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pyarrow as pa
+
+from agregados import (aplicar_filtros, serie_anual, top_n, participacion_region,
+                       participacion_anual, suma_movil_12m, precio_implicito_12m)
+from data_loader import leer_agregado, version_dataset
+
+MAX_RESPUESTAS = 256
+_TIPO_ARROW    = "application/vnd.apache.arrow.stream"
+_COLS_TOP      = {"Subgrupo", "Pais_Origen", "Grupo", "Region"}
+
+
+class _Datos:
+    """DataFrame agregado + caché LRU de respuestas, recargados si cambia el parquet."""
+
+    def __init__(self):
+        self._lock = threading.Lock()         # estado y caché (secciones cortas)
+        self._lock_carga = threading.Lock()   # una sola recarga a la vez
+        self.version = None
+        self.df = None
+        self.cache = OrderedDict()
+
+    def actual(self):
+        version = version_dataset()
+        with self._lock:
+            if version == self.version:
+                return self.df, self.version
+        # La lectura va fuera de self._lock: mientras dura, obtener()/guardar()
+        # siguen atendiendo; solo esperan las peticiones que necesitan la versión nueva
+        with self._lock_carga:
+            with self._lock:
+                if version == self.version:   # otro hilo ya la cargó
+                    return self.df, self.version
+            df = leer_agregado()
+            with self._lock:
+                self.df, self.version = df, version
+                self.cache.clear()
+                return self.df, self.version
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave in self.cache:
+                self.cache.move_to_end(clave)
+                return self.cache[clave]
+        return None
+
+    def guardar(self, clave, respuesta):
+        with self._lock:
+            self.cache[clave] = respuesta
+            while len(self.cache) > MAX_RESPUESTAS:
+                self.cache.popitem(last=False)
+
+
+_DATOS = _Datos()
+
+
+def _filtros(params):
+    desde = params.get("anio_desde", [None])[0]
+    hasta = params.get("anio_hasta", [None])[0]
+    rango = None
+    if desde or hasta:
+        rango = (int(desde or 0), int(hasta or 9999))
+    return dict(rango=rango,
+                grupos=params.get("grupo", []), subgrupos=params.get("subgrupo", []),
+                regiones=params.get("region", []), paises=params.get("pais", []))
+
+
+def _top(dff, params):
+    col = params.get("col", ["Subgrupo"])[0]
+    if col not in _COLS_TOP:
+        raise ValueError(f"col debe ser una de {sorted(_COLS_TOP)}")
+    n = int(params.get("n", ["10"])[0])
+    if n < 1:
+        raise ValueError("n debe ser un entero positivo")
+    return top_n(dff, col, n)
+
+
+def _cuode(dff, params):
+    col = params.get("col", ["Grupo"])[0]
+    if col not in ("Grupo", "Subgrupo"):
+        raise ValueError("col debe ser Grupo o Subgrupo")
+    return participacion_anual(dff, col)
+
+
+def _suma_movil(dff, params):
+    por = params.get("por", [None])[0]
+    if por is not None and por not in _COLS_TOP:
+        raise ValueError(f"por debe ser una de {sorted(_COLS_TOP)}")
+    return suma_movil_12m(dff, por=por)
+
+
+# Ruta → función (DataFrame filtrado, parámetros) → DataFrame
+RUTAS = {
+    "/anual":            lambda dff, params: serie_anual(dff),
+    "/top":              _top,
+    "/regiones":         lambda dff, params: participacion_region(dff),
+    "/cuode":            _cuode,
+    "/suma_movil":       _suma_movil,
+    "/precio_implicito": lambda dff, params: precio_implicito_12m(dff).dropna(subset=["Precio"]),
+}
+
+
+def calcular(ruta, params, df):
+    """DataFrame de la ruta `ruta` (debe estar en RUTAS); ValueError si un parámetro es inválido."""
+    return RUTAS[ruta](aplicar_filtros(df, **_filtros(params)), params)
+
+
+def _serializar(tabla, formato):
+    if formato == "arrow":
+        at = pa.Table.from_pandas(tabla, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, at.schema) as writer:
+            writer.write_table(at)
+        return sink.getvalue().to_pybytes(), _TIPO_ARROW
+    cuerpo = tabla.to_json(orient="records", date_format="iso", force_ascii=False)
+    return cuerpo.encode("utf-8"), "application/json; charset=utf-8"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ImportacionesAPI/1.0"
+
+    def _enviar(self, codigo, cuerpo=b"", tipo="application/json; charset=utf-8", etag=None):
+        self.send_response(codigo)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if codigo != 304:
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        if codigo != 304:
+            self.wfile.write(cuerpo)
+
+    def _error(self, codigo, mensaje):
+        self._enviar(codigo, json.dumps({"error": mensaje}).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        df, version = _DATOS.actual()
+        if url.path == "/version":
+            return self._enviar(200, json.dumps({"version": version}).encode("utf-8"))
+        if url.path not in RUTAS:
+            return self._error(404, f"Ruta desconocida: {url.path}")
+
+        formato = params.pop("formato", [None])[0]
+        if formato is None:
+            formato = "arrow" if _TIPO_ARROW in self.headers.get("Accept", "") else "json"
+        if formato not in ("json", "arrow"):
+            return self._error(400, "formato debe ser json o arrow")
+        clave = (version, url.path, formato,
+                 tuple(sorted((k, tuple(sorted(v))) for k, v in params.items())))
+        etag = '"' + hashlib.sha1(repr(clave).encode("utf-8")).hexdigest() + '"'
+        if etag in self.headers.get("If-None-Match", ""):
+            return self._enviar(304, etag=etag)
+
+        respuesta = _DATOS.obtener(clave)
+        if respuesta is None:
+            try:
+                respuesta = _serializar(calcular(url.path, params, df), formato)
+            except ValueError as e:
+                return self._error(400, str(e))
+            except Exception as e:
+                self.log_error("Error en %s: %r", url.path, e)
+                return self._error(500, "Error interno")
+            _DATOS.guardar(clave, respuesta)
+        cuerpo, tipo = respuesta
+        self._enviar(200, cuerpo, tipo, etag=etag)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API local de agregados de importaciones")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8600)
+    args = parser.parse_args(argv)
+
+    print("Cargando datos agregados...")
+    _DATOS.actual()
+    servidor = ThreadingHTTPServer((args.host, args.puerto), _Handler)
+    print(f"API en http://{args.host}:{args.puerto} (versión {_DATOS.version})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,17 @@ Autor: Juan Pablo Erráez
 """
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 from plotly.subplots import make_subplots
 
 from data_loader import (
-    load_data_aggregated, filtros_sidebar,
+    load_data_aggregated, filtros_sidebar, boton_exportar, figura_cacheada, firma_vigente,
     GRUPO_COLORS, SUBGRUPO_COLORS, _FALLBACK_COLORS, get_country_color, REGION_COLORS,
 )
+from agregados import serie_anual, top_n, participacion_region, filtros_desde_slice
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
 
 st.set_page_config(
     page_title="Importaciones Ecuador",
@@ -56,6 +59,7 @@ st.markdown("""
 # ── Datos y filtros ──────────────────────────────────────────────────
 df = load_data_aggregated()
 dff, rango, grupos_sel, paises = filtros_sidebar(df, key_prefix="inicio")
+firma = firma_vigente()
 
 
 # ── Header ───────────────────────────────────────────────────────────
@@ -112,6 +116,20 @@ with col1:
         bandas de confianza y comparativa por origen.</p>
     </div>
     """, unsafe_allow_html=True)
+    st.markdown("""
+    <div class="module-card">
+        <h4>🌎 5. Drilldown País</h4>
+        <p><b>Objetivo:</b> Recorrer la canasta completa importada desde un país de
+        origen: grupos y subgrupos CUODE y sus subpartidas a lo largo del tiempo.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("""
+    <div class="module-card">
+        <h4>🎯 7. Concentración de Proveedores</h4>
+        <p><b>Objetivo:</b> Ranking de subgrupos y subpartidas más dependientes de pocos
+        países de origen (HHI, participación top 1 y top 3), por año o últimos 12 meses.</p>
+    </div>
+    """, unsafe_allow_html=True)
 with col2:
     st.markdown("""
     <div class="module-card">
@@ -129,6 +147,22 @@ with col2:
         por país de origen.</p>
     </div>
     """, unsafe_allow_html=True)
+    st.markdown("""
+    <div class="module-card">
+        <h4>🔥 6. Crecimiento Subgrupo × País</h4>
+        <p><b>Objetivo:</b> Detectar cambios de proveedor con la matriz de crecimiento
+        interanual y 12M vs 12M previos de cada pareja subgrupo × país de origen,
+        en un heatmap con umbrales y una tabla ordenable.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("""
+    <div class="module-card">
+        <h4>⚖️ 8. Comparación de Periodos</h4>
+        <p><b>Objetivo:</b> Comparar dos ventanas de meses cualesquiera (acumulado del año,
+        quinquenios o rangos libres) para todas las series subgrupo × país, con el aporte
+        de cada una al cambio del total.</p>
+    </div>
+    """, unsafe_allow_html=True)
 
 st.divider()
 
@@ -156,38 +190,40 @@ st.divider()
 # ── Gráfico 1: Serie anual CIF + variación % ─────────────────────────
 st.subheader("Importaciones anuales CIF")
 
-anual = dff.groupby("Anio").agg(CIF=("CIF", "sum"), TM=("TM", "sum")).reset_index()
-anual["Var_pct"] = anual["CIF"].pct_change() * 100
-var_min = anual["Var_pct"].min()
-var_max = anual["Var_pct"].max()
-pad = (var_max - var_min) * 0.1
-y2_range = [var_min - pad, var_max + pad]
-
-fig1 = make_subplots(specs=[[{"secondary_y": True}]])
-fig1.add_trace(go.Bar(
-    x=anual["Anio"], y=anual["CIF"], name="CIF (millones USD)",
-    marker_color="#2563eb", opacity=0.85,
-    hovertemplate="<b>%{x}</b><br>CIF: $%{y:,.1f} M<extra></extra>"
-), secondary_y=False)
-fig1.add_trace(go.Scatter(
-    x=anual["Anio"], y=anual["Var_pct"], name="Crecimiento %",
-    mode="lines+markers",
-    line=dict(color="#dc2626", width=2), marker=dict(size=5),
-    hovertemplate="<b>%{x}</b><br>Crec: %{y:.1f}%<extra></extra>"
-), secondary_y=True)
-fig1.update_layout(
-    height=380,
-    yaxis=dict(title="CIF (millones USD)", tickformat=",.1f"),
-    yaxis2=dict(title="Crecimiento (%)", overlaying="y", side="right",
-                zeroline=True, zerolinecolor="#555", range=y2_range),
-    legend=dict(orientation="h", y=1.08),
-    hovermode="x unified",
-    margin=dict(t=30, b=30),
-    plot_bgcolor="white",
-)
-fig1.update_xaxes(gridcolor="#f0f0f0")
-fig1.update_yaxes(gridcolor="#f0f0f0")
-st.plotly_chart(fig1, width="stretch")
+def _fig_anual():
+    anual = serie_anual(dff)
+    var_min = anual["Var_pct"].min()
+    var_max = anual["Var_pct"].max()
+    pad = (var_max - var_min) * 0.1
+    y2_range = [var_min - pad, var_max + pad]
+
+    fig1 = make_subplots(specs=[[{"secondary_y": True}]])
+    fig1.add_trace(go.Bar(
+        x=anual["Anio"], y=anual["CIF"], name="CIF (millones USD)",
+        marker_color="#2563eb", opacity=0.85,
+        hovertemplate="<b>%{x}</b><br>CIF: $%{y:,.1f} M<extra></extra>"
+    ), secondary_y=False)
+    fig1.add_trace(go.Scatter(
+        x=anual["Anio"], y=anual["Var_pct"], name="Crecimiento %",
+        mode="lines+markers",
+        line=dict(color="#dc2626", width=2), marker=dict(size=5),
+        hovertemplate="<b>%{x}</b><br>Crec: %{y:.1f}%<extra></extra>"
+    ), secondary_y=True)
+    fig1.update_layout(
+        height=380,
+        yaxis=dict(title="CIF (millones USD)", tickformat=",.1f"),
+        yaxis2=dict(title="Crecimiento (%)", overlaying="y", side="right",
+                    zeroline=True, zerolinecolor="#555", range=y2_range),
+        legend=dict(orientation="h", y=1.08),
+        hovermode="x unified",
+        margin=dict(t=30, b=30),
+        plot_bgcolor="white",
+    )
+    fig1.update_xaxes(gridcolor="#f0f0f0")
+    fig1.update_yaxes(gridcolor="#f0f0f0")
+    return fig1
+
+st.plotly_chart(figura_cacheada("inicio_anual", firma, _fig_anual), width="stretch")
 
 st.divider()
 
@@ -197,46 +233,44 @@ col_left, col_right = st.columns(2)
 
 # ── Gráfico 2: Top 10 subgrupos CUODE ────────────────────────────────
 with col_left:
-    top_subgrupos = (
-        dff.groupby("Subgrupo")["CIF"].sum()
-        .sort_values(ascending=True).tail(10)
-        .reset_index()
-    )
-    colors_sg = [SUBGRUPO_COLORS.get(s, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
-                 for i, s in enumerate(top_subgrupos["Subgrupo"])]
-    fig2 = go.Figure(go.Bar(
-        x=top_subgrupos["CIF"], y=top_subgrupos["Subgrupo"],
-        orientation="h", marker_color=colors_sg,
-        hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
-    ))
-    fig2.update_layout(
-        height=450, plot_bgcolor="white",
-        xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor="#f0f0f0"),
-        margin=dict(l=220, t=10, b=30, r=20),
-    )
-    fig2.update_xaxes(gridcolor="#f0f0f0")
-    st.plotly_chart(fig2, width="stretch")
+    def _fig_top_subgrupos():
+        top_subgrupos = top_n(dff, "Subgrupo", 10).iloc[::-1]
+        colors_sg = [SUBGRUPO_COLORS.get(s, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
+                     for i, s in enumerate(top_subgrupos["Subgrupo"])]
+        fig2 = go.Figure(go.Bar(
+            x=top_subgrupos["CIF"], y=top_subgrupos["Subgrupo"],
+            orientation="h", marker_color=colors_sg,
+            hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
+        ))
+        fig2.update_layout(
+            height=450, plot_bgcolor="white",
+            xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor="#f0f0f0"),
+            margin=dict(l=220, t=10, b=30, r=20),
+        )
+        fig2.update_xaxes(gridcolor="#f0f0f0")
+        return fig2
+
+    st.plotly_chart(figura_cacheada("inicio_top_subgrupos", firma, _fig_top_subgrupos), width="stretch")
 
 # ── Gráfico 3: Top 10 países de origen ───────────────────────────────
 with col_right:
-    top_paises = (
-        dff.groupby("Pais_Origen")["CIF"].sum()
-        .sort_values(ascending=True).tail(10)
-        .reset_index()
-    )
-    colors_p = [get_country_color(str(p), i) for i, p in enumerate(top_paises["Pais_Origen"])]
-    fig3 = go.Figure(go.Bar(
-        x=top_paises["CIF"], y=top_paises["Pais_Origen"],
-        orientation="h", marker_color=colors_p,
-        hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
-    ))
-    fig3.update_layout(
-        height=450, plot_bgcolor="white",
-        xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor="#f0f0f0"),
-        margin=dict(l=200, t=10, b=30, r=20),
-    )
-    fig3.update_xaxes(gridcolor="#f0f0f0")
-    st.plotly_chart(fig3, width="stretch")
+    def _fig_top_paises():
+        top_paises = top_n(dff, "Pais_Origen", 10).iloc[::-1]
+        colors_p = [get_country_color(str(p), i) for i, p in enumerate(top_paises["Pais_Origen"])]
+        fig3 = go.Figure(go.Bar(
+            x=top_paises["CIF"], y=top_paises["Pais_Origen"],
+            orientation="h", marker_color=colors_p,
+            hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
+        ))
+        fig3.update_layout(
+            height=450, plot_bgcolor="white",
+            xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor="#f0f0f0"),
+            margin=dict(l=200, t=10, b=30, r=20),
+        )
+        fig3.update_xaxes(gridcolor="#f0f0f0")
+        return fig3
+
+    st.plotly_chart(figura_cacheada("inicio_top_paises", firma, _fig_top_paises), width="stretch")
 
 st.divider()
 
@@ -245,125 +279,140 @@ col_l2, col_r2 = st.columns(2)
 # ── Gráfico 4: Composición por región (pie donut) ─────────────────────
 with col_l2:
     st.subheader("Composición por región de origen")
-    reg = dff.groupby("Region")["CIF"].sum().sort_values(ascending=False).reset_index()
-    fig4 = go.Figure(go.Pie(
-        labels=reg["Region"], values=reg["CIF"],
-        marker_colors=[REGION_COLORS.get(r, "#b3b3b3") for r in reg["Region"]],
-        hole=0.45, textposition="inside", textinfo="percent+label",
-        hovertemplate="<b>%{label}</b><br>CIF: $%{value:,.1f} M<br>%{percent}<extra></extra>",
-    ))
-    fig4.update_layout(height=380, margin=dict(t=20, b=20), showlegend=True,
-                       legend=dict(orientation="v", font=dict(size=10)))
-    st.plotly_chart(fig4, width="stretch")
+
+    def _fig_regiones():
+        reg = participacion_region(dff)
+        fig4 = go.Figure(go.Pie(
+            labels=reg["Region"], values=reg["CIF"],
+            marker_colors=[REGION_COLORS.get(r, "#b3b3b3") for r in reg["Region"]],
+            hole=0.45, textposition="inside", textinfo="percent+label",
+            hovertemplate="<b>%{label}</b><br>CIF: $%{value:,.1f} M<br>%{percent}<extra></extra>",
+        ))
+        fig4.update_layout(height=380, margin=dict(t=20, b=20), showlegend=True,
+                           legend=dict(orientation="v", font=dict(size=10)))
+        return fig4
+
+    st.plotly_chart(figura_cacheada("inicio_regiones", firma, _fig_regiones), width="stretch")
 
 # ── Gráfico 5: Evolución regional (área apilada valores absolutos) ─────
 with col_r2:
     st.subheader("Importaciones por región por año")
-    reg_anual = dff.groupby(["Anio", "Region"])["CIF"].sum().reset_index()
-    regiones_ord = reg_anual.groupby("Region")["CIF"].sum().sort_values(ascending=False).index.tolist()
-    fig5 = go.Figure()
-    for reg_name in reversed(regiones_ord):
-        sub = reg_anual[reg_anual["Region"] == reg_name]
-        color = REGION_COLORS.get(reg_name, "#b3b3b3")
-        fig5.add_trace(go.Scatter(
-            x=sub["Anio"], y=sub["CIF"], name=reg_name,
-            mode="lines", stackgroup="one",
-            line=dict(width=0.5, color=color), fillcolor=color,
-            hovertemplate=f"<b>{reg_name}</b><br>CIF: $%{{y:,.1f}} M<extra></extra>",
-        ))
-    fig5.update_layout(
-        height=380, margin=dict(t=20, b=30), plot_bgcolor="white",
-        yaxis=dict(title="CIF (millones USD)", tickformat=",.1f", gridcolor="#f0f0f0"),
-        legend=dict(orientation="h", y=-0.2, font=dict(size=10)),
-    )
-    fig5.update_xaxes(gridcolor="#f0f0f0")
-    st.plotly_chart(fig5, width="stretch")
+
+    def _fig_regiones_anual():
+        reg_anual = dff.groupby(["Anio", "Region"])["CIF"].sum().reset_index()
+        regiones_ord = reg_anual.groupby("Region")["CIF"].sum().sort_values(ascending=False).index.tolist()
+        fig5 = go.Figure()
+        for reg_name in reversed(regiones_ord):
+            sub = reg_anual[reg_anual["Region"] == reg_name]
+            color = REGION_COLORS.get(reg_name, "#b3b3b3")
+            fig5.add_trace(go.Scatter(
+                x=sub["Anio"], y=sub["CIF"], name=reg_name,
+                mode="lines", stackgroup="one",
+                line=dict(width=0.5, color=color), fillcolor=color,
+                hovertemplate=f"<b>{reg_name}</b><br>CIF: $%{{y:,.1f}} M<extra></extra>",
+            ))
+        fig5.update_layout(
+            height=380, margin=dict(t=20, b=30), plot_bgcolor="white",
+            yaxis=dict(title="CIF (millones USD)", tickformat=",.1f", gridcolor="#f0f0f0"),
+            legend=dict(orientation="h", y=-0.2, font=dict(size=10)),
+        )
+        fig5.update_xaxes(gridcolor="#f0f0f0")
+        return fig5
+
+    st.plotly_chart(figura_cacheada("inicio_regiones_anual", firma, _fig_regiones_anual), width="stretch")
 
 st.divider()
 
 # ── Gráfico 6: Participación por subgrupo CUODE (100% stacked area) ───
 st.subheader("Participación por subgrupo CUODE (Top 10)")
-top_sub_list = (
-    dff.groupby("Subgrupo")["CIF"].sum()
-    .sort_values(ascending=False).head(10).index.tolist()
-)
-n_resto = dff["Subgrupo"].nunique() - len(top_sub_list)
-resto_label = f"RESTO ({n_resto} subgrupos)"
-
-sub_anual = dff.groupby(["Anio", "Subgrupo"])["CIF"].sum().reset_index()
-total_anual2 = sub_anual.groupby("Anio")["CIF"].sum().rename("Total")
-sub_anual = sub_anual.merge(total_anual2, on="Anio")
-sub_anual["Pct"] = sub_anual["CIF"] / sub_anual["Total"] * 100
-
-area_top = sub_anual[sub_anual["Subgrupo"].isin(top_sub_list)]
-resto_cif = sub_anual[sub_anual["Subgrupo"].isin(top_sub_list)].groupby("Anio")["CIF"].sum().rename("CIF_top")
-total_s = sub_anual.groupby("Anio")["Total"].first()
-resto_df = pd.DataFrame({"CIF_top": resto_cif, "Total": total_s}).reset_index()
-resto_df["Pct"] = (resto_df["Total"] - resto_df["CIF_top"]) / resto_df["Total"] * 100
-resto_df["Subgrupo"] = resto_label
-
-all_cats = top_sub_list + [resto_label]
-area_data = pd.concat([
-    area_top[["Anio", "Subgrupo", "Pct"]],
-    resto_df[["Anio", "Subgrupo", "Pct"]]
-], ignore_index=True)
-
-fig6 = go.Figure()
-for i, subg in enumerate(reversed(all_cats)):
-    sub = area_data[area_data["Subgrupo"] == subg]
-    color = "#d1d5db" if subg == resto_label else SUBGRUPO_COLORS.get(subg, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
-    fig6.add_trace(go.Scatter(
-        x=sub["Anio"], y=sub["Pct"], name=subg,
-        mode="lines", stackgroup="one",
-        line=dict(width=0.5, color=color), fillcolor=color,
-        hovertemplate=f"<b>{subg}</b><br>%{{y:.1f}}%<extra></extra>",
-    ))
-fig6.update_layout(
-    height=400, plot_bgcolor="white",
-    margin=dict(t=30, b=30),
-    yaxis=dict(title="Participación (%)", ticksuffix="%", dtick=10,
-               range=[0, 100], gridcolor="#f0f0f0"),
-    legend=dict(orientation="h", y=-0.25, font=dict(size=10)),
-)
-fig6.update_xaxes(gridcolor="#f0f0f0")
-fig6.update_yaxes(gridcolor="#f0f0f0")
-st.plotly_chart(fig6, width="stretch")
+
+def _fig_participacion_subgrupo():
+    top_sub_list = (
+        dff.groupby("Subgrupo")["CIF"].sum()
+        .sort_values(ascending=False).head(10).index.tolist()
+    )
+    n_resto = dff["Subgrupo"].nunique() - len(top_sub_list)
+    resto_label = f"RESTO ({n_resto} subgrupos)"
+
+    sub_anual = dff.groupby(["Anio", "Subgrupo"])["CIF"].sum().reset_index()
+    total_anual2 = sub_anual.groupby("Anio")["CIF"].sum().rename("Total")
+    sub_anual = sub_anual.merge(total_anual2, on="Anio")
+    sub_anual["Pct"] = sub_anual["CIF"] / sub_anual["Total"] * 100
+
+    area_top = sub_anual[sub_anual["Subgrupo"].isin(top_sub_list)]
+    resto_cif = sub_anual[sub_anual["Subgrupo"].isin(top_sub_list)].groupby("Anio")["CIF"].sum().rename("CIF_top")
+    total_s = sub_anual.groupby("Anio")["Total"].first()
+    resto_df = pd.DataFrame({"CIF_top": resto_cif, "Total": total_s}).reset_index()
+    resto_df["Pct"] = (resto_df["Total"] - resto_df["CIF_top"]) / resto_df["Total"] * 100
+    resto_df["Subgrupo"] = resto_label
+
+    all_cats = top_sub_list + [resto_label]
+    area_data = pd.concat([
+        area_top[["Anio", "Subgrupo", "Pct"]],
+        resto_df[["Anio", "Subgrupo", "Pct"]]
+    ], ignore_index=True)
+
+    fig6 = go.Figure()
+    for i, subg in enumerate(reversed(all_cats)):
+        sub = area_data[area_data["Subgrupo"] == subg]
+        color = "#d1d5db" if subg == resto_label else SUBGRUPO_COLORS.get(subg, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
+        fig6.add_trace(go.Scatter(
+            x=sub["Anio"], y=sub["Pct"], name=subg,
+            mode="lines", stackgroup="one",
+            line=dict(width=0.5, color=color), fillcolor=color,
+            hovertemplate=f"<b>{subg}</b><br>%{{y:.1f}}%<extra></extra>",
+        ))
+    fig6.update_layout(
+        height=400, plot_bgcolor="white",
+        margin=dict(t=30, b=30),
+        yaxis=dict(title="Participación (%)", ticksuffix="%", dtick=10,
+                   range=[0, 100], gridcolor="#f0f0f0"),
+        legend=dict(orientation="h", y=-0.25, font=dict(size=10)),
+    )
+    fig6.update_xaxes(gridcolor="#f0f0f0")
+    fig6.update_yaxes(gridcolor="#f0f0f0")
+    return fig6
+
+st.plotly_chart(figura_cacheada("inicio_participacion_subgrupo", firma, _fig_participacion_subgrupo), width="stretch")
 
 st.divider()
 
 # ── Gráfico 7: Diversificación (N° subgrupos y N° orígenes) ───────────
 st.subheader("Diversificación: N° de subgrupos CUODE y países de origen en el tiempo")
 
-div_data = dff.groupby("Anio").agg(
-    N_subgrupos=("Subgrupo", "nunique"),
-    N_origenes=("Pais_Origen", "nunique"),
-).reset_index()
-
-fig7 = go.Figure()
-fig7.add_trace(go.Scatter(
-    x=div_data["Anio"], y=div_data["N_subgrupos"],
-    name="N° Subgrupos CUODE", mode="lines+markers",
-    line=dict(color="#2563eb", width=2),
-    hovertemplate="<b>%{x}</b><br>N° Subgrupos: %{y}<extra></extra>",
-))
-fig7.add_trace(go.Scatter(
-    x=div_data["Anio"], y=div_data["N_origenes"],
-    name="N° Países de Origen", mode="lines+markers",
-    line=dict(color="#f59e0b", width=2),
-    yaxis="y2",
-    hovertemplate="<b>%{x}</b><br>N° Países: %{y}<extra></extra>",
-))
-fig7.update_layout(
-    height=350, margin=dict(t=10, b=30),
-    yaxis=dict(title="N° Subgrupos CUODE", gridcolor="#f0f0f0", dtick=1),
-    yaxis2=dict(title="N° Países de Origen", overlaying="y", side="right"),
-    legend=dict(orientation="h", y=1.08),
-    hovermode="x unified",
-    plot_bgcolor="white",
-)
-fig7.update_xaxes(gridcolor="#f0f0f0")
-fig7.update_yaxes(gridcolor="#f0f0f0")
-st.plotly_chart(fig7, width="stretch")
+def _fig_diversificacion():
+    div_data = dff.groupby("Anio").agg(
+        N_subgrupos=("Subgrupo", "nunique"),
+        N_origenes=("Pais_Origen", "nunique"),
+    ).reset_index()
+
+    fig7 = go.Figure()
+    fig7.add_trace(go.Scatter(
+        x=div_data["Anio"], y=div_data["N_subgrupos"],
+        name="N° Subgrupos CUODE", mode="lines+markers",
+        line=dict(color="#2563eb", width=2),
+        hovertemplate="<b>%{x}</b><br>N° Subgrupos: %{y}<extra></extra>",
+    ))
+    fig7.add_trace(go.Scatter(
+        x=div_data["Anio"], y=div_data["N_origenes"],
+        name="N° Países de Origen", mode="lines+markers",
+        line=dict(color="#f59e0b", width=2),
+        yaxis="y2",
+        hovertemplate="<b>%{x}</b><br>N° Países: %{y}<extra></extra>",
+    ))
+    fig7.update_layout(
+        height=350, margin=dict(t=10, b=30),
+        yaxis=dict(title="N° Subgrupos CUODE", gridcolor="#f0f0f0", dtick=1),
+        yaxis2=dict(title="N° Países de Origen", overlaying="y", side="right"),
+        legend=dict(orientation="h", y=1.08),
+        hovermode="x unified",
+        plot_bgcolor="white",
+    )
+    fig7.update_xaxes(gridcolor="#f0f0f0")
+    fig7.update_yaxes(gridcolor="#f0f0f0")
+    return fig7
+
+st.plotly_chart(figura_cacheada("inicio_diversificacion", firma, _fig_diversificacion), width="stretch")
 st.caption(
     "El conteo de países de origen incluye territorios, islas y zonas especiales además de países soberanos "
     "(254 entidades en total en el dataset). El BCE registra ~32 territorios/islas y zonas francas "
@@ -372,6 +421,13 @@ st.caption(
 
 st.divider()
 
+# ── Exportación de las filas detrás de la vista ────────────────────────
+st.subheader("Exportar datos filtrados")
+st.caption("Filas a nivel subpartida con los filtros del sidebar, exportadas por lotes desde el parquet.")
+boton_exportar("exp_inicio", **filtros_desde_slice(df, dff, rango))
+
+st.divider()
+
 # ── Fuentes y Footer ──────────────────────────────────────────────────
 st.markdown("""
 | Fuente | Descripción | Período |
@@ -0,0 +1,87 @@
+"""
+Backend Polars (opcional) para data_loader: escaneo lazy del parquet con
+proyección y filtros empujados al lector, agregación multihilo y conversión
+a pandas solo al final (frontera con Plotly/Streamlit).
+
+Se activa con la variable de entorno IMPORTACIONES_BACKEND=polars.
+Requiere polars>=1.0 (no está en requirements.txt por defecto).
+"""
+import polars as pl
+
+_CLAVES_AGG = ["Mes_ord", "Cod_Grupo", "Cod_Subgrupo", "Pais_Origen"]
+_TEXTO      = ["Pais_Origen", "Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida"]
+
+
+def _limpiar_texto(lf, cols):
+    return lf.with_columns([pl.col(c).cast(pl.Utf8).str.strip_chars() for c in cols])
+
+
+def _nombres_y_region(df, grupo_map, subgrupo_map, asignar_region):
+    """Grupo/Subgrupo por mapa y Región evaluada solo sobre los países únicos."""
+    paises = df["Pais_Origen"].unique().to_list()
+    regiones = {p: asignar_region(p) for p in paises}
+    return df.with_columns(
+        pl.col("Cod_Grupo").replace_strict(grupo_map, default="Otro", return_dtype=pl.Utf8)
+          .alias("Grupo"),
+        pl.col("Cod_Subgrupo").replace_strict(subgrupo_map, default="Otro", return_dtype=pl.Utf8)
+          .alias("Subgrupo"),
+        pl.col("Pais_Origen").replace_strict(regiones, default="Otros", return_dtype=pl.Utf8)
+          .alias("Region"),
+    )
+
+
+def escanear_agregado(path):
+    """LazyFrame Grupo-Subgrupo-País-Mes: solo lee las 8 columnas necesarias y
+    agrupa por un único mes ordinal entero (Anio y Mes se derivan después)."""
+    lf = pl.scan_parquet(path).select(
+        ["Anio", "Mes", "Cod_Grupo", "Cod_Subgrupo", "Pais_Origen", "CIF", "FOB", "TM"])
+    lf = _limpiar_texto(lf, ["Pais_Origen", "Cod_Grupo", "Cod_Subgrupo"])
+    lf = lf.with_columns((pl.col("Anio") * 12 + pl.col("Mes") - 1).cast(pl.Int32).alias("Mes_ord"))
+    return (lf.group_by(_CLAVES_AGG)
+              .agg(pl.col("CIF").sum() / 1000, pl.col("FOB").sum() / 1000, pl.col("TM").sum())
+              .with_columns((pl.col("Mes_ord") // 12).cast(pl.Int16).alias("Anio"),
+                            (pl.col("Mes_ord") % 12 + 1).cast(pl.Int8).alias("Mes"))
+              .sort(_CLAVES_AGG))
+
+
+def escanear_subpartidas(path, rango=None, cod_subgrupo=None, paises=()):
+    """LazyFrame a nivel subpartida con filtros empujados al parquet.
+
+    Los filtros van sobre las columnas crudas (el ETL ya escribe el texto sin
+    espacios) y la limpieza después: un strip previo impediría empujarlos."""
+    lf = pl.scan_parquet(path)
+    if rango:
+        lf = lf.filter(pl.col("Anio").is_between(rango[0], rango[1]))
+    if cod_subgrupo:
+        lf = lf.filter(pl.col("Cod_Subgrupo") == cod_subgrupo)
+    if paises:
+        lf = lf.filter(pl.col("Pais_Origen").is_in(list(paises)))
+    lf = _limpiar_texto(lf, _TEXTO)
+    return lf.with_columns(pl.col("CIF") / 1000, pl.col("FOB") / 1000)
+
+
+def filtrar(lf, rango=None, grupos=(), subgrupos=(), regiones=(), paises=()):
+    """Misma cascada que agregados.aplicar_filtros(), sobre un LazyFrame.
+    Solo la usa benchmark_backends.py: filtros_sidebar filtra en pandas."""
+    if rango:
+        lf = lf.filter(pl.col("Anio").is_between(rango[0], rango[1]))
+    for col, valores in [("Grupo", grupos), ("Subgrupo", subgrupos),
+                         ("Region", regiones), ("Pais_Origen", paises)]:
+        if valores:
+            lf = lf.filter(pl.col(col).is_in(list(valores)))
+    return lf
+
+
+def leer_agregado(path, grupo_map, subgrupo_map, asignar_region):
+    df = escanear_agregado(path).collect()
+    return _nombres_y_region(df, grupo_map, subgrupo_map, asignar_region).to_pandas()
+
+
+def leer_subpartidas(path, grupo_map, subgrupo_map, asignar_region,
+                     rango=None, cod_subgrupo=None, paises=()):
+    df = escanear_subpartidas(path, rango, cod_subgrupo, paises).collect()
+    df = _nombres_y_region(df, grupo_map, subgrupo_map, asignar_region)
+    # Categóricas en pandas, igual que el backend por defecto
+    return df.with_columns(
+        [pl.col(c).cast(pl.Categorical) for c in _TEXTO + ["Grupo", "Subgrupo"]]
+    ).to_pandas()
@@ -0,0 +1,97 @@
+"""
+Benchmark: backend pandas vs polars de data_loader sobre las mismas consultas.
+
+Uso:
+    python benchmark_backends.py [--repeticiones 3]
+
+Consultas:
+  1. leer_agregado(PARQUET_PATH)         parquet → ~390K filas (Grupo-Subgrupo-País-Mes)
+  2. leer_subpartidas(subgrupo, rango)   slice del drilldown con filtros empujados
+  3. leer_subpartidas()                  parquet completo (~6.7M filas)
+  4. filtros + serie anual               cascada del sidebar sobre el agregado
+
+Además compara el agregado con texto Arrow (el que usan las páginas) contra
+el mismo frame con texto como objetos Python: memoria profunda y latencia
+de la cascada de filtros.
+"""
+import argparse
+import time
+
+import data_loader
+from agregados import aplicar_filtros, serie_anual
+
+FILTROS = dict(rango=(2015, 2025), grupos=["Bienes de Capital Industrial"],
+               paises=["CHINA", "ESTADOS UNIDOS"])
+SUBGRUPO = "084"
+
+
+def _medir(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos)
+
+
+def _consultas(backend):
+    data_loader.BACKEND = backend
+    # Path explícito: mide la agregación desde el parquet, no el agregado materializado
+    df = data_loader.leer_agregado(data_loader.PARQUET_PATH)
+    consultas = {
+        "1. leer_agregado":     lambda: data_loader.leer_agregado(data_loader.PARQUET_PATH),
+        "2. subgrupo + rango":  lambda: data_loader.leer_subpartidas(
+                                    rango=FILTROS["rango"], cod_subgrupo=SUBGRUPO),
+        "3. parquet completo":  data_loader.leer_subpartidas,
+    }
+    if backend == "polars":
+        import polars as pl
+        import backend_polars
+        lf = pl.from_pandas(df).lazy()
+        consultas["4. filtros + anual"] = lambda: (
+            backend_polars.filtrar(lf, **FILTROS)
+            .group_by("Anio").agg(pl.col("CIF").sum(), pl.col("TM").sum())
+            .sort("Anio").collect().to_pandas())
+    else:
+        consultas["4. filtros + anual"] = lambda: serie_anual(aplicar_filtros(df, **FILTROS))
+    return consultas
+
+
+def _comparar_texto(repeticiones):
+    """Memoria (MB) y latencia de filtros: texto Arrow vs objetos Python."""
+    data_loader.BACKEND = "pandas"
+    arrow = data_loader.leer_agregado()
+    objetos = arrow.astype({c: object for c in data_loader._TEXTO_AGREGADO})
+    print(f"\n{'Agregado':<24}{'memoria (MB)':>14}{'filtros (s)':>13}")
+    for nombre, df in [("texto Arrow", arrow), ("objetos Python", objetos)]:
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        t = _medir(lambda: serie_anual(aplicar_filtros(df, **FILTROS)), repeticiones)
+        print(f"{nombre:<24}{mb:>14.1f}{t:>13.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for backend in ("pandas", "polars"):
+        try:
+            consultas = _consultas(backend)
+        except ImportError:
+            print(f"[{backend}] no instalado, se omite")
+            continue
+        for nombre, fn in consultas.items():
+            resultados.setdefault(nombre, {})[backend] = _medir(fn, args.repeticiones)
+
+    print(f"\n{'Consulta':<24}{'pandas (s)':>12}{'polars (s)':>12}{'speedup':>10}")
+    for nombre, t in resultados.items():
+        pd_t, pl_t = t.get("pandas"), t.get("polars")
+        speedup = f"{pd_t / pl_t:.1f}x" if pd_t and pl_t else "–"
+        print(f"{nombre:<24}{pd_t or float('nan'):>12.3f}{pl_t or float('nan'):>12.3f}{speedup:>10}")
+
+    _comparar_texto(args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
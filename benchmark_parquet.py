@@ -0,0 +1,126 @@
+"""
+Benchmark de perfiles de codificación del parquet (compresión, diccionario, row groups).
+
+Uso:
+    python benchmark_parquet.py --generar            # perfiles desde el parquet actual
+    python benchmark_parquet.py [--perfiles zstd snappy_rg128k] [--repeticiones 3]
+
+Los perfiles se definen en etl_zips_to_parquet.PERFILES_PARQUET y también
+los escribe el ETL con --perfiles. Por cada perfil y loader reporta:
+  - tamaño del archivo
+  - lectura en frío: proceso nuevo y páginas del archivo desalojadas de la
+    caché del sistema (posix_fadvise DONTNEED, Linux)
+  - lectura en caliente: mejor de las repeticiones siguientes
+  - pico de memoria del loader (ru_maxrss sobre la línea base tras importar)
+
+Loaders: leer_agregado(path) (detrás de load_data_aggregated) y
+leer_subpartidas(path) (detrás de load_data). Cada medición corre en su
+propio proceso para que picos y cachés no se mezclen.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from etl_zips_to_parquet import PERFILES_PARQUET, PERFILES_DIR, escribir_perfiles
+
+LOADERS = {
+    "agregado":    "leer_agregado",      # load_data_aggregated
+    "subpartidas": "leer_subpartidas",   # load_data
+}
+
+
+def _desalojar(path):
+    """Quita las páginas del archivo de la caché del sistema (mejor esfuerzo)."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def _pico_mb():
+    # ru_maxrss: KB en Linux, bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1e6 if sys.platform == "darwin" else 1e3)
+
+
+def _medir_en_proceso(loader, path, repeticiones):
+    """Corre dentro del proceso hijo: imprime un JSON con las mediciones."""
+    import data_loader
+    leer = getattr(data_loader, LOADERS[loader])
+    base = _pico_mb()
+    desalojado = _desalojar(path)
+
+    t0 = time.perf_counter()
+    df = leer(path)
+    frio = time.perf_counter() - t0
+    pico = _pico_mb() - base
+    del df
+
+    caliente = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        leer(path)
+        caliente.append(time.perf_counter() - t0)
+    print(json.dumps({"frio": frio, "caliente": min(caliente), "pico_mb": pico,
+                      "desalojado": desalojado}))
+
+
+def _medir(loader, path, repeticiones):
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--medir", loader, path,
+         "--repeticiones", str(repeticiones)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--perfiles", nargs="+", choices=list(PERFILES_PARQUET),
+                        default=list(PERFILES_PARQUET))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--generar", action="store_true",
+                        help="escribe los perfiles a partir del parquet actual y termina")
+    parser.add_argument("--medir", nargs=2, metavar=("LOADER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        _medir_en_proceso(*args.medir, args.repeticiones)
+        return
+
+    if args.generar:
+        import pandas as pd
+        from actualizacion_mensual import PARQUET_PATH
+        rutas = escribir_perfiles(pd.read_parquet(PARQUET_PATH), args.perfiles)
+        for perfil, ruta in rutas.items():
+            print(f"  {perfil:<20}{os.path.getsize(ruta) / 1e6:>8.1f} MB  {ruta}")
+        return
+
+    print(f"\n{'Perfil':<20}{'MB':>8}  {'Loader':<12}{'frío (s)':>10}"
+          f"{'caliente (s)':>14}{'pico (MB)':>11}")
+    advertir = False
+    for perfil in args.perfiles:
+        path = os.path.join(PERFILES_DIR, f"{perfil}.parquet")
+        if not os.path.exists(path):
+            print(f"{perfil:<20}  no generado (python benchmark_parquet.py --generar)")
+            continue
+        mb = os.path.getsize(path) / 1e6
+        for loader in LOADERS:
+            r = _medir(loader, path, args.repeticiones)
+            advertir |= not r["desalojado"]
+            print(f"{perfil:<20}{mb:>8.1f}  {loader:<12}{r['frio']:>10.3f}"
+                  f"{r['caliente']:>14.3f}{r['pico_mb']:>11.0f}")
+    if advertir:
+        print("\nAviso: sin posix_fadvise; la lectura en frío puede venir de la caché del sistema.")
+
+
+if __name__ == "__main__":
+    main()
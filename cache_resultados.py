@@ -0,0 +1,107 @@
+"""
+Caché persistente de resultados de las páginas (figuras y agregados) en disco.
+
+Segundo nivel detrás de las cachés en memoria de data_loader
+(figura_cacheada, resultado_cacheado): la clave es (consulta, firma de
+filtros, versión del dataset) y el valor se guarda con pickle en
+cache_resultados/<versión>-<hash>.pkl. Sobrevive a reinicios y deploys y se
+comparte entre procesos del servidor:
+  - escritura atómica (tmp + os.replace): nadie lee un archivo a medias
+  - LRU por tamaño: cada lectura toca el mtime; al pasar de MAX_BYTES se
+    borran primero los archivos de otra versión del dataset y luego los de
+    acceso más antiguo
+
+IMPORTACIONES_CACHE_MB fija el tamaño máximo (0 desactiva la caché en disco).
+"""
+import hashlib
+import os
+import pickle
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_resultados")
+MAX_BYTES = int(float(os.environ.get("IMPORTACIONES_CACHE_MB", "512")) * 1024 * 1024)
+
+FALTA = object()   # centinela: None es un resultado válido
+
+
+def _ruta(consulta, firma, version):
+    h = hashlib.sha1(repr((consulta, firma)).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{version}-{h}.pkl")
+
+
+def leer(consulta, firma, version):
+    """Resultado guardado o FALTA si no existe (o no se puede leer)."""
+    if MAX_BYTES <= 0:
+        return FALTA
+    ruta = _ruta(consulta, firma, version)
+    try:
+        with open(ruta, "rb") as f:
+            valor = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return FALTA
+    try:
+        os.utime(ruta)   # marca de acceso para el LRU
+    except OSError:
+        pass
+    return valor
+
+
+def guardar(consulta, firma, version, valor):
+    """Guarda el resultado y desaloja si la caché supera MAX_BYTES."""
+    if MAX_BYTES <= 0:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    ruta = _ruta(consulta, firma, version)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, ruta)
+    except (OSError, pickle.PicklingError, TypeError):
+        # Resultado no serializable o disco lleno: se queda solo en memoria
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    desalojar(version)
+
+
+def _entradas():
+    entradas = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for e in it:
+                if e.name.endswith(".pkl"):
+                    try:
+                        s = e.stat()
+                    except OSError:
+                        continue
+                    entradas.append((s.st_mtime, s.st_size, e.name, e.path))
+    except FileNotFoundError:
+        pass
+    return entradas
+
+
+def desalojar(version_vigente=None, max_bytes=None):
+    """Borra archivos hasta quedar bajo `max_bytes`: primero los de otras
+    versiones del dataset, luego los de acceso más antiguo. Devuelve cuántos."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entradas = _entradas()
+    total = sum(tam for _, tam, _, _ in entradas)
+    vigente = f"{version_vigente}-"
+    orden = sorted(entradas, key=lambda e: (e[2].startswith(vigente), e[0]))
+    borrados = 0
+    for _, tam, _, ruta in orden:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tam
+        borrados += 1
+    return borrados
+
+
+def estadisticas():
+    """Número de archivos y MB en disco."""
+    entradas = _entradas()
+    return {"archivos": len(entradas), "mb": sum(e[1] for e in entradas) / 1e6}
@@ -0,0 +1,96 @@
+"""
+Calentamiento de la caché de resultados con los estados de filtros más usados.
+
+Uso:
+    python calentar_cache.py [--frecuentes 20] [--costosos 10]
+    python calentar_cache.py --vigilar 300    # cada 5 min; calienta al cambiar los datos
+
+Toma del registro de uso (uso_firmas.py) los estados más frecuentes y los
+más costosos de calcular, y ejecuta sin navegador (streamlit.testing AppTest)
+la página de cada uno con sus filtros sembrados. figura_cacheada guarda las
+figuras en cache_resultados/ para la versión vigente del dataset, de donde
+las leen todos los procesos del servidor. Conviene correrlo justo después de
+regenerar los datos o anexar un mes (con --vigilar se hace solo).
+"""
+import argparse
+import os
+import time
+
+import uso_firmas
+from data_loader import version_dataset
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# key_prefix de filtros_sidebar → script de la página
+PAGINAS = {
+    "inicio": "app.py",
+    "sm":     os.path.join("pages", "1_Suma_Movil_12M.py"),
+    "tree":   os.path.join("pages", "2_Treemap_CUODE.py"),
+    "drill":  os.path.join("pages", "4_Drilldown_Subpartida.py"),
+    "cr":     os.path.join("pages", "6_Crecimiento.py"),
+}
+
+
+def calentar(n_frecuentes=20, n_costosos=10, timeout=600):
+    """Ejecuta cada página elegida con sus filtros. Devuelve (ok, errores).
+    Todas las AppTest corren en este proceso y comparten sus cachés de
+    Streamlit; se vacían al empezar para que una pasada de --vigilar no
+    reutilice cargas de la versión anterior del dataset."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    uso_firmas.ACTIVO = False   # las ejecuciones del calentamiento no cuentan como uso
+    elegidos = uso_firmas.seleccionar(uso_firmas.resumen(), n_frecuentes, n_costosos)
+    ok = errores = 0
+    for fila in elegidos:
+        script = PAGINAS.get(fila["pagina"])
+        if script is None:
+            continue
+        p, estado = fila["pagina"], fila["estado"]
+        at = AppTest.from_file(os.path.join(BASE_DIR, script), default_timeout=timeout)
+        at.session_state[f"{p}_anio"]     = tuple(estado["rango"])
+        at.session_state[f"{p}_grupo"]    = estado["grupo_labels"]
+        at.session_state[f"{p}_subgrupo"] = estado["subgrupo_labels"]
+        at.session_state[f"{p}_region"]   = estado["regiones"]
+        at.session_state[f"{p}_pais"]     = estado["paises"]
+        t0 = time.perf_counter()
+        try:
+            at.run()
+            fallo = at.exception[0].message if at.exception else None
+        except Exception as e:   # timeout u otro error del runner
+            fallo = str(e)
+        segundos = time.perf_counter() - t0
+        if fallo:
+            errores += 1
+            print(f"  ERROR {p:<7}{estado} – {fallo}")
+        else:
+            ok += 1
+            print(f"  {p:<7}{segundos:>7.1f}s  vistas={fila['vistas']:<5} {estado}")
+    return ok, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frecuentes", type=int, default=20)
+    parser.add_argument("--costosos", type=int, default=10)
+    parser.add_argument("--vigilar", type=int, metavar="SEGUNDOS",
+                        help="revisa la versión del dataset cada SEGUNDOS y calienta al cambiar")
+    args = parser.parse_args(argv)
+
+    ultima = None
+    while True:
+        version = version_dataset()
+        if version != ultima:
+            print(f"Calentando caché para la versión {version}...")
+            ok, errores = calentar(args.frecuentes, args.costosos)
+            print(f"{ok} estados precalculados, {errores} con error")
+            ultima = version
+        if not args.vigilar:
+            break
+        time.sleep(args.vigilar)
+
+
+if __name__ == "__main__":
+    main()
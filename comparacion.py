@@ -0,0 +1,71 @@
+"""
+Comparación de dos ventanas de meses arbitrarias (p. ej. ene–sep 2025 vs
+ene–sep 2024, o 2015–2019 vs 2020–2024) para todas las series Fila × País.
+
+Se precalcula una sola vez el acumulado a lo largo del eje de meses del
+cubo meses × filas × países (crecimiento.cubo_mensual): el total de
+cualquier ventana [desde, hasta] es acum[hasta+1] - acum[desde], una resta
+O(1) por serie, sin volver a filtrar ni agrupar las ~390K filas. Sobre las
+dos matrices de totales salen la variación y el aporte de cada serie al
+cambio del total (puntos porcentuales).
+"""
+import numpy as np
+import pandas as pd
+
+from crecimiento import cubo_mensual
+
+
+def acumulado_mensual(df, filas="Subgrupo", columnas="Pais_Origen", valor="CIF"):
+    """Acumulado (meses+1 × filas × columnas) con acum[0] = 0.
+
+    Devuelve (acum, mes_inicial, etiquetas_filas, etiquetas_columnas)."""
+    cubo, t0, etq_filas, etq_columnas = cubo_mensual(df, filas, columnas, valor)
+    acum = np.concatenate([np.zeros((1,) + cubo.shape[1:]), np.cumsum(cubo, axis=0)])
+    return acum, t0, etq_filas, etq_columnas
+
+
+def total_ventana(acum, t0, desde, hasta):
+    """Total (filas × columnas) de los meses ordinales [desde, hasta];
+    los meses fuera del acumulado cuentan 0."""
+    n_meses = acum.shape[0] - 1
+    i = min(max(desde - t0, 0), n_meses)
+    j = min(max(hasta - t0 + 1, 0), n_meses)
+    return acum[max(j, i)] - acum[i]
+
+
+def comparar_ventanas(acum, t0, ventana_a, ventana_b):
+    """Ventana A (actual) contra ventana B (base), todas las series a la vez.
+
+    Devuelve un dict de matrices (filas × columnas): A, B, Diferencia,
+    Variacion (% sobre B, NaN sin base) y Aporte (pp del cambio del total:
+    Diferencia / ΣB × 100; la suma de los aportes es la variación total)."""
+    a = total_ventana(acum, t0, *ventana_a)
+    b = total_ventana(acum, t0, *ventana_b)
+    dif = a - b
+    base_total = b.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacion = np.where(b > 0, (a / b - 1) * 100, np.nan)
+    aporte = dif / base_total * 100 if base_total > 0 else np.full(dif.shape, np.nan)
+    return {"A": a, "B": b, "Diferencia": dif, "Variacion": variacion, "Aporte": aporte}
+
+
+def tabla_comparacion(matrices, etiquetas_filas, etiquetas_columnas,
+                      nombre_filas="Subgrupo", nombre_columnas="Pais_Origen"):
+    """Formato largo: una fila por serie con valor en alguna de las ventanas."""
+    f, c = np.nonzero((matrices["A"] != 0) | (matrices["B"] != 0))
+    tabla = pd.DataFrame({nombre_filas: etiquetas_filas[f],
+                          nombre_columnas: etiquetas_columnas[c]})
+    for clave, matriz in matrices.items():
+        tabla[clave] = matriz[f, c]
+    return tabla
+
+
+def resumen_por_eje(matrices, eje):
+    """Matrices sumadas sobre `eje` (1 = por fila, 0 = por columna), con la
+    variación recalculada sobre los totales."""
+    a = matrices["A"].sum(axis=eje)
+    b = matrices["B"].sum(axis=eje)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacion = np.where(b > 0, (a / b - 1) * 100, np.nan)
+    return {"A": a, "B": b, "Diferencia": a - b, "Variacion": variacion,
+            "Aporte": matrices["Aporte"].sum(axis=eje)}
@@ -0,0 +1,82 @@
+"""
+Concentración de proveedores (HHI, participación top-1 y top-3) en lote.
+
+Para cada serie (subgrupo, subpartida…) y periodo (año o ventana 12M) mide
+qué tan concentradas están sus importaciones en pocos países de origen:
+  HHI        = Σ participación² × 10.000 (10.000 = un solo proveedor)
+  Top1 / Top3 = participación (%) del primer / de los tres primeros países
+  N_equiv    = 10.000 / HHI, número equivalente de proveedores iguales
+
+Todas las series se reducen a la vez sobre la tabla larga (serie, periodo,
+país): ids de grupo + bincount y un único ordenamiento para los rankings,
+sin bucle Python por serie ni arreglo denso series × países.
+"""
+import numpy as np
+import pandas as pd
+
+
+def concentracion(df, por, periodo="Anio", proveedor="Pais_Origen", valor="CIF"):
+    """Métricas de concentración por (`por`…, `periodo`).
+
+    df: filas con `por`, `periodo`, `proveedor` y `valor` (se suman si se
+    repiten). Devuelve Total, N_proveedores, HHI, N_equiv, Top1, Top3 y el
+    Principal (país con mayor participación) de cada serie-periodo."""
+    claves = list(por) + [periodo]
+    cel = df.groupby(claves + [proveedor], observed=True)[valor].sum().reset_index()
+    cel = cel[cel[valor] > 0]
+    if cel.empty:
+        return pd.DataFrame(columns=claves + ["Total", "N_proveedores", "HHI", "N_equiv",
+                                              "Top1", "Top3", "Principal"])
+    gid = cel.groupby(claves, observed=True, sort=False).ngroup().to_numpy()
+    n = int(gid.max()) + 1
+    v = cel[valor].to_numpy(dtype="float64")
+
+    total = np.bincount(gid, weights=v, minlength=n)
+    part = v / total[gid]
+    hhi = np.bincount(gid, weights=part ** 2, minlength=n) * 10_000
+
+    # Ranking dentro de cada grupo: un solo lexsort (grupo, valor descendente)
+    orden = np.lexsort((-v, gid))
+    inicio = np.searchsorted(gid[orden], np.arange(n))
+    puesto = np.empty(len(v), dtype="int64")
+    puesto[orden] = np.arange(len(v)) - inicio[gid[orden]]
+    top1 = np.bincount(gid, weights=part * (puesto == 0), minlength=n) * 100
+    top3 = np.bincount(gid, weights=part * (puesto < 3), minlength=n) * 100
+
+    res = (cel[claves].assign(_gid=gid)
+                      .drop_duplicates("_gid")
+                      .sort_values("_gid")
+                      .drop(columns=["_gid"])
+                      .reset_index(drop=True))
+    return res.assign(
+        Total=total, N_proveedores=np.bincount(gid, minlength=n), HHI=hhi,
+        N_equiv=10_000 / hhi, Top1=top1, Top3=top3,
+        Principal=cel[proveedor].to_numpy()[orden[inicio]],
+    )
+
+
+def concentracion_12m(df, por, mes_final=None, ventana=12,
+                      proveedor="Pais_Origen", valor="CIF"):
+    """Concentración sobre la suma móvil de `ventana` meses (columna Mes_ord).
+
+    Con `mes_final` evalúa solo la ventana que termina en ese mes (apto para
+    datos a nivel subpartida). Sin él, todos los meses: cada fila del mes t
+    aporta a las ventanas que terminan en t…t+ventana-1 (expansión larga de
+    `ventana`× filas, pensada para el agregado)."""
+    claves = list(por) + [proveedor]
+    mensual = df.groupby(claves + ["Mes_ord"], observed=True)[valor].sum().reset_index()
+    t = mensual["Mes_ord"].to_numpy(dtype="int64")
+    if mes_final is not None:
+        en_ventana = mensual[(t > mes_final - ventana) & (t <= mes_final)]
+        return concentracion(en_ventana.assign(Mes_fin=mes_final), por, "Mes_fin",
+                             proveedor, valor)
+
+    fila = np.repeat(np.arange(len(mensual)), ventana)
+    fin = t[fila] + np.tile(np.arange(ventana), len(mensual))
+    primero = pd.Series(t).groupby(
+        mensual.groupby(list(por), observed=True, sort=False).ngroup().to_numpy()
+    ).transform("min").to_numpy()[fila]
+    # Solo ventanas completas dentro del rango observado de cada serie y del dataset
+    valida = (fin <= t.max()) & (fin - primero >= ventana - 1)
+    expandido = mensual.iloc[fila[valida]].assign(Mes_fin=fin[valida])
+    return concentracion(expandido, por, "Mes_fin", proveedor, valor)
@@ -0,0 +1,70 @@
+"""
+Matrices de crecimiento Fila × País (p. ej. Subgrupo × País de origen).
+
+Dos métricas para todas las parejas a la vez, sobre un arreglo denso
+meses × filas × países indexado por Mes_ord:
+  - Interanual: mes t vs mes t-12
+  - 12M vs 12M: suma de (t-12, t] vs suma de (t-24, t-12]
+"Hace 12 meses" es desplazar el eje de meses 12 posiciones y las sumas 12M
+salen de un único cumsum sobre ese eje: sin bucle Python por pareja.
+"""
+import numpy as np
+import pandas as pd
+
+HISTORIA_12M        = 24   # meses necesarios para 12M vs 12M
+HISTORIA_INTERANUAL = 13   # meses necesarios para el interanual
+
+
+def cubo_mensual(dff, filas="Subgrupo", columnas="Pais_Origen", valor="CIF"):
+    """`valor` sumado en un arreglo (meses × filas × columnas); sin dato = 0.
+
+    Devuelve (cubo, mes_inicial, etiquetas_filas, etiquetas_columnas)."""
+    t = dff["Mes_ord"].to_numpy(dtype="int64")
+    f_cod, f_lab = pd.factorize(dff[filas], sort=True)
+    c_cod, c_lab = pd.factorize(dff[columnas], sort=True)
+    t0 = int(t.min())
+    forma = (int(t.max()) - t0 + 1, len(f_lab), len(c_lab))
+    plano = np.ravel_multi_index((t - t0, f_cod, c_cod), forma)
+    cubo = np.bincount(plano, weights=dff[valor].to_numpy(dtype="float64"),
+                       minlength=int(np.prod(forma))).reshape(forma)
+    return cubo, t0, np.asarray(f_lab, dtype=object), np.asarray(c_lab, dtype=object)
+
+
+def _variacion(actual, base, min_base):
+    """Crecimiento (%) celda a celda; NaN si la base no alcanza `min_base`."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((base > 0) & (base >= min_base), (actual / base - 1) * 100, np.nan)
+
+
+def matrices_crecimiento(cubo, t0, mes, min_base=0.0):
+    """Crecimientos de todas las celdas en el mes ordinal `mes`.
+
+    Devuelve un dict de matrices (filas × columnas): Mes, Mes_previo,
+    Interanual, CIF_12M, CIF_12M_previo y Crec_12M (%). `min_base` descarta
+    crecimientos sobre bases demasiado pequeñas (millones USD)."""
+    i = mes - t0
+    if i < HISTORIA_INTERANUAL - 1:
+        raise ValueError("se necesitan al menos 13 meses de historia")
+    acum = np.concatenate([np.zeros((1,) + cubo.shape[1:]), np.cumsum(cubo, axis=0)])
+
+    def _suma12(fin):
+        # Suma de los meses (fin-12, fin]; los meses anteriores al cubo cuentan 0
+        return acum[fin + 1] - acum[max(fin - 11, 0)]
+
+    m = {"Mes": cubo[i], "Mes_previo": cubo[i - 12],
+         "CIF_12M": _suma12(i), "CIF_12M_previo": _suma12(i - 12)}
+    m["Interanual"] = _variacion(m["Mes"], m["Mes_previo"], min_base)
+    m["Crec_12M"] = (_variacion(m["CIF_12M"], m["CIF_12M_previo"], min_base)
+                     if i >= HISTORIA_12M - 1 else np.full(cubo.shape[1:], np.nan))
+    return m
+
+
+def tabla_crecimiento(matrices, etiquetas_filas, etiquetas_columnas,
+                      nombre_filas="Subgrupo", nombre_columnas="Pais_Origen"):
+    """Formato largo (una fila por pareja con importaciones en algún periodo)."""
+    f, c = np.nonzero((matrices["CIF_12M"] > 0) | (matrices["CIF_12M_previo"] > 0))
+    tabla = pd.DataFrame({nombre_filas: etiquetas_filas[f],
+                          nombre_columnas: etiquetas_columnas[c]})
+    for clave, matriz in matrices.items():
+        tabla[clave] = matriz[f, c]
+    return tabla
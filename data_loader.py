@@ -3,9 +3,31 @@ Módulo compartido: carga de datos y preprocesamiento de importaciones.
 Fuente: BCE - Importaciones por Grupo, Subgrupo CUODE, Subpartida y País Origen
 """
 import os
+import re
+import threading
+import time
 import unicodedata
+import uuid
+from collections import OrderedDict
+from functools import lru_cache, partial
 import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import cache_resultados
+import uso_firmas
+from actualizacion_mensual import (archivos_detalle, partes_agregado, agregar_mensual,
+                                   COLS_AGREGADO, TEXTO_ARROW, VENTANA_PATH)
+# series_store y matriz_dispersa se importan donde se usan
+
+
+# Motor de lectura/agregación: "pandas" (por defecto) o "polars" (lazy, multihilo)
+BACKEND = os.environ.get("IMPORTACIONES_BACKEND", "pandas").lower()
+
+# Store disperso en memoria para el nivel subpartida (matriz_dispersa.py): "1" lo activa
+DISPERSA = os.environ.get("IMPORTACIONES_DISPERSA", "0") == "1"
 
 # ── Clasificación CUODE ──────────────────────────────────────────────
 GRUPO_MAP = {
@@ -318,10 +340,17 @@ _REGION_PATTERNS = [
     ("SAN BARTOLOM", "América Latina"),
 ]
 
+@lru_cache(maxsize=1)
+def _patrones_region():
+    """Patrones normalizados, construidos en el primer uso (no al importar)."""
+    return tuple((_normalizar(patron), region) for patron, region in _REGION_PATTERNS)
+
+
+@lru_cache(maxsize=None)
 def _asignar_region(pais):
     pais_norm = _normalizar(pais)
-    for patron, region in _REGION_PATTERNS:
-        if _normalizar(patron) in pais_norm:
+    for patron, region in _patrones_region():
+        if patron in pais_norm:
             return region
     return "Otros"
 
@@ -333,35 +362,78 @@ def _asignar_regiones_vectorizado(serie_paises):
     return serie_paises.map(mapa)
 
 
+def _mapear_unicos(serie, funcion):
+    """`funcion` sobre los valores únicos de `serie`, expandida con un take de
+    Arrow: el resultado es texto Arrow sin crear un objeto Python por fila."""
+    codigos, unicos = pd.factorize(serie)
+    valores = pa.array([funcion(u) for u in unicos], pa.string())
+    return pd.Series(pd.arrays.ArrowStringArray(valores.take(pa.array(codigos))),
+                     index=serie.index)
+
+
+
+# Los loaders cacheados reciben la versión del dataset como parte de la clave:
+# al anexar un mes, figura_cacheada/resultado_cacheado (clave por versión)
+# nunca calculan la versión nueva con el DataFrame de la anterior. La función
+# pública resuelve la versión vigente si no se pasa una.
+def load_data_aggregated(version=None):
+    """Datos agregados a nivel Grupo-Subgrupo-País-Mes (sin Subpartida), con
+    el mes como entero Mes_ord (ver agregados.fecha_mes() para graficar).
+    Versión cacheada de leer_agregado() para las páginas."""
+    return _load_data_aggregated(version or version_dataset())
+
 
 @st.cache_data(ttl=3600)
-def load_data_aggregated():
-    """Datos agregados a nivel Grupo-Subgrupo-País-Mes (sin Subpartida).
-    Agrega las 6.7M filas del parquet a ~390K ANTES de convertir a string,
-    evitando asignaciones de memoria gigantes. Mucho más rápido."""
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                        "importaciones_ecuador.parquet")
-    cols = ["Fecha", "Anio", "Mes", "Cod_Grupo", "Cod_Subgrupo",
-            "Pais_Origen", "CIF", "FOB", "TM"]
-    df = pd.read_parquet(path, columns=cols)
+def _load_data_aggregated(version):
+    """`attrs["origen"]` identifica esta carga (sobrevive a la copia de
+    st.cache_data) para la caché de slices de filtros_sidebar."""
+    df = leer_agregado()
+    df.attrs[_ATTR_ORIGEN] = uuid.uuid4().hex
+    return df
+
+
+def _leer_detalle(columns=None, filters=None):
+    """Parquet base + meses anexados como un solo DataFrame (Categorical)."""
+    return pq.read_table(archivos_detalle(), columns=columns, filters=filters).to_pandas()
+
+
+def leer_agregado(path=None):
+    """Agregado Grupo-Subgrupo-País-Mes (~390K filas).
+
+    Sin `path` lee el agregado materializado (base del ETL + una parte por mes
+    anexado); si no existe, o con un `path` explícito, agrega las 6.7M filas
+    del parquet ANTES de convertir a string, evitando asignaciones de memoria
+    gigantes. Sin caché de Streamlit: usable desde scripts (reportes_batch.py)."""
+    partes = partes_agregado() if path is None else []
+    if partes:
+        # Texto leído directo a columnas Arrow (sin pasar por objetos Python)
+        tabla = pq.read_table(partes)
+        return _completar_agregado(tabla.to_pandas(types_mapper={pa.string(): TEXTO_ARROW}.get))
+
+    path = path or archivos_detalle()
+    if BACKEND == "polars":
+        import backend_polars
+        agg = backend_polars.leer_agregado(path, GRUPO_MAP, SUBGRUPO_MAP, _asignar_region)
+        return agg.astype({c: TEXTO_ARROW for c in _TEXTO_AGREGADO})
 
     # Groupby con columnas Categorical directamente (rápido, sin conversión a str)
-    agg = (df.groupby(
-               ["Fecha", "Anio", "Mes", "Cod_Grupo", "Cod_Subgrupo", "Pais_Origen"],
-               observed=True)
-             .agg(CIF=("CIF","sum"), FOB=("FOB","sum"), TM=("TM","sum"))
-             .reset_index())
-
-    # Ahora convertir: solo 254 países/categorías (trivial vs 6.7M filas)
-    agg["Pais_Origen"]  = agg["Pais_Origen"].astype(str).str.strip()
-    agg["Cod_Grupo"]    = agg["Cod_Grupo"].astype(str)
-    agg["Cod_Subgrupo"] = agg["Cod_Subgrupo"].astype(str)
-
-    # Mapear nombres CUODE y regiones sobre las ~390K filas
-    agg["Grupo"]    = agg["Cod_Grupo"].map(GRUPO_MAP).fillna("Otro")
-    agg["Subgrupo"] = agg["Cod_Subgrupo"].map(SUBGRUPO_MAP).fillna("Otro")
-    # Vectorizado: evalúa _asignar_region solo para los 254 países únicos
-    agg["Region"]   = _asignar_regiones_vectorizado(agg["Pais_Origen"])
+    df = pq.read_table(path, columns=COLS_AGREGADO).to_pandas()
+    return _completar_agregado(agregar_mensual(df))
+
+
+_TEXTO_AGREGADO = ["Cod_Grupo", "Cod_Subgrupo", "Pais_Origen", "Grupo", "Subgrupo", "Region"]
+
+
+def _completar_agregado(agg):
+    """Nombres CUODE, región y CIF/FOB en millones sobre el agregado en miles USD.
+
+    Todas las columnas de texto quedan como texto Arrow (string[pyarrow]): el
+    frame cacheado no guarda millones de referencias a str y los isin/groupby
+    de los filtros corren sobre buffers contiguos."""
+    # Mapas evaluados solo sobre los ~11/35/254 valores únicos
+    agg["Grupo"]    = _mapear_unicos(agg["Cod_Grupo"], lambda c: GRUPO_MAP.get(c, "Otro"))
+    agg["Subgrupo"] = _mapear_unicos(agg["Cod_Subgrupo"], lambda c: SUBGRUPO_MAP.get(c, "Otro"))
+    agg["Region"]   = _mapear_unicos(agg["Pais_Origen"], _asignar_region)
 
     # CIF/FOB en miles USD → millones
     agg["CIF"] = agg["CIF"] / 1000
@@ -370,12 +442,44 @@ def load_data_aggregated():
     return agg
 
 
-@st.cache_data(ttl=3600)
-def load_data():
+def load_data(version=None):
     """Carga el parquet completo (con Subpartida). Solo para drilldown."""
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                        "importaciones_ecuador.parquet")
-    df = pd.read_parquet(path)
+    return _load_data(version or version_dataset())
+
+
+@st.cache_data(ttl=3600)
+def _load_data(version):
+    return leer_subpartidas()
+
+
+def load_data_subgrupo(cod_subgrupo, rango=None, paises=(), version=None):
+    """Filas a nivel subpartida de un subgrupo: los filtros de subgrupo, años y
+    países se empujan al lector del parquet, sin cargar las 6.7M filas."""
+    return _load_data_subgrupo(cod_subgrupo, rango, tuple(paises), version or version_dataset())
+
+
+@st.cache_data(ttl=3600)
+def _load_data_subgrupo(cod_subgrupo, rango, paises, version):
+    return leer_subpartidas(rango=rango, cod_subgrupo=cod_subgrupo, paises=paises)
+
+
+def leer_subpartidas(path=None, rango=None, cod_subgrupo=None, paises=()):
+    """Parquet a nivel subpartida (Categorical), opcionalmente filtrado."""
+    path = path or archivos_detalle()
+    if BACKEND == "polars":
+        import backend_polars
+        return backend_polars.leer_subpartidas(path, GRUPO_MAP, SUBGRUPO_MAP, _asignar_region,
+                                               rango, cod_subgrupo, paises)
+
+    filtros = []
+    if rango:
+        filtros += [("Anio", ">=", int(rango[0])), ("Anio", "<=", int(rango[1]))]
+    if cod_subgrupo:
+        filtros.append(("Cod_Subgrupo", "==", cod_subgrupo))
+    if paises:
+        # El ETL escribe el texto sin espacios: el filtro va sobre la columna cruda
+        filtros.append(("Pais_Origen", "in", list(paises)))
+    df = pq.read_table(path, filters=filtros or None).to_pandas()
 
     # Renombrar categorías in-place (solo ~11/35/254 valores, NO 6.7M filas)
     # Esto mantiene Categorical y evita asignar GBs de RAM.
@@ -400,19 +504,404 @@ def load_data():
     df["CIF"] = df["CIF"] / 1000
     if "FOB" in df.columns:
         df["FOB"] = df["FOB"] / 1000
+    return df
+
+
+def load_data_reciente(anio_desde, anio_hasta=None, version=None):
+    """Filas a nivel subpartida desde `anio_desde` (y hasta `anio_hasta`, si se
+    indica), con el filtro empujado al parquet. Para cálculos en lote que
+    solo necesitan unos pocos años."""
+    return _load_data_reciente(anio_desde, anio_hasta, version or version_dataset())
+
+
+@st.cache_data(ttl=3600)
+def _load_data_reciente(anio_desde, anio_hasta, version):
+    cols = ["Anio", "Mes", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida",
+            "Pais_Origen", "CIF", "TM"]
+    filtros = [("Anio", ">=", int(anio_desde))]
+    if anio_hasta is not None:
+        filtros.append(("Anio", "<=", int(anio_hasta)))
+    df = _leer_detalle(columns=cols, filters=filtros)
+    for col in ["Cod_Subgrupo", "Cod_Subpartida", "Subpartida", "Pais_Origen"]:
+        if hasattr(df[col], "cat"):
+            df[col] = df[col].cat.rename_categories(
+                {c: str(c).strip() for c in df[col].cat.categories}
+            )
+    df["CIF"] = df["CIF"] / 1000
+    return df
+
+
+def load_desestacionalizado(version):
+    """Series mensuales desestacionalizadas (total, subgrupos, top países) de
+    la versión `version` del dataset. None si aún no se calcularon para esa
+    versión (python desestacionalizacion.py)."""
+    from desestacionalizacion import DESEST_PATH
+    try:
+        mtime = os.stat(DESEST_PATH).st_mtime_ns
+    except OSError:
+        return None   # sin archivo: no se cachea el "aún no", aparece al terminar el lote
+    return _load_desestacionalizado(version, mtime)
+
+
+@st.cache_data(ttl=3600)
+def _load_desestacionalizado(version, mtime):
+    """Caché por versión y mtime del archivo: reescribirlo invalida un None previo."""
+    from desestacionalizacion import leer_desestacionalizado
+    return leer_desestacionalizado(version)
+
+
+def load_ventana_reciente(version=None):
+    """Últimos 35 meses por subpartida × país, mantenidos al anexar cada mes.
+    Basta para la suma móvil 12M y la banda de 24M del mes más reciente.
+    Devuelve None si aún no se ha materializado."""
+    return _load_ventana_reciente(version or version_dataset())
+
+
+@st.cache_data(ttl=3600)
+def _load_ventana_reciente(version):
+    if not os.path.exists(VENTANA_PATH):
+        return None
+    df = pd.read_parquet(VENTANA_PATH)
+    df["CIF"] = df["CIF"] / 1000
+    return df
+
+
+def load_indice_paises(version=None):
+    """Tabla a nivel subpartida ordenada por país + offsets {país: (inicio, fin)}.
+    Cachea como recurso (sin copia por rerun): el slice de un país es un iloc
+    contiguo en lugar de una máscara sobre 6.7M filas. No mutar el resultado."""
+    return _load_indice_paises(version or version_dataset())
+
+
+@st.cache_resource(max_entries=1)
+def _load_indice_paises(version):
+    """Un solo índice en memoria: al cambiar la versión se descarta el anterior."""
+    cols = ["Anio", "Mes", "Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida",
+            "Subpartida", "Pais_Origen", "CIF", "TM"]
+    df = _leer_detalle(columns=cols)
+    for col in ["Pais_Origen", "Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida"]:
+        if hasattr(df[col], "cat"):
+            df[col] = df[col].cat.rename_categories(
+                {c: str(c).strip() for c in df[col].cat.categories}
+            )
+
+    codigos = df["Pais_Origen"].cat.codes.to_numpy()
+    orden = np.argsort(codigos, kind="stable")
+    df = df.iloc[orden].reset_index(drop=True)
+    limites = np.searchsorted(codigos[orden], np.arange(len(df["Pais_Origen"].cat.categories) + 1))
+    offsets = {
+        str(p): (int(limites[i]), int(limites[i + 1]))
+        for i, p in enumerate(df["Pais_Origen"].cat.categories)
+        if limites[i + 1] > limites[i]
+    }
 
+    grupo_rename = {c: GRUPO_MAP.get(c, "Otro") for c in df["Cod_Grupo"].cat.categories}
+    df["Grupo"] = df["Cod_Grupo"].cat.rename_categories(grupo_rename)
+    subgrupo_rename = {c: SUBGRUPO_MAP.get(c, "Otro") for c in df["Cod_Subgrupo"].cat.categories}
+    df["Subgrupo"] = df["Cod_Subgrupo"].cat.rename_categories(subgrupo_rename)
+    df["CIF"] = df["CIF"] / 1000
+    return df, offsets
+
+
+def slice_pais(indice, pais):
+    """Filas de un país de origen (vista contigua del índice por país)."""
+    df, offsets = indice
+    inicio, fin = offsets.get(pais, (0, 0))
+    return df.iloc[inicio:fin]
+
+
+# ── Índice de búsqueda de subpartidas ────────────────────────────────
+_LIMITE_BUSQUEDA = 25
+
+
+def load_indice_subpartidas(version=None):
+    """Índice de búsqueda: una fila por (Subpartida, Subgrupo) con texto normalizado.
+    Solo lee 5 columnas del parquet y agrega por categorías (~5.4K filas)."""
+    return _load_indice_subpartidas(version or version_dataset())
+
+
+@st.cache_data(ttl=3600)
+def _load_indice_subpartidas(version):
+    cols = ["Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida", "CIF"]
+    df = _leer_detalle(columns=cols)
+    idx = (df.groupby(["Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida"],
+                      observed=True)["CIF"]
+             .sum().reset_index())
+    for col in ["Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Subpartida"]:
+        idx[col] = idx[col].astype(str).str.strip()
+    idx["CIF"]      = idx["CIF"] / 1000
+    idx["Grupo"]    = idx["Cod_Grupo"].map(GRUPO_MAP).fillna("Otro")
+    idx["Subgrupo"] = idx["Cod_Subgrupo"].map(SUBGRUPO_MAP).fillna("Otro")
+    # Código sin puntos ni espacios para búsquedas por prefijo numérico
+    idx["_codigo"] = idx["Cod_Subpartida"].str.replace(r"\D", "", regex=True)
+    idx["_texto"]  = [_texto_busqueda(t) for t in idx["Subpartida"]]
+    return idx.sort_values("CIF", ascending=False).reset_index(drop=True)
+
+
+def _texto_busqueda(s):
+    """Normaliza como _normalizar() y deja solo palabras separadas por espacios."""
+    return " " + re.sub(r"[^A-Z0-9]+", " ", _normalizar(s)).strip() + " "
+
+
+def buscar_subpartidas(indice, consulta, limite=_LIMITE_BUSQUEDA):
+    """Busca por código o descripción, tolerando tildes y palabras parciales.
+
+    Una consulta solo con dígitos (y puntos) se interpreta como prefijo de
+    código. En otro caso cada término debe aparecer en la descripción;
+    los que inician palabra puntúan más. A igualdad, mayor CIF histórico."""
+    codigo = re.sub(r"[.\s]", "", str(consulta))
+    if codigo.isdigit():
+        return indice[indice["_codigo"].str.startswith(codigo)].head(limite)
+
+    terminos = _texto_busqueda(consulta).split()
+    if not terminos:
+        return indice.iloc[0:0]
+
+    match   = pd.Series(True, index=indice.index)
+    puntaje = pd.Series(0, index=indice.index)
+    for t in terminos:
+        en_texto   = indice["_texto"].str.contains(t, regex=False)
+        en_palabra = indice["_texto"].str.contains(" " + t, regex=False)
+        if t.isdigit():
+            en_texto = en_texto | indice["_codigo"].str.startswith(t)
+        match   &= en_texto
+        puntaje += en_texto.astype(int) + 2 * en_palabra.astype(int)
+
+    res = indice[match].assign(_puntaje=puntaje[match])
+    return (res.sort_values(["_puntaje", "CIF"], ascending=[False, False])
+               .head(limite)
+               .drop(columns=["_puntaje"]))
+
+
+# ── Store de series por subpartida (memory-mapped) ───────────────────
+@st.cache_resource(max_entries=1)
+def _store_subpartidas(version):
+    """Abre el store una vez por versión del dataset (mmap compartido entre
+    sesiones); al regenerarlo se vuelve a abrir y se suelta el mmap anterior."""
+    from series_store import abrir_store
+    return abrir_store()
+
+
+@st.cache_resource(max_entries=1)
+def load_matriz_dispersa(version):
+    """Matriz dispersa subpartida × país × mes de todo el detalle (base + meses
+    anexados), compartida entre sesiones. `version` la reconstruye al cambiar
+    el dataset; solo se conserva la vigente."""
+    from matriz_dispersa import construir_dispersa
+    cols = ["Cod_Subpartida", "Cod_Subgrupo", "Pais_Origen", "Anio", "Mes", "CIF", "FOB", "TM"]
+    return construir_dispersa(_leer_detalle(columns=cols))
+
+
+def load_serie_subpartida(cod_subpartida):
+    """Serie mensual Subgrupo × País de una subpartida, leída del store.
+    Con IMPORTACIONES_DISPERSA=1 se toma el rango de filas de la matriz
+    dispersa en memoria. Devuelve None si el store no se ha generado (usar
+    load_data() como respaldo)."""
+    if DISPERSA:
+        from matriz_dispersa import filas_subpartida, a_dataframe
+        matriz = load_matriz_dispersa(version_dataset())
+        df = a_dataframe(matriz, *filas_subpartida(matriz, cod_subpartida))
+        df["CIF"] = df["CIF"] / 1000
+        df["FOB"] = df["FOB"] / 1000
+        return df
+    store = _store_subpartidas(version_dataset())
+    if store is None:
+        return None
+    from series_store import leer_subpartida, agregar_series
+    df = leer_subpartida(store, cod_subpartida)
+    meses = archivos_detalle()[1:]
+    if meses:
+        # Meses anexados después de generar el store (archivos de un mes, filtro empujado)
+        extra = pq.read_table(meses, filters=[("Cod_Subpartida", "==", str(cod_subpartida))])
+        df = pd.concat([df, agregar_series(extra.to_pandas())], ignore_index=True)
+    df["Pais_Origen"] = df["Pais_Origen"].astype(str)
+    df["Cod_Subgrupo"] = df["Cod_Subgrupo"].astype(str)
+    df["CIF"] = df["CIF"] / 1000
+    df["FOB"] = df["FOB"] / 1000
     return df
 
 
+# ── Estado de filtros compartido entre módulos ──────────────────────
+# Los widgets de Streamlit pierden su estado al cambiar de página, así que
+# los valores se guardan en claves propias de session_state y se usan para
+# "sembrar" los widgets de la página siguiente. Los slices filtrados se
+# guardan por firma de filtros: misma firma → mismo DataFrame, sin recalcular.
+_ESTADO_FILTROS  = "_filtros_compartidos"
+_ULTIMA_VISTA    = "_ultima_vista_registrada"
+_ATTR_ORIGEN     = "origen"
+
+
+def version_dataset():
+    """Versión del dataset (mtime + tamaño de base y meses anexados).
+    Cambia al regenerar los datos o al anexar un mes."""
+    try:
+        stats = [os.stat(p) for p in archivos_detalle()]
+    except OSError:
+        return "sin-datos"
+    return f"{int(max(s.st_mtime for s in stats))}-{sum(s.st_size for s in stats)}"
+
+
+def firma_filtros(rango, grupos=(), subgrupos=(), regiones=(), paises=()):
+    """Firma hashable de un estado de filtros (independiente del orden de selección)."""
+    return (
+        tuple(int(a) for a in rango),
+        tuple(sorted(grupos)),
+        tuple(sorted(subgrupos)),
+        tuple(sorted(regiones)),
+        tuple(sorted(paises)),
+    )
+
+
+# Compartida entre sesiones del proceso y acotada en bytes
+# (IMPORTACIONES_SLICES_MB, 256 por defecto; 0 la desactiva).
+_MAX_BYTES_SLICES = int(float(os.environ.get("IMPORTACIONES_SLICES_MB", "256")) * 1024 * 1024)
+
+
+@st.cache_resource
+def _cache_slices():
+    return {"lock": threading.Lock(), "lru": OrderedDict(), "bytes": 0}
+
+
+def _slice_cacheado(df, firma, base, mascara):
+    """`base[mascara(base)]`, guardado por (carga de `df`, firma de filtros).
+
+    `df` es el DataFrame que recibió filtros_sidebar y `attrs["origen"]`
+    identifica su carga; `base` es el slice del paso anterior de la cascada.
+    Solo se guardan slices que quitan filas: si el filtro no restringe nada
+    se devuelve `base` tal cual, sin copia. Los slices se comparten entre
+    sesiones: no mutarlos. Un DataFrame sin marca de origen no se cachea."""
+    origen = df.attrs.get(_ATTR_ORIGEN)
+    cache = _cache_slices()
+    clave = (origen, firma)
+    if origen is not None:
+        with cache["lock"]:
+            if clave in cache["lru"]:
+                cache["lru"].move_to_end(clave)
+                return cache["lru"][clave][0]
+    m = mascara(base)
+    if m.all():
+        return base
+    resultado = base[m]
+    if origen is None or _MAX_BYTES_SLICES <= 0:
+        return resultado
+    n_bytes = int(resultado.memory_usage(index=True, deep=True).sum())
+    if n_bytes > _MAX_BYTES_SLICES:
+        return resultado
+    with cache["lock"]:
+        if clave not in cache["lru"]:
+            cache["lru"][clave] = (resultado, n_bytes)
+            cache["bytes"] += n_bytes
+        while cache["bytes"] > _MAX_BYTES_SLICES:
+            _, (_, liberados) = cache["lru"].popitem(last=False)
+            cache["bytes"] -= liberados
+    return resultado
+
+
+def firma_vigente():
+    """Firma de los filtros aplicados en el último filtros_sidebar() de la sesión."""
+    return st.session_state.get(_ESTADO_FILTROS, {}).get("firma")
+
+
+# ── Caché de figuras Plotly ─────────────────────────────────────────
+# Compartido entre sesiones del proceso: la misma vista con los mismos filtros
+# no vuelve a agregar ni a construir la figura (solo la serializa Streamlit).
+# Debajo, la caché en disco (cache_resultados.py) conserva figuras y
+# agregados entre reinicios y la comparte entre procesos del servidor.
+_MAX_FIGURAS = 256
+
+
+@st.cache_resource
+def _cache_figuras():
+    return {"lock": threading.Lock(), "lru": OrderedDict()}
+
+
+def figura_cacheada(chart_id, firma, construir):
+    """Spec (dict) de la figura para (chart_id, firma, versión del dataset).
+    `construir()` hace la agregación y arma la figura solo si no está en caché.
+    Los parámetros propios del gráfico (sliders, radios) van dentro de `firma`."""
+    version = version_dataset()
+    clave = (chart_id, firma, version)
+    cache = _cache_figuras()
+    with cache["lock"]:
+        if clave in cache["lru"]:
+            cache["lru"].move_to_end(clave)
+            return cache["lru"][clave]
+    spec = cache_resultados.leer(chart_id, firma, version)
+    if spec is cache_resultados.FALTA:
+        t0 = time.perf_counter()
+        spec = construir().to_dict()
+        _registrar_calculo(chart_id, time.perf_counter() - t0, version)
+        cache_resultados.guardar(chart_id, firma, version, spec)
+    with cache["lock"]:
+        cache["lru"][clave] = spec
+        while len(cache["lru"]) > _MAX_FIGURAS:
+            cache["lru"].popitem(last=False)
+    return spec
+
+
+def _script_actual():
+    """Identificador del script (página) que corre en este rerun; None fuera de Streamlit."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return getattr(ctx, "page_script_hash", None) if ctx else None
+
+
+def _registrar_calculo(chart_id, segundos, version):
+    """Costo de una figura no cacheada, ligado al estado de filtros de la página.
+    Solo si ese estado lo fijó filtros_sidebar en esta misma página: las páginas
+    sin filtros_sidebar (p. ej. Comparación) no heredan el de la página anterior."""
+    estado = st.session_state.get(_ESTADO_FILTROS, {})
+    script = estado.get("script")
+    if "pagina" in estado and script is not None and script == _script_actual():
+        uso_firmas.registrar_calculo(estado["pagina"], estado["uso"], chart_id, segundos, version)
+
+
+def resultado_cacheado(consulta, firma, calcular, version=None):
+    """Resultado de `calcular()` (DataFrame, tupla…) desde la caché en disco,
+    por (consulta, firma, versión del dataset). Pensado para envolver el
+    cuerpo de funciones @st.cache_data: la memoria del proceso sigue siendo
+    el primer nivel y el disco evita recalcular tras un reinicio. Si
+    `calcular` lee los loaders con una `version` explícita, pasar la misma."""
+    version = version or version_dataset()
+    valor = cache_resultados.leer(consulta, firma, version)
+    if valor is cache_resultados.FALTA:
+        valor = calcular()
+        cache_resultados.guardar(consulta, firma, version, valor)
+    return valor
+
+
+def _sembrar_widget(key, valor):
+    """Fija el valor inicial de un widget solo si aún no existe en la sesión."""
+    if key not in st.session_state:
+        st.session_state[key] = valor
+
+
 def filtros_sidebar(df, key_prefix=""):
-    """Filtros en cascada: Año → Grupo → Subgrupo → Región → País."""
+    """Filtros en cascada: Año → Grupo → Subgrupo → Región → País.
+
+    Con "Mantener filtros entre módulos" activo, la selección viaja entre
+    páginas y cada paso de la cascada reutiliza el slice ya calculado."""
     st.sidebar.title("Filtros")
 
+    guardado = st.session_state.get(_ESTADO_FILTROS, {})
+    _sembrar_widget(f"{key_prefix}_compartir", guardado.get("compartir", False))
+    compartir = st.sidebar.toggle("Mantener filtros entre módulos",
+                                  key=f"{key_prefix}_compartir")
+    if not compartir:
+        guardado = {}
+
     # 1. Rango de años
     anio_min, anio_max = int(df["Anio"].min()), int(df["Anio"].max())
+    rango_guardado = guardado.get("rango", (anio_min, anio_max))
+    _sembrar_widget(f"{key_prefix}_anio", (max(anio_min, rango_guardado[0]),
+                                           min(anio_max, rango_guardado[1])))
     rango = st.sidebar.slider("Rango de años", anio_min, anio_max,
-                              (anio_min, anio_max), key=f"{key_prefix}_anio")
-    df_disp = df[(df["Anio"] >= rango[0]) & (df["Anio"] <= rango[1])]
+                              key=f"{key_prefix}_anio")
+    firma = firma_filtros(rango)
+    df_disp = _slice_cacheado(
+        df, firma, df,
+        lambda b: (b["Anio"] >= rango[0]) & (b["Anio"] <= rango[1]),
+    )
 
     # 2. Grupo CUODE
     grupo_opts = df_disp[["Cod_Grupo", "Grupo"]].drop_duplicates().copy()
@@ -423,14 +912,18 @@ def filtros_sidebar(df, key_prefix=""):
         lambda x: "ZZZ" if not x.isdigit() else x.zfill(3)
     )
     grupo_opts = grupo_opts.sort_values("_sort")
+    grupo_lista = grupo_opts["Label"].tolist()
+    _sembrar_widget(f"{key_prefix}_grupo",
+                    [l for l in guardado.get("grupo_labels", []) if l in grupo_lista])
     grupo_labels = st.sidebar.multiselect(
         "Grupo CUODE (vacío = todos)",
-        grupo_opts["Label"].tolist(),
+        grupo_lista,
         key=f"{key_prefix}_grupo"
     )
     if grupo_labels:
         grupos_sel = [l.split(" – ", 1)[1] for l in grupo_labels]
-        df_disp = df_disp[df_disp["Grupo"].isin(grupos_sel)]
+        firma = firma_filtros(rango, grupos_sel)
+        df_disp = _slice_cacheado(df, firma, df_disp, lambda b: b["Grupo"].isin(grupos_sel))
     else:
         grupos_sel = []
 
@@ -443,33 +936,99 @@ def filtros_sidebar(df, key_prefix=""):
         lambda x: "ZZZ" if not x.isdigit() else x.zfill(4)
     )
     subgrupo_opts = subgrupo_opts.sort_values("_sort")
+    subgrupo_lista = subgrupo_opts["Label"].tolist()
+    _sembrar_widget(f"{key_prefix}_subgrupo",
+                    [l for l in guardado.get("subgrupo_labels", []) if l in subgrupo_lista])
     subgrupo_labels = st.sidebar.multiselect(
         "Subgrupo (vacío = todos)",
-        subgrupo_opts["Label"].tolist(),
+        subgrupo_lista,
         key=f"{key_prefix}_subgrupo"
     )
     if subgrupo_labels:
         subgrupos_sel = [l.split(" – ", 1)[1] for l in subgrupo_labels]
-        df_disp = df_disp[df_disp["Subgrupo"].isin(subgrupos_sel)]
+        firma = firma_filtros(rango, grupos_sel, subgrupos_sel)
+        df_disp = _slice_cacheado(df, firma, df_disp,
+                                  lambda b: b["Subgrupo"].isin(subgrupos_sel))
     else:
         subgrupos_sel = []
 
     # 4. Región de origen
+    region_lista = sorted(df_disp["Region"].unique())
+    _sembrar_widget(f"{key_prefix}_region",
+                    [r for r in guardado.get("regiones", []) if r in region_lista])
     regiones = st.sidebar.multiselect(
         "Región de origen (vacío = todas)",
-        sorted(df_disp["Region"].unique()),
+        region_lista,
         key=f"{key_prefix}_region"
     )
     if regiones:
-        df_disp = df_disp[df_disp["Region"].isin(regiones)]
+        firma = firma_filtros(rango, grupos_sel, subgrupos_sel, regiones)
+        df_disp = _slice_cacheado(df, firma, df_disp, lambda b: b["Region"].isin(regiones))
 
     # 5. País de origen
+    pais_lista = sorted(df_disp["Pais_Origen"].unique())
+    _sembrar_widget(f"{key_prefix}_pais",
+                    [p for p in guardado.get("paises", []) if p in pais_lista])
     paises = st.sidebar.multiselect(
         "País de origen (vacío = todos)",
-        sorted(df_disp["Pais_Origen"].unique()),
+        pais_lista,
         key=f"{key_prefix}_pais"
     )
     if paises:
-        df_disp = df_disp[df_disp["Pais_Origen"].isin(paises)]
+        firma = firma_filtros(rango, grupos_sel, subgrupos_sel, regiones, paises)
+        df_disp = _slice_cacheado(df, firma, df_disp, lambda b: b["Pais_Origen"].isin(paises))
+
+    st.session_state[_ESTADO_FILTROS] = {
+        "firma":           firma_filtros(rango, grupos_sel, subgrupos_sel, regiones, paises),
+        "compartir":       compartir,
+        "rango":           tuple(rango),
+        "grupo_labels":    list(grupo_labels),
+        "subgrupo_labels": list(subgrupo_labels),
+        "regiones":        list(regiones),
+        "paises":          list(paises),
+        "pagina":          key_prefix,
+        "script":          _script_actual(),
+        "uso":             uso_firmas.estado_filtros(rango, grupo_labels, subgrupo_labels,
+                                                     regiones, paises),
+    }
+    # Registro anónimo del estado (sin sesión ni usuario) para calentar_cache.py:
+    # una vista por cambio de página o de filtros, no por cada rerun de la sesión
+    vista = (key_prefix, st.session_state[_ESTADO_FILTROS]["firma"])
+    if st.session_state.get(_ULTIMA_VISTA) != vista:
+        st.session_state[_ULTIMA_VISTA] = vista
+        uso_firmas.registrar_vista(key_prefix, st.session_state[_ESTADO_FILTROS]["uso"])
 
     return df_disp, rango, grupos_sel, paises
+
+
+def _leer_archivo(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+
+def boton_exportar(key, etiqueta="Exportar filas (nivel subpartida)", **filtros):
+    """Exporta en streaming las filas del parquet que cumplen `filtros` y
+    ofrece la descarga. El archivo se prepara bajo demanda (no en cada rerun)."""
+    with st.expander(etiqueta):
+        formato = st.radio("Formato", ["csv", "parquet"], horizontal=True,
+                           key=f"{key}_formato")
+        preparado = st.session_state.get(f"{key}_archivo")
+        firma = (version_dataset(), formato, repr(sorted(filtros.items())))
+        if preparado and (preparado["firma"] != firma or not os.path.exists(preparado["ruta"])):
+            preparado = None
+        if preparado is None and st.button("Preparar archivo", key=f"{key}_preparar"):
+            from exportar import exportar_a_temporal, borrar_temporal   # pyarrow.dataset/csv: solo al exportar
+            anterior = st.session_state.pop(f"{key}_archivo", None)
+            if anterior:
+                borrar_temporal(anterior["ruta"])   # un archivo por botón y sesión
+            with st.spinner("Exportando por lotes..."):
+                ruta, n = exportar_a_temporal(archivos_detalle(), formato, **filtros)
+            preparado = {"firma": firma, "ruta": ruta, "n": n}
+            st.session_state[f"{key}_archivo"] = preparado
+        if preparado:
+            st.caption(f"{preparado['n']:,} filas · "
+                       f"{os.path.getsize(preparado['ruta']) / 1e6:.1f} MB")
+            # Callable: el archivo se lee solo al pulsar, no en cada rerun
+            st.download_button("Descargar", partial(_leer_archivo, preparado["ruta"]),
+                               file_name=f"importaciones.{formato}",
+                               on_click="ignore", key=f"{key}_descargar")
@@ -0,0 +1,168 @@
+"""
+Desestacionalización en lote de las series mensuales de CIF: total, cada
+subgrupo CUODE y los principales países de origen.
+
+Descomposición clásica sobre un arreglo denso series × meses (todas las
+series en una sola pasada de numpy, sin ajuste por serie):
+  tendencia = media móvil centrada 2×12
+  factor    = promedio por mes calendario de x / tendencia, normalizado para
+              que los 12 factores promedien 1
+  ajustada  = x / factor
+Las series con ceros o negativos usan la variante aditiva (x - tendencia).
+A diferencia de la suma móvil 12M, la serie ajustada no se retrasa seis
+meses en los puntos de giro.
+
+Se recalcula después de cada actualización de datos (ETL completo o mes
+anexado) y se guarda en desestacionalizado.parquet con la versión del
+dataset en los metadatos; las páginas solo leen el resultado
+(data_loader.load_desestacionalizado).
+
+Uso:
+    python desestacionalizacion.py [--paises 20]
+"""
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agregados import fecha_mes
+
+DESEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "desestacionalizado.parquet")
+N_PAISES = 20
+_CLAVE_VERSION = b"version_dataset"
+_PESOS_2X12 = np.r_[0.5, np.ones(11), 0.5] / 12
+
+
+def matriz_series(df, col=None, valor="CIF"):
+    """`valor` mensual de cada serie de `col` (None = total) en un arreglo
+    series × meses. Meses sin registro dentro del rango de la serie = 0;
+    antes del primero y después del último = NaN.
+
+    Devuelve (matriz, mes_inicial, etiquetas)."""
+    claves = ["Mes_ord"] + ([col] if col else [])
+    serie = df.groupby(claves, observed=True)[valor].sum().reset_index()
+    if col:
+        cod, etiquetas = pd.factorize(serie[col], sort=True)
+        etiquetas = np.asarray(etiquetas, dtype=object).astype(str)
+    else:
+        cod, etiquetas = np.zeros(len(serie), dtype="int64"), np.array(["Total"], dtype=object)
+    t = serie["Mes_ord"].to_numpy(dtype="int64")
+    t0 = int(t.min())
+    n, m = len(etiquetas), int(t.max()) - t0 + 1
+
+    matriz = np.zeros((n, m))
+    matriz[cod, t - t0] = serie[valor].to_numpy(dtype="float64")
+    primero = np.full(n, m)
+    ultimo = np.full(n, -1)
+    np.minimum.at(primero, cod, t - t0)
+    np.maximum.at(ultimo, cod, t - t0)
+    columnas = np.arange(m)
+    matriz[(columnas < primero[:, None]) | (columnas > ultimo[:, None])] = np.nan
+    return matriz, t0, etiquetas
+
+
+def descomponer(matriz, t0):
+    """Ajuste estacional de todas las filas de `matriz` (series × meses, la
+    columna 0 es el mes ordinal `t0`). Devuelve (ajustada, factor, multiplicativa);
+    NaN donde no hay historia suficiente (al menos 2 años por serie)."""
+    n, m = matriz.shape
+    tendencia = np.full((n, m), np.nan)
+    if m >= 13:
+        ventanas = np.lib.stride_tricks.sliding_window_view(matriz, 13, axis=1)
+        tendencia[:, 6:m - 6] = ventanas @ _PESOS_2X12
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)   # medias de solo NaN
+        multiplicativa = np.nanmin(matriz, axis=1) > 0
+        relativo = np.where(multiplicativa[:, None], matriz / tendencia, matriz - tendencia)
+
+        mes_cal = (t0 + np.arange(m)) % 12
+        estacional = np.full((n, 12), np.nan)
+        for k in range(12):
+            if (mes_cal == k).any():
+                estacional[:, k] = np.nanmean(relativo[:, mes_cal == k], axis=1)
+        centro = np.nanmean(estacional, axis=1, keepdims=True)
+        estacional = np.where(multiplicativa[:, None], estacional / centro, estacional - centro)
+
+        factor = estacional[:, mes_cal]
+        ajustada = np.where(multiplicativa[:, None], matriz / factor, matriz - factor)
+    return ajustada, factor, multiplicativa
+
+
+def desestacionalizar_todo(df, n_paises=N_PAISES, valor="CIF"):
+    """Tabla larga (Nivel, Serie, Mes_ord, Fecha, CIF, CIF_sa, Factor) con el
+    total, todos los subgrupos y los `n_paises` países de mayor CIF."""
+    top_paises = (df.groupby("Pais_Origen", observed=True)[valor].sum()
+                    .nlargest(n_paises).index)
+    niveles = [
+        ("Total",       None,          df),
+        ("Subgrupo",    "Subgrupo",    df),
+        ("Pais_Origen", "Pais_Origen", df[df["Pais_Origen"].isin(top_paises)]),
+    ]
+    partes = []
+    for nivel, col, datos in niveles:
+        matriz, t0, etiquetas = matriz_series(datos, col, valor)
+        ajustada, factor, _ = descomponer(matriz, t0)
+        fila, columna = np.nonzero(~np.isnan(matriz))
+        partes.append(pd.DataFrame({
+            "Nivel":   nivel,
+            "Serie":   etiquetas[fila],
+            "Mes_ord": t0 + columna,
+            valor:     matriz[fila, columna],
+            f"{valor}_sa": ajustada[fila, columna],
+            "Factor":  factor[fila, columna],
+        }))
+    res = pd.concat(partes, ignore_index=True)
+    res.insert(3, "Fecha", fecha_mes(res["Mes_ord"]))
+    return res
+
+
+def guardar(res, version, path=DESEST_PATH):
+    """Escritura atómica con la versión del dataset en los metadatos."""
+    tabla = pa.Table.from_pandas(res, preserve_index=False)
+    tabla = tabla.replace_schema_metadata({**(tabla.schema.metadata or {}),
+                                           _CLAVE_VERSION: str(version).encode()})
+    tmp = path + ".tmp"
+    pq.write_table(tabla, tmp)
+    os.replace(tmp, path)
+
+
+def leer_desestacionalizado(version, path=DESEST_PATH):
+    """Resultado guardado si corresponde a `version`; None si falta o es de otra."""
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (FileNotFoundError, OSError):
+        return None
+    if metadata.get(_CLAVE_VERSION, b"").decode() != str(version):
+        return None
+    return pq.read_table(path).to_pandas()
+
+
+def actualizar(n_paises=N_PAISES):
+    """Recalcula y guarda las series de la versión vigente del dataset."""
+    from data_loader import leer_agregado, version_dataset
+    version = version_dataset()
+    res = desestacionalizar_todo(leer_agregado(), n_paises)
+    guardar(res, version)
+    return res, version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paises", type=int, default=N_PAISES,
+                        help="número de países de origen (por CIF total) a ajustar")
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    res, version = actualizar(args.paises)
+    print(f"{res.groupby('Nivel')['Serie'].nunique().to_dict()} series ajustadas, "
+          f"versión {version} ({time.perf_counter() - t0:.1f}s) → {DESEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
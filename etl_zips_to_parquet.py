@@ -3,17 +3,50 @@ ETL: Lee los 26 ZIPs de importaciones del BCE y genera importaciones_ecuador.par
 Fuente: BCE - Importaciones por Grupo, Subgrupo CUODE, Subpartida y País Origen
 Valores originales: miles de USD (TM, FOB, CIF)
 """
+import argparse
 import os
 import zipfile
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from series_store import construir_store, STORE_PATH
+from actualizacion_mensual import materializar, meses_posteriores
 
 # ── Configuración ────────────────────────────────────────────────────
 ZIP_DIR   = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                          "..", "exportaciones", "IMPORTACIONES")
 OUTPUT    = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                          "importaciones_ecuador.parquet")
+RECHAZOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "etl_rechazos")
 ANIOS     = list(range(2000, 2026))
 
+# Columnas.csv: 6 líneas de preámbulo, encabezado y 12 columnas (col 3 es vacía)
+LINEAS_PREAMBULO = 6
+COLUMNAS_CSV = [
+    "Periodo", "Cod_Grupo", "Grupo", "_drop",
+    "Cod_Subgrupo", "Subgrupo", "Cod_Subpartida", "Subpartida",
+    "Pais_Origen", "TM", "FOB", "CIF"
+]
+TEXTO_CSV = ["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
+             "Cod_Subpartida", "Subpartida", "Pais_Origen"]
+
+# Perfiles de escritura del parquet (compresión, diccionario, row groups).
+# "defecto" = opciones de pyarrow: snappy, diccionario en todas las columnas,
+# row groups de ~1M filas. benchmark_parquet.py mide cada perfil.
+PERFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfiles_parquet")
+_CODIGOS = ["Cod_Grupo", "Cod_Subgrupo", "Cod_Subpartida", "Pais_Origen"]
+PERFILES_PARQUET = {
+    "defecto":            {},
+    "snappy_rg128k":      dict(compression="snappy", row_group_size=131_072),
+    "zstd":               dict(compression="zstd", compression_level=3),
+    "zstd9":              dict(compression="zstd", compression_level=9),
+    "zstd_rg256k":        dict(compression="zstd", compression_level=3, row_group_size=262_144),
+    # Diccionario solo en códigos: descripciones (Subpartida, Grupo…) en PLAIN
+    "zstd_sin_dict_desc": dict(compression="zstd", compression_level=3, use_dictionary=_CODIGOS),
+}
+
 MES_MAP = {
     "Ene": 1, "Feb": 2, "Mar": 3,  "Abr": 4,  "May": 5,  "Jun": 6,
     "Jul": 7, "Ago": 8, "Sep": 9,  "Oct": 10, "Nov": 11, "Dic": 12,
@@ -42,35 +75,41 @@ def limpiar_numero(s):
 ANIOS_CON_F = {2007, 2008, 2009, 2010, 2018, 2019, 2020, 2021}
 
 
-def leer_zip(anio):
+def ruta_zip(anio):
     fname = f"{anio}f.zip" if anio in ANIOS_CON_F else f"{anio}.zip"
-    path = os.path.join(ZIP_DIR, fname)
+    return os.path.join(ZIP_DIR, fname)
+
 
-    with zipfile.ZipFile(path) as z:
+def leer_zip(anio, motor="pandas"):
+    """Columnas.csv del ZIP del año con el lector `motor` ("pandas" o "arrow")."""
+    with zipfile.ZipFile(ruta_zip(anio)) as z:
         with z.open("Columnas.csv") as f:
-            df = pd.read_csv(
-                f,
-                encoding="utf-8",
-                skiprows=6,
-                header=0,
-                sep=",",
-                quotechar='"',
-                on_bad_lines="skip",
-                dtype=str,
-            )
+            if motor == "arrow":
+                return leer_columnas_arrow(f, os.path.join(RECHAZOS_DIR, f"{anio}.csv"))
+            return leer_columnas_csv(f)
+
+
+def leer_columnas_csv(f):
+    """Columnas.csv del BCE (ruta o archivo abierto) → filas limpias del parquet."""
+    df = pd.read_csv(
+        f,
+        encoding="utf-8",
+        skiprows=LINEAS_PREAMBULO,
+        header=0,
+        sep=",",
+        quotechar='"',
+        on_bad_lines="skip",
+        dtype=str,
+        keep_default_na=False,   # texto literal ("NA", vacío) como en leer_columnas_arrow
+    )
 
     # Renombrar por posición (col 3 es vacía)
-    df.columns = [
-        "Periodo", "Cod_Grupo", "Grupo", "_drop",
-        "Cod_Subgrupo", "Subgrupo", "Cod_Subpartida", "Subpartida",
-        "Pais_Origen", "TM", "FOB", "CIF"
-    ]
+    df.columns = COLUMNAS_CSV
     df = df.drop(columns=["_drop"])
 
-    # Limpiar strings
-    for col in ["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
-                "Cod_Subpartida", "Subpartida", "Pais_Origen"]:
-        df[col] = df[col].astype(str).str.strip()
+    # Limpiar strings (campo faltante → "", no "nan": igual que el lector Arrow)
+    for col in TEXTO_CSV:
+        df[col] = df[col].fillna("").astype(str).str.strip()
 
     # Filtrar filas sin periodo válido
     df = df[df["Periodo"].str.match(r"^\d{4}\s*/", na=False)]
@@ -100,32 +139,152 @@ def leer_zip(anio):
     return df
 
 
-# ── Procesar todos los años ──────────────────────────────────────────
-print("Procesando ZIPs de importaciones...")
-partes = []
-for anio in ANIOS:
-    print(f"  {anio}...", end=" ")
-    try:
-        df = leer_zip(anio)
-        partes.append(df)
-        print(f"{len(df):,} filas")
-    except Exception as e:
-        print(f"ERROR: {e}")
-
-# ── Concatenar y guardar ─────────────────────────────────────────────
-print("\nConcatenando...")
-df_total = pd.concat(partes, ignore_index=True)
-
-# Tipos eficientes
-for col in ["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
-            "Cod_Subpartida", "Subpartida", "Pais_Origen"]:
-    df_total[col] = df_total[col].astype("category")
-
-print(f"Total filas: {len(df_total):,}")
-print(f"Años: {df_total['Anio'].min()}–{df_total['Anio'].max()}")
-print(f"Columnas: {df_total.columns.tolist()}")
-print(f"Memoria: {df_total.memory_usage(deep=True).sum() / 1e6:.1f} MB")
-
-df_total.to_parquet(OUTPUT, index=False)
-print(f"\nGuardado: {OUTPUT}")
-print(f"Tamaño: {os.path.getsize(OUTPUT)/1e6:.1f} MB")
+def _numero_arrow(col):
+    """'1.234,5' → 1234.5 con kernels de Arrow; texto no numérico → nulo."""
+    s = pc.replace_substring(pc.utf8_trim_whitespace(col), ".", "")
+    s = pc.replace_substring(s, ",", ".")
+    valido = pc.match_substring_regex(s, r"^[-+]?(\d+\.?\d*|\.\d+)$")
+    return pc.cast(pc.if_else(valido, s, pa.scalar(None, pa.string())), pa.float64())
+
+
+def leer_columnas_arrow(f, rechazos=None):
+    """Columnas.csv con el lector CSV multihilo de Arrow → mismas filas y
+    columnas que leer_columnas_csv.
+
+    Lee en streaming (f puede ser el archivo abierto dentro del ZIP), salta el
+    preámbulo y carga cada campo como texto Arrow, sin objetos Python; período
+    y números ('1.234,5') se convierten con kernels vectorizados. Las filas mal
+    formadas se cuentan en df.attrs["filas_rechazadas"] y, si hay alguna y se
+    da `rechazos`, se escriben en ese CSV (línea, si se conoce, y texto)."""
+    malas = []
+
+    def _rechazar(fila):
+        malas.append((fila.number, fila.text))
+        return "skip"
+
+    tabla = pacsv.read_csv(
+        f,
+        read_options=pacsv.ReadOptions(skip_rows=LINEAS_PREAMBULO + 1,
+                                       column_names=COLUMNAS_CSV, use_threads=True),
+        parse_options=pacsv.ParseOptions(quote_char='"', invalid_row_handler=_rechazar),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in COLUMNAS_CSV},
+            include_columns=[c for c in COLUMNAS_CSV if c != "_drop"],
+        ),
+    )
+
+    # '2024 / 01 - Ene' → año 2024, mes por nombre (como parse_periodo)
+    periodo = pc.extract_regex(tabla["Periodo"], r"^\s*(?P<anio>\d{4})\s*/[^-]*-\s*(?P<mes>\w+)")
+    anio = pc.cast(pc.struct_field(periodo, [0]), pa.int64())
+    mes = pc.add(pc.index_in(pc.struct_field(periodo, [1]),
+                             value_set=pa.array(list(MES_MAP))), 1).cast(pa.int64())
+
+    columnas = {c: pc.utf8_trim_whitespace(tabla[c]) for c in TEXTO_CSV}
+    columnas.update({c: _numero_arrow(tabla[c]) for c in ["TM", "FOB", "CIF"]})
+    columnas.update(Anio=anio, Mes=mes)
+    limpia = pa.table(columnas)
+    valida = pc.and_(pc.and_(pc.is_valid(anio), pc.is_valid(mes)),
+                     pc.and_(pc.match_substring_regex(columnas["Cod_Grupo"], r"^\d+$"),
+                             pc.is_valid(columnas["CIF"])))
+    df = limpia.filter(valida).to_pandas()
+    df["Fecha"] = pd.to_datetime(pd.DataFrame({"year": df["Anio"], "month": df["Mes"], "day": 1}))
+
+    df.attrs["filas_rechazadas"] = len(malas)
+    if malas and rechazos:
+        os.makedirs(os.path.dirname(os.path.abspath(rechazos)), exist_ok=True)
+        pd.DataFrame(malas, columns=["Linea", "Texto"]).to_csv(rechazos, index=False)
+    return df
+
+
+def escribir_parquet(df, path, perfil="defecto"):
+    """Escribe el dataset con las opciones de PERFILES_PARQUET[perfil]."""
+    df.to_parquet(path, index=False, **PERFILES_PARQUET[perfil])
+
+
+def escribir_perfiles(df, perfiles=None, directorio=PERFILES_DIR):
+    """Una copia del dataset por perfil en `directorio`/<perfil>.parquet.
+    Devuelve {perfil: ruta}."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {}
+    for perfil in perfiles or PERFILES_PARQUET:
+        rutas[perfil] = os.path.join(directorio, f"{perfil}.parquet")
+        escribir_parquet(df, rutas[perfil], perfil)
+    return rutas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--motor", choices=["pandas", "arrow"], default="pandas",
+                        help="lector de Columnas.csv: pandas o CSV multihilo de Arrow "
+                             "(cuenta las filas mal formadas y las guarda en etl_rechazos/)")
+    parser.add_argument("--perfil", choices=list(PERFILES_PARQUET), default="defecto",
+                        help="codificación/compresión del parquet generado")
+    parser.add_argument("--perfiles", nargs="*", choices=list(PERFILES_PARQUET),
+                        help="escribe además una copia por perfil en perfiles_parquet/ "
+                             "(sin nombres: todos) para benchmark_parquet.py")
+    args = parser.parse_args(argv)
+
+    # ── Procesar todos los años ──────────────────────────────────────
+    print(f"Procesando ZIPs de importaciones (lector {args.motor})...")
+    partes = []
+    for anio in ANIOS:
+        print(f"  {anio}...", end=" ")
+        try:
+            df = leer_zip(anio, args.motor)
+            partes.append(df)
+            rechazadas = df.attrs.get("filas_rechazadas")
+            print(f"{len(df):,} filas" + (f", {rechazadas:,} rechazadas" if rechazadas else ""))
+        except Exception as e:
+            print(f"ERROR: {e}")
+
+    # ── Concatenar y guardar ─────────────────────────────────────────
+    print("\nConcatenando...")
+    df_total = pd.concat(partes, ignore_index=True)
+
+    # Tipos eficientes
+    for col in ["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
+                "Cod_Subpartida", "Subpartida", "Pais_Origen"]:
+        df_total[col] = df_total[col].astype("category")
+
+    print(f"Total filas: {len(df_total):,}")
+    print(f"Años: {df_total['Anio'].min()}–{df_total['Anio'].max()}")
+    print(f"Columnas: {df_total.columns.tolist()}")
+    print(f"Memoria: {df_total.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+    # Los meses anexados posteriores al último mes leído se conservan; se
+    # comprueba antes de reemplazar el parquet base
+    posteriores = meses_posteriores(df_total)
+    if posteriores:
+        print(f"Se conservan {len(posteriores)} meses anexados posteriores "
+              f"({os.path.basename(posteriores[0])[:7]}–{os.path.basename(posteriores[-1])[:7]})")
+
+    escribir_parquet(df_total, OUTPUT, args.perfil)
+    print(f"\nGuardado: {OUTPUT} (perfil {args.perfil})")
+    print(f"Tamaño: {os.path.getsize(OUTPUT)/1e6:.1f} MB")
+
+    # ── Agregado materializado y ventana reciente ────────────────────
+    # Justo después del parquet base: los meses anexados que ya cubre se
+    # borran aquí, antes de los pasos lentos, para no contarlos dos veces
+    print("\nMaterializando agregado mensual y ventana reciente...")
+    materializar(df_total)
+
+    if args.perfiles is not None:
+        print("\nEscribiendo perfiles de codificación...")
+        for perfil, ruta in escribir_perfiles(df_total, args.perfiles).items():
+            print(f"  {perfil:<20}{os.path.getsize(ruta)/1e6:>8.1f} MB")
+
+    # ── Store de series por subpartida (para el drilldown) ───────────
+    print("\nConstruyendo store de series por subpartida...")
+    n_filas, n_codigos = construir_store(df_total)
+    print(f"Guardado: {STORE_PATH} ({n_filas:,} filas, {n_codigos:,} subpartidas)")
+    print(f"Tamaño: {os.path.getsize(STORE_PATH)/1e6:.1f} MB")
+
+    # ── Ajuste estacional en lote de todas las series ────────────────
+    print("\nDesestacionalizando series de subgrupos y países...")
+    from desestacionalizacion import actualizar as desestacionalizar, DESEST_PATH
+    desestacionalizar()
+    print(f"Guardado: {DESEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
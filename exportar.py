@@ -0,0 +1,123 @@
+"""
+Exportación de filas a nivel subpartida en streaming, con memoria acotada.
+
+Lee el parquet por lotes (pyarrow.dataset) con los filtros empujados al
+escaneo y escribe cada lote a CSV o Parquet sin materializar el resultado
+completo: la memoria es del orden de un lote, aunque se exporten millones
+de filas.
+"""
+import glob
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+FORMATOS       = ("csv", "parquet")
+TAM_LOTE       = 128_000
+HORAS_TEMPORAL = 6   # antigüedad a partir de la cual se borra un archivo exportado
+COLUMNAS       = ["Fecha", "Anio", "Mes", "Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo",
+                  "Cod_Subpartida", "Subpartida", "Pais_Origen", "TM", "FOB", "CIF"]
+
+
+def expresion_filtros(rango=None, cod_grupos=None, cod_subgrupos=None,
+                      paises=None, cod_subpartidas=None):
+    """Expresión de pyarrow.dataset equivalente a los filtros del dashboard.
+    None = sin filtro en esa dimensión."""
+    partes = []
+    if rango:
+        partes += [ds.field("Anio") >= int(rango[0]), ds.field("Anio") <= int(rango[1])]
+    for col, valores in [("Cod_Grupo", cod_grupos), ("Cod_Subgrupo", cod_subgrupos),
+                         ("Pais_Origen", paises), ("Cod_Subpartida", cod_subpartidas)]:
+        if valores is not None:
+            partes.append(ds.field(col).isin(pa.array([str(v) for v in valores])))
+    expr = None
+    for p in partes:
+        expr = p if expr is None else expr & p
+    return expr
+
+
+def _lotes(path, expr, columnas, tam_lote):
+    """Lotes con columnas de texto sin espacios y CIF/FOB en millones USD."""
+    dataset = ds.dataset(path, format="parquet")
+    presentes = [c for c in columnas if c in dataset.schema.names]
+    for lote in dataset.to_batches(columns=presentes, filter=expr, batch_size=tam_lote):
+        if lote.num_rows == 0:
+            continue
+        cols = []
+        for nombre, arr in zip(lote.schema.names, lote.columns):
+            if pa.types.is_dictionary(arr.type):
+                arr = arr.cast(arr.type.value_type)
+            if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+                arr = pc.utf8_trim_whitespace(arr)
+            elif nombre in ("CIF", "FOB"):
+                arr = pc.divide(arr, 1000.0)
+            cols.append(arr)
+        yield pa.RecordBatch.from_arrays(cols, names=lote.schema.names)
+
+
+def exportar_filas(path, destino, formato="csv", columnas=COLUMNAS,
+                   tam_lote=TAM_LOTE, **filtros):
+    """Escribe en `destino` las filas que cumplen los filtros. Devuelve N° de filas.
+    `path` puede ser un parquet o una lista (base + meses anexados)."""
+    if formato not in FORMATOS:
+        raise ValueError(f"formato debe ser uno de {FORMATOS}")
+    expr = expresion_filtros(**filtros)
+    n = 0
+    writer = None
+    try:
+        for lote in _lotes(path, expr, columnas, tam_lote):
+            if writer is None:
+                writer = (pacsv.CSVWriter(destino, lote.schema) if formato == "csv"
+                          else pq.ParquetWriter(destino, lote.schema, compression="zstd"))
+            writer.write_batch(lote)
+            n += lote.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # Sin filas: archivo vacío válido (solo encabezado / esquema)
+        vacio = pa.table({c: pa.array([], pa.string()) for c in columnas})
+        if formato == "csv":
+            pacsv.write_csv(vacio, destino)
+        else:
+            pq.write_table(vacio, destino)
+    return n
+
+
+def borrar_temporal(ruta):
+    """Borra un archivo exportado (sin error si ya no existe)."""
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def limpiar_temporales(horas=HORAS_TEMPORAL):
+    """Borra los exportados `importaciones_*` más antiguos que `horas`
+    (sesiones que se cerraron sin reemplazar su archivo)."""
+    limite = time.time() - horas * 3600
+    for formato in FORMATOS:
+        patron = os.path.join(tempfile.gettempdir(), f"importaciones_*.{formato}")
+        for ruta in glob.glob(patron):
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+
+def exportar_a_temporal(path, formato="csv", **filtros):
+    """Exporta a un archivo temporal. Devuelve (ruta, N° de filas)."""
+    limpiar_temporales()
+    fd, destino = tempfile.mkstemp(prefix="importaciones_", suffix=f".{formato}")
+    os.close(fd)
+    try:
+        return destino, exportar_filas(path, destino, formato, **filtros)
+    except BaseException:
+        borrar_temporal(destino)
+        raise
@@ -0,0 +1,136 @@
+"""
+Matriz dispersa subpartida × país × mes (CSR en numpy), opcional en memoria.
+
+Filas: una por (Subpartida, Subgrupo, País) con datos, ordenadas por
+subpartida; columnas: meses (Mes_ord - mes_inicial). CIF, FOB y TM comparten
+la misma estructura (indptr, columnas) y solo guardan las celdas no vacías,
+en float32. Las etiquetas son diccionarios enteros: cada fila guarda códigos
+de subpartida, subgrupo y país que indexan arreglos de etiquetas ordenadas.
+
+Frente al DataFrame Categorical de load_data() (Fecha, Anio, Mes, siete
+columnas de texto y tres medidas en float64 por cada una de ~6.7M filas)
+ocupa 3×4 + 2 bytes por celda. Una subpartida es un rango contiguo de filas
+que se expande a formato largo solo al pedirla (a_dataframe).
+
+Se activa con IMPORTACIONES_DISPERSA=1 (ver data_loader). scipy no es
+necesario; como_scipy() devuelve la misma matriz como csr_matrix si está
+instalado.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from agregados import mes_ordinal
+
+MEDIDAS = ("CIF", "FOB", "TM")
+
+
+class MatrizDispersa(NamedTuple):
+    indptr: np.ndarray              # (n_filas + 1,) inicio de cada fila en las celdas
+    columnas: np.ndarray            # (nnz,) int16: mes - mes_inicial
+    valores: dict                   # {medida: (nnz,) float32}, miles USD / TM
+    fila_subpartida: np.ndarray     # (n_filas,) código → subpartidas
+    fila_subgrupo: np.ndarray       # (n_filas,) código → subgrupos
+    fila_pais: np.ndarray           # (n_filas,) código → paises
+    subpartidas: np.ndarray         # etiquetas ordenadas
+    subgrupos: np.ndarray
+    paises: np.ndarray
+    limites_subpartida: np.ndarray  # filas [limites[i], limites[i+1]) de la subpartida i
+    mes_inicial: int
+    n_meses: int
+
+
+def _codificar(serie):
+    """Códigos enteros densos y etiquetas ordenadas (texto sin espacios).
+    Con Categorical solo se procesan las categorías, no las 6.7M filas."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        etiquetas = serie.cat.categories.astype(str).str.strip()
+        remapeo, unicas = pd.factorize(etiquetas, sort=True)
+        return remapeo[serie.cat.codes.to_numpy()], np.asarray(unicas, dtype=object)
+    codigos, unicas = pd.factorize(serie.astype(str).str.strip(), sort=True)
+    return codigos, np.asarray(unicas, dtype=object)
+
+
+def construir_dispersa(df):
+    """df a nivel subpartida (Cod_Subpartida, Cod_Subgrupo, Pais_Origen, Anio,
+    Mes, CIF, FOB, TM) → MatrizDispersa. Celdas repetidas se suman."""
+    sp, subpartidas = _codificar(df["Cod_Subpartida"])
+    sg, subgrupos = _codificar(df["Cod_Subgrupo"])
+    pais, paises = _codificar(df["Pais_Origen"])
+    t = mes_ordinal(df["Anio"], df["Mes"])
+    t0 = int(t.min())
+    n_meses = int(t.max()) - t0 + 1
+
+    # Clave lineal (fila, mes) con filas ordenadas por subpartida, subgrupo, país
+    fila = (sp.astype("int64") * len(subgrupos) + sg) * len(paises) + pais
+    celda = fila * n_meses + (t - t0)
+    orden = np.argsort(celda, kind="stable")
+    celda = celda[orden]
+    inicio = np.flatnonzero(np.r_[True, celda[1:] != celda[:-1]])
+    valores = {
+        m: np.add.reduceat(np.nan_to_num(df[m].to_numpy(dtype="float64"))[orden], inicio)
+             .astype("float32")
+        for m in MEDIDAS
+    }
+    celda = celda[inicio]
+
+    clave = celda // n_meses
+    cambio = np.flatnonzero(np.r_[True, clave[1:] != clave[:-1]])
+    filas = clave[cambio]
+    resto, fila_pais = np.divmod(filas, len(paises))
+    fila_subpartida, fila_subgrupo = np.divmod(resto, len(subgrupos))
+    return MatrizDispersa(
+        indptr=np.r_[cambio, len(celda)].astype("int64"),
+        columnas=(celda % n_meses).astype("int16"),
+        valores=valores,
+        fila_subpartida=fila_subpartida.astype("int32"),
+        fila_subgrupo=fila_subgrupo.astype("int16"),
+        fila_pais=fila_pais.astype("int16"),
+        subpartidas=subpartidas, subgrupos=subgrupos, paises=paises,
+        limites_subpartida=np.searchsorted(fila_subpartida, np.arange(len(subpartidas) + 1)),
+        mes_inicial=t0, n_meses=n_meses,
+    )
+
+
+def filas_subpartida(m, cod_subpartida):
+    """Rango [inicio, fin) de filas de una subpartida ((0, 0) si no existe)."""
+    cod = str(cod_subpartida).strip()
+    i = int(np.searchsorted(m.subpartidas, cod))
+    if i == len(m.subpartidas) or m.subpartidas[i] != cod:
+        return 0, 0
+    return int(m.limites_subpartida[i]), int(m.limites_subpartida[i + 1])
+
+
+def _fila_de_celda(m, inicio, fin):
+    return np.repeat(np.arange(inicio, fin), np.diff(m.indptr[inicio:fin + 1]))
+
+
+def a_dataframe(m, inicio, fin):
+    """Filas [inicio, fin) en formato largo, mismas columnas que el store por
+    subpartida (series_store.leer_subpartida)."""
+    a, b = m.indptr[inicio], m.indptr[fin]
+    fila = _fila_de_celda(m, inicio, fin)
+    t = m.columnas[a:b].astype("int64") + m.mes_inicial
+    return pd.DataFrame({
+        "Cod_Subpartida": m.subpartidas[m.fila_subpartida[fila]],
+        "Cod_Subgrupo":   m.subgrupos[m.fila_subgrupo[fila]],
+        "Pais_Origen":    m.paises[m.fila_pais[fila]],
+        "Anio":           (t // 12).astype("int16"),
+        "Mes":            (t % 12 + 1).astype("int8"),
+        **{k: m.valores[k][a:b].astype("float64") for k in MEDIDAS},
+    })
+
+
+def memoria_bytes(m):
+    """Bytes de los arreglos numéricos (sin contar las etiquetas)."""
+    arreglos = [m.indptr, m.columnas, m.fila_subpartida, m.fila_subgrupo, m.fila_pais,
+                m.limites_subpartida, *m.valores.values()]
+    return sum(a.nbytes for a in arreglos)
+
+
+def como_scipy(m, medida="CIF"):
+    """La medida como scipy.sparse.csr_matrix (filas × meses). Requiere scipy."""
+    from scipy.sparse import csr_matrix
+    return csr_matrix((m.valores[medida], m.columnas, m.indptr),
+                      shape=(len(m.indptr) - 1, m.n_meses))
@@ -7,9 +7,14 @@ import pandas as pd
 from plotly.subplots import make_subplots
 
 from data_loader import (
-    load_data_aggregated, filtros_sidebar,
+    load_data_aggregated, filtros_sidebar, figura_cacheada, firma_vigente,
+    load_desestacionalizado, version_dataset,
     GRUPO_COLORS, SUBGRUPO_COLORS, _FALLBACK_COLORS, get_country_color,
 )
+from agregados import suma_movil_12m
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
 
 st.set_page_config(page_title="Suma Móvil 12M – Importaciones", page_icon="📈", layout="wide")
 st.title("Suma Móvil 12 Meses")
@@ -20,95 +25,161 @@ GRID_COLOR = "#f0f0f0"
 
 df = load_data_aggregated()
 dff, rango, grupos_sel, paises = filtros_sidebar(df, key_prefix="sm")
-
-# Preparar serie mensual total
-serie = dff.groupby("Fecha")[["CIF", "TM"]].sum().reset_index().sort_values("Fecha")
-serie["CIF_12M"] = serie["CIF"].rolling(12, min_periods=12).sum()
-serie["TM_12M"]  = serie["TM"].rolling(12, min_periods=12).sum()
+firma = firma_vigente()
 
 # ── Gráfico 1: Total CIF (dual axis con TM) ───────────────────────────
 st.subheader("1. Suma móvil 12M — Total importaciones (CIF)")
 
-fig1 = make_subplots(specs=[[{"secondary_y": True}]])
-fig1.add_trace(go.Scatter(
-    x=serie["Fecha"], y=serie["CIF_12M"],
-    name="CIF suma móvil 12M", mode="lines",
-    line=dict(color="#2563eb", width=2.5),
-    fill="tozeroy", fillcolor="rgba(37,99,235,0.06)",
-    hovertemplate="%{x|%b %Y}: $%{y:,.1f} M<extra></extra>",
-), secondary_y=False)
-fig1.add_trace(go.Scatter(
-    x=serie["Fecha"], y=serie["TM_12M"],
-    name="Volumen suma móvil 12M (TM)", mode="lines",
-    line=dict(color="#f59e0b", width=2, dash="dot"),
-    hovertemplate="%{x|%b %Y}: %{y:,.0f} TM<extra></extra>",
-), secondary_y=True)
-fig1.update_layout(
-    height=420, hovermode="x unified", margin=dict(t=20, b=30),
-    legend=dict(orientation="h", y=1.1), plot_bgcolor=PLOT_BG,
-)
-fig1.update_yaxes(title_text="CIF (millones USD)", secondary_y=False,
-                  gridcolor=GRID_COLOR, tickformat=",.1f")
-fig1.update_yaxes(title_text="Volumen suma móvil 12M (TM)", secondary_y=True,
-                  gridcolor=GRID_COLOR, tickformat=",.0f")
-fig1.update_xaxes(gridcolor=GRID_COLOR)
-st.plotly_chart(fig1, width="stretch")
+def _fig_total():
+    serie = suma_movil_12m(dff)
+
+    fig1 = make_subplots(specs=[[{"secondary_y": True}]])
+    fig1.add_trace(go.Scatter(
+        x=serie["Fecha"], y=serie["CIF_12M"],
+        name="CIF suma móvil 12M", mode="lines",
+        line=dict(color="#2563eb", width=2.5),
+        fill="tozeroy", fillcolor="rgba(37,99,235,0.06)",
+        hovertemplate="%{x|%b %Y}: $%{y:,.1f} M<extra></extra>",
+    ), secondary_y=False)
+    fig1.add_trace(go.Scatter(
+        x=serie["Fecha"], y=serie["TM_12M"],
+        name="Volumen suma móvil 12M (TM)", mode="lines",
+        line=dict(color="#f59e0b", width=2, dash="dot"),
+        hovertemplate="%{x|%b %Y}: %{y:,.0f} TM<extra></extra>",
+    ), secondary_y=True)
+    fig1.update_layout(
+        height=420, hovermode="x unified", margin=dict(t=20, b=30),
+        legend=dict(orientation="h", y=1.1), plot_bgcolor=PLOT_BG,
+    )
+    fig1.update_yaxes(title_text="CIF (millones USD)", secondary_y=False,
+                      gridcolor=GRID_COLOR, tickformat=",.1f")
+    fig1.update_yaxes(title_text="Volumen suma móvil 12M (TM)", secondary_y=True,
+                      gridcolor=GRID_COLOR, tickformat=",.0f")
+    fig1.update_xaxes(gridcolor=GRID_COLOR)
+    return fig1
+
+st.plotly_chart(figura_cacheada("sm_total", firma, _fig_total), width="stretch")
 
 st.divider()
 
 # ── Gráfico 2: Por subgrupo CUODE ────────────────────────────────────────
 st.subheader("2. Suma móvil 12M por subgrupo CUODE")
 n_grupos = st.slider("Número de subgrupos a mostrar", 3, 10, 6, key="n_movil_grupo")
-grupo_serie = (dff.groupby(["Fecha", "Subgrupo"])["CIF"].sum()
-               .reset_index().sort_values("Fecha"))
-top_grupos = (dff.groupby("Subgrupo")["CIF"].sum()
-              .sort_values(ascending=False).head(n_grupos).index.tolist())
-
-fig2 = go.Figure()
-for i, grupo in enumerate(top_grupos):
-    sub = grupo_serie[grupo_serie["Subgrupo"] == grupo].copy()
-    sub["CIF_12M"] = sub["CIF"].rolling(12, min_periods=12).sum()
-    color = SUBGRUPO_COLORS.get(grupo, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
-    fig2.add_trace(go.Scatter(
-        x=sub["Fecha"], y=sub["CIF_12M"],
-        name=grupo, mode="lines",
-        line=dict(color=color, width=2),
-        hovertemplate=f"<b>{grupo}</b><br>%{{x|%b %Y}}: $%{{y:,.1f}} M<extra></extra>",
-    ))
-fig2.update_layout(
-    height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
-    yaxis=dict(title="CIF suma móvil 12M (millones USD)", tickformat=",.1f", gridcolor=GRID_COLOR),
-    legend=dict(orientation="h", y=-0.15, font=dict(size=10)),
-)
-fig2.update_xaxes(gridcolor=GRID_COLOR)
-st.plotly_chart(fig2, width="stretch")
+
+def _fig_subgrupos():
+    top_grupos = (dff.groupby("Subgrupo")["CIF"].sum()
+                  .sort_values(ascending=False).head(n_grupos).index.tolist())
+    grupo_serie = suma_movil_12m(dff[dff["Subgrupo"].isin(top_grupos)], por="Subgrupo")
+
+    fig2 = go.Figure()
+    for i, grupo in enumerate(top_grupos):
+        sub = grupo_serie[grupo_serie["Subgrupo"] == grupo]
+        color = SUBGRUPO_COLORS.get(grupo, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
+        fig2.add_trace(go.Scatter(
+            x=sub["Fecha"], y=sub["CIF_12M"],
+            name=grupo, mode="lines",
+            line=dict(color=color, width=2),
+            hovertemplate=f"<b>{grupo}</b><br>%{{x|%b %Y}}: $%{{y:,.1f}} M<extra></extra>",
+        ))
+    fig2.update_layout(
+        height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
+        yaxis=dict(title="CIF suma móvil 12M (millones USD)", tickformat=",.1f", gridcolor=GRID_COLOR),
+        legend=dict(orientation="h", y=-0.15, font=dict(size=10)),
+    )
+    fig2.update_xaxes(gridcolor=GRID_COLOR)
+    return fig2
+
+st.plotly_chart(figura_cacheada("sm_subgrupos", firma + (n_grupos,), _fig_subgrupos), width="stretch")
 
 st.divider()
 
 # ── Gráfico 3: Por país de origen ─────────────────────────────────────
 st.subheader("3. Suma móvil 12M por país de origen")
 n_paises_n = st.slider("Número de países a mostrar", 3, 10, 5, key="n_movil_pais")
-pais_serie = (dff.groupby(["Fecha", "Pais_Origen"])["CIF"].sum()
-              .reset_index().sort_values("Fecha"))
-top_paises = (dff.groupby("Pais_Origen")["CIF"].sum()
-              .sort_values(ascending=False).head(n_paises_n).index.tolist())
-
-fig3 = go.Figure()
-for i, pais in enumerate(top_paises):
-    sub = pais_serie[pais_serie["Pais_Origen"] == pais].copy()
-    sub["CIF_12M"] = sub["CIF"].rolling(12, min_periods=12).sum()
-    color = get_country_color(str(pais), i)
-    fig3.add_trace(go.Scatter(
+
+def _fig_paises():
+    top_paises = (dff.groupby("Pais_Origen")["CIF"].sum()
+                  .sort_values(ascending=False).head(n_paises_n).index.tolist())
+    pais_serie = suma_movil_12m(dff[dff["Pais_Origen"].isin(top_paises)], por="Pais_Origen")
+
+    fig3 = go.Figure()
+    for i, pais in enumerate(top_paises):
+        sub = pais_serie[pais_serie["Pais_Origen"] == pais]
+        color = get_country_color(str(pais), i)
+        fig3.add_trace(go.Scatter(
+            x=sub["Fecha"], y=sub["CIF_12M"],
+            name=str(pais), mode="lines",
+            line=dict(color=color, width=2),
+            hovertemplate=f"<b>{pais}</b><br>%{{x|%b %Y}}: $%{{y:,.1f}} M<extra></extra>",
+        ))
+    fig3.update_layout(
+        height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
+        yaxis=dict(title="CIF suma móvil 12M (millones USD)", tickformat=",.1f", gridcolor=GRID_COLOR),
+        legend=dict(orientation="h", y=-0.15, font=dict(size=10)),
+    )
+    fig3.update_xaxes(gridcolor=GRID_COLOR)
+    return fig3
+
+st.plotly_chart(figura_cacheada("sm_paises", firma + (n_paises_n,), _fig_paises), width="stretch")
+
+st.divider()
+
+# ── Gráfico 4: Serie desestacionalizada ───────────────────────────────
+st.subheader("4. Serie desestacionalizada vs suma móvil 12M")
+desest = load_desestacionalizado(version_dataset())
+if desest is None:
+    st.info("Las series desestacionalizadas de esta versión de los datos aún no se calculan "
+            "(`python desestacionalizacion.py`).")
+    st.stop()
+
+st.caption("Ajuste estacional precalculado (descomposición clásica) sobre la serie completa "
+           "del total, cada subgrupo y los principales países: respeta solo el rango de años "
+           "del sidebar. Mensual × 12 para compararla con la suma móvil 12M, que marca los "
+           "puntos de giro con unos seis meses de retraso.")
+_NIVELES = {"Total": "Total", "Subgrupo": "Subgrupo", "Pais_Origen": "País"}
+opciones_sa = [("Total", "Total")] + [
+    (nivel, serie) for nivel in ("Subgrupo", "Pais_Origen")
+    for serie in sorted(desest.loc[desest["Nivel"] == nivel, "Serie"].unique())
+]
+serie_sa = st.selectbox("Serie", opciones_sa, key="sm_serie_sa",
+                        format_func=lambda o: o[1] if o[0] == "Total" else f"{_NIVELES[o[0]]}: {o[1]}")
+
+def _fig_desestacionalizada():
+    sub = desest[(desest["Nivel"] == serie_sa[0]) & (desest["Serie"] == serie_sa[1])]
+    sub = sub.sort_values("Mes_ord")
+    sub = sub.assign(CIF_12M=sub["CIF"].rolling(12).sum())
+    anio = sub["Mes_ord"] // 12
+    sub = sub[(anio >= rango[0]) & (anio <= rango[1])]
+
+    fig4 = go.Figure()
+    fig4.add_trace(go.Scatter(
+        x=sub["Fecha"], y=sub["CIF"] * 12,
+        name="Mensual original × 12", mode="lines",
+        line=dict(color="#cbd5e1", width=1),
+        hovertemplate="%{x|%b %Y}: $%{y:,.1f} M<extra></extra>",
+    ))
+    fig4.add_trace(go.Scatter(
+        x=sub["Fecha"], y=sub["CIF_sa"] * 12,
+        name="Desestacionalizada × 12", mode="lines",
+        line=dict(color="#dc2626", width=2.5),
+        hovertemplate="%{x|%b %Y}: $%{y:,.1f} M<extra></extra>",
+    ))
+    fig4.add_trace(go.Scatter(
         x=sub["Fecha"], y=sub["CIF_12M"],
-        name=str(pais), mode="lines",
-        line=dict(color=color, width=2),
-        hovertemplate=f"<b>{pais}</b><br>%{{x|%b %Y}}: $%{{y:,.1f}} M<extra></extra>",
+        name="Suma móvil 12M", mode="lines",
+        line=dict(color="#2563eb", width=2, dash="dot"),
+        hovertemplate="%{x|%b %Y}: $%{y:,.1f} M<extra></extra>",
     ))
-fig3.update_layout(
-    height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
-    yaxis=dict(title="CIF suma móvil 12M (millones USD)", tickformat=",.1f", gridcolor=GRID_COLOR),
-    legend=dict(orientation="h", y=-0.15, font=dict(size=10)),
-)
-fig3.update_xaxes(gridcolor=GRID_COLOR)
-st.plotly_chart(fig3, width="stretch")
+    fig4.update_layout(
+        height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
+        yaxis=dict(title="CIF anualizado (millones USD)", tickformat=",.1f", gridcolor=GRID_COLOR),
+        legend=dict(orientation="h", y=1.1),
+    )
+    fig4.update_xaxes(gridcolor=GRID_COLOR)
+    return fig4
 
+st.plotly_chart(
+    figura_cacheada("sm_desest", (tuple(rango), serie_sa),
+                    _fig_desestacionalizada),
+    width="stretch",
+)
@@ -1,11 +1,22 @@
 """
 Módulo 3: Precio Implícito CIF/TM de importaciones
+
+Modos:
+  - Serie por subgrupo: cascada Grupo → Subgrupo con banda ±2σ
+  - Screener por subpartida: todas las subpartidas (o subpartida × país) en
+    un solo cálculo vectorizado, ordenadas por distancia a su banda
 """
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 
-from data_loader import load_data_aggregated, filtros_sidebar, GRUPO_MAP, SUBGRUPO_MAP
+from data_loader import (load_data_aggregated, load_data_reciente, load_ventana_reciente,
+                         resultado_cacheado, version_dataset, GRUPO_MAP, SUBGRUPO_MAP)
+from agregados import precio_implicito_12m, mes_ordinal
+from screener_precios import screener_precios, VENTANA, BANDA
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
 
 st.set_page_config(page_title="Precio Implícito – Importaciones", page_icon="💲", layout="wide")
 st.title("Precio Implícito de Importaciones")
@@ -32,23 +43,103 @@ rango = st.sidebar.slider("Rango de años", anio_min, anio_max,
                           (anio_min, anio_max), key="pi_anio")
 df_agg = df_agg[(df_agg["Anio"] >= rango[0]) & (df_agg["Anio"] <= rango[1])]
 
+modo = st.radio("Modo", ["Serie por subgrupo", "Screener por subpartida"],
+                horizontal=True, key="pi_modo")
+
+
+@st.cache_data(ttl=3600)
+def calcular_screener(anio_final, por_pais, min_cif, version):
+    """Precio implícito y banda ±2σ para todas las subpartidas (o subpartida × país).
+    `version` (del dataset) invalida la caché al anexar un mes."""
+    return resultado_cacheado("pi_screener", (anio_final, por_pais, min_cif),
+                              lambda: _screener(anio_final, por_pais, min_cif))
+
+
+def _screener(anio_final, por_pais, min_cif):
+    mes_final = int(mes_ordinal(anio_final, 12))
+    ventana = load_ventana_reciente()
+    if ventana is not None and anio_final >= ventana["Anio"].max():
+        # Mes más reciente: la ventana materializada ya tiene los 35 meses
+        datos = ventana
+    else:
+        # 35 meses hacia atrás desde diciembre del año final
+        datos = load_data_reciente(anio_final - (VENTANA + BANDA) // 12)
+    mes_final = min(mes_final, int(mes_ordinal(datos["Anio"], datos["Mes"]).max()))
+    claves = ["Cod_Subpartida", "Pais_Origen"] if por_pais else ["Cod_Subpartida"]
+    res = screener_precios(datos, claves, mes_final=mes_final, min_cif_12m=min_cif)
+    nombres = (datos[["Cod_Subpartida", "Subpartida"]]
+               .drop_duplicates("Cod_Subpartida")
+               .astype(str))
+    res["Cod_Subpartida"] = res["Cod_Subpartida"].astype(str)
+    return res.merge(nombres, on="Cod_Subpartida", how="left"), mes_final
+
+
+if modo == "Screener por subpartida":
+    st.subheader("Screener: subpartidas fuera de su banda ±2σ")
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        por_pais = st.toggle("Desagregar por país de origen", key="pi_scr_pais")
+    with c2:
+        min_cif = st.number_input("CIF 12M mínimo (millones USD)", 0.0, value=1.0,
+                                  step=0.5, key="pi_scr_min")
+    with c3:
+        solo_fuera = st.toggle("Solo series fuera de banda", value=True, key="pi_scr_fuera")
+
+    with st.spinner("Calculando precios implícitos en lote..."):
+        scr, mes_final = calcular_screener(rango[1], por_pais, min_cif, version_dataset())
+    if solo_fuera:
+        scr = scr[scr["Fuera_banda"]]
+
+    st.caption(
+        f"Evaluado a {mes_final % 12 + 1:02d}/{mes_final // 12} | "
+        f"{len(scr):,} series | Z = (precio − media 24M) / σ 24M"
+    )
+    if scr.empty:
+        st.info("Ninguna serie cumple los criterios seleccionados.")
+        st.stop()
+
+    top = scr.head(25).iloc[::-1]
+    etiquetas = (top["Cod_Subpartida"] + " – " + top["Subpartida"].fillna("").str[:40]
+                 + (" · " + top["Pais_Origen"].astype(str) if por_pais else ""))
+    fig_z = go.Figure(go.Bar(
+        x=top["Z"], y=etiquetas, orientation="h",
+        marker_color=["#dc2626" if z > 0 else "#2563eb" for z in top["Z"]],
+        hovertemplate="<b>%{y}</b><br>Z: %{x:.2f}<extra></extra>",
+    ))
+    fig_z.add_vline(x=2, line_dash="dot", line_color="#9ca3af")
+    fig_z.add_vline(x=-2, line_dash="dot", line_color="#9ca3af")
+    fig_z.update_layout(
+        height=max(350, 24 * len(top)), plot_bgcolor=PLOT_BG,
+        margin=dict(l=380, t=10, b=30, r=20),
+        xaxis=dict(title="Desviaciones estándar vs media 24M", gridcolor=GRID_COLOR),
+    )
+    st.plotly_chart(fig_z, width="stretch")
+
+    cols_tabla = (["Cod_Subpartida", "Subpartida"] + (["Pais_Origen"] if por_pais else [])
+                  + ["Precio", "MA24", "Upper", "Lower", "Z", "CIF_12M", "TM_12M"])
+    st.dataframe(
+        scr[cols_tabla], hide_index=True, width="stretch",
+        column_config={
+            "Precio":  st.column_config.NumberColumn("Precio (USD/TM)", format="%.0f"),
+            "MA24":    st.column_config.NumberColumn("Media 24M", format="%.0f"),
+            "Upper":   st.column_config.NumberColumn("Banda sup.", format="%.0f"),
+            "Lower":   st.column_config.NumberColumn("Banda inf.", format="%.0f"),
+            "Z":       st.column_config.NumberColumn("Z", format="%.2f"),
+            "CIF_12M": st.column_config.NumberColumn("CIF 12M (M USD)", format="%.1f"),
+            "TM_12M":  st.column_config.NumberColumn("TM 12M", format="%.0f"),
+        },
+    )
+    st.stop()
+
 
-@st.cache_data
-def calcular_precio_subgrupo(data):
-    """Precio implícito 12M a nivel Grupo-Subgrupo."""
-    agg = data.groupby(["Fecha", "Grupo", "Subgrupo"])[["CIF", "TM"]].sum().reset_index()
-    agg = agg.sort_values("Fecha")
-    result = []
-    for (grp, sub), g in agg.groupby(["Grupo", "Subgrupo"]):
-        g = g.copy()
-        g["CIF_12M"] = g["CIF"].rolling(12, min_periods=12).sum()
-        g["TM_12M"]  = g["TM"].rolling(12, min_periods=12).sum()
-        g["Precio"]  = g["CIF_12M"] / g["TM_12M"] * 1_000_000
-        result.append(g)
-    return pd.concat(result, ignore_index=True)
+@st.cache_data(ttl=3600)
+def calcular_precio_subgrupo(data, rango, version):
+    """Precio implícito 12M a nivel Grupo-Subgrupo (`data` ya filtrada por `rango`)."""
+    return resultado_cacheado("pi_subgrupo", tuple(rango),
+                              lambda: precio_implicito_12m(data, por=["Grupo", "Subgrupo"]))
 
 
-precios_sg = calcular_precio_subgrupo(df_agg)
+precios_sg = calcular_precio_subgrupo(df_agg, rango, version_dataset())
 
 # ── Selector cascada: Grupo → Subgrupo ───────────────────────────────
 col_g, col_s = st.columns(2)
@@ -11,17 +11,26 @@ Al seleccionar un subgrupo, se muestran:
      - KPIs: CIF total, TM, precio implícito, N° países de origen
      - Evolución anual (barras) + Top 10 países de origen (barras coloreadas)
 
+Buscador: índice de subpartidas (código o descripción, sin tildes ni palabras
+completas) que salta directo a la subpartida fijando Grupo y Subgrupo.
+
 Estrategia de carga:
   - load_data_aggregated() para los selectores y filtros del sidebar (~390K filas)
-  - load_data() solo al seleccionar un subgrupo (parquet completo, ~6.7M filas)
+  - load_data_subgrupo() al seleccionar un subgrupo: lee del parquet solo las
+    filas del subgrupo y rango de años (filtros empujados al lector)
+  - load_serie_subpartida() para el detalle de una subpartida (slice del store
+    mmap generado por el ETL, sin recorrer las filas del subgrupo)
 CIF en millones USD | TM en toneladas métricas
 """
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
-from data_loader import (load_data, load_data_aggregated, filtros_sidebar,
-                         get_country_color, GRUPO_MAP, SUBGRUPO_MAP)
+from data_loader import (load_data_subgrupo, load_data_aggregated, filtros_sidebar,
+                         load_indice_subpartidas, buscar_subpartidas, load_serie_subpartida,
+                         boton_exportar, get_country_color, GRUPO_MAP, SUBGRUPO_MAP)
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
 
 st.set_page_config(page_title="Drilldown Subpartida – Importaciones", page_icon="🔍", layout="wide")
 st.title("Drilldown por Subpartida Arancelaria")
@@ -33,6 +42,53 @@ GRID_COLOR = "#f0f0f0"
 df_agg = load_data_aggregated()
 dff_agg, rango, grupos_sel, paises = filtros_sidebar(df_agg, key_prefix="drill")
 
+# ── Buscador de subpartidas ──────────────────────────────────────────
+indice_sp = load_indice_subpartidas()
+
+
+def _saltar_a_subpartida(resultados):
+    """Guarda la subpartida elegida; los selectores se fijan antes de crearse."""
+    label = st.session_state.get("drill_busqueda_sel")
+    if not label:
+        return
+    fila = resultados[resultados["_label"] == label].iloc[0]
+    st.session_state["_drill_objetivo"] = {
+        "grupo":      f"{fila.Cod_Grupo} – {fila.Grupo}",
+        "subgrupo":   f"{fila.Cod_Subgrupo} – {fila.Subgrupo}",
+        "subpartida": fila.Cod_Subpartida,
+    }
+
+
+col_q, col_r = st.columns([1, 2])
+with col_q:
+    consulta = st.text_input("Buscar subpartida (código o descripción)",
+                             placeholder="ej. 8703, arroz, telefonos celulares",
+                             key="drill_busqueda")
+resultados_sp = buscar_subpartidas(indice_sp, consulta) if consulta else indice_sp.iloc[0:0]
+resultados_sp = resultados_sp.assign(_label=(
+    resultados_sp["Cod_Subpartida"] + " – " + resultados_sp["Subpartida"].str[:60]
+    + " (" + resultados_sp["Subgrupo"] + ")"
+))
+with col_r:
+    if consulta and resultados_sp.empty:
+        st.caption("Sin coincidencias.")
+    elif consulta:
+        st.selectbox("Resultados", [""] + resultados_sp["_label"].tolist(),
+                     format_func=lambda x: f"{len(resultados_sp)} coincidencias..." if x == "" else x,
+                     key="drill_busqueda_sel",
+                     on_change=_saltar_a_subpartida, args=(resultados_sp,))
+
+objetivo = st.session_state.get("_drill_objetivo", {})
+
+
+def _fijar_objetivo(key, campo, opciones):
+    """Aplica el salto del buscador a un selector si la opción está disponible."""
+    valor = objetivo.get(campo)
+    if valor and valor in opciones:
+        st.session_state[key] = valor
+        objetivo.pop(campo)
+
+
 # ── Selector cascada Grupo → Subgrupo ────────────────────────────────
 datos = dff_agg[["Cod_Grupo", "Grupo", "Cod_Subgrupo", "Subgrupo"]].drop_duplicates()
 
@@ -45,6 +101,7 @@ with col_g:
         lambda x: "ZZZ" if not x.isdigit() else x.zfill(3)
     )
     grupo_opts = grupo_opts.sort_values("_sort")
+    _fijar_objetivo("drill_grupo_sel", "grupo", grupo_opts["Label"].tolist())
     grupo_sel = st.selectbox(
         "Grupo CUODE", [""] + grupo_opts["Label"].tolist(),
         format_func=lambda x: "Seleccionar grupo..." if x == "" else x,
@@ -60,6 +117,7 @@ with col_s:
             lambda x: "ZZZ" if not x.isdigit() else x.zfill(4)
         )
         sg_opts = sg_opts.sort_values("_sort")
+        _fijar_objetivo("drill_subgrupo_sel", "subgrupo", sg_opts["Label"].tolist())
         subgrupo_sel = st.selectbox(
             "Subgrupo", [""] + sg_opts["Label"].tolist(),
             format_func=lambda x: "Seleccionar subgrupo..." if x == "" else x,
@@ -78,18 +136,10 @@ if not grupo_sel or not subgrupo_sel:
 grupo_nombre   = grupo_sel.split(" – ", 1)[1]
 subgrupo_nombre = subgrupo_sel.split(" – ", 1)[1]
 
-# Cargar dataset completo (con subpartidas)
+# Cargar solo las subpartidas del subgrupo (filtros empujados al parquet)
 with st.spinner("Cargando subpartidas..."):
-    df_full = load_data()
-
-# Aplicar los mismos filtros del sidebar
-dff = df_full[(df_full["Anio"] >= rango[0]) & (df_full["Anio"] <= rango[1])]
-if grupos_sel:
-    dff = dff[dff["Grupo"].isin(grupos_sel)]
-if paises:
-    dff = dff[dff["Pais_Origen"].isin(paises)]
-
-dff_sg = dff[(dff["Grupo"] == grupo_nombre) & (dff["Subgrupo"] == subgrupo_nombre)]
+    dff_sg = load_data_subgrupo(subgrupo_sel.split(" – ", 1)[0],
+                                rango=tuple(rango), paises=tuple(paises))
 
 cif_total = dff_sg["CIF"].sum()
 tm_total  = dff_sg["TM"].sum()
@@ -102,6 +152,10 @@ st.markdown(
     f"CIF total: ${cif_total:,.1f} millones USD"
 )
 
+filtros_export = dict(rango=tuple(rango), cod_subgrupos=[subgrupo_sel.split(" – ", 1)[0]],
+                      paises=list(paises) or None)
+boton_exportar("exp_drill_sg", f"Exportar filas del subgrupo {subgrupo_nombre}", **filtros_export)
+
 st.divider()
 
 # ── 1. Composición por subpartida (bar + donut) ───────────────────────
@@ -137,6 +191,7 @@ evol = (dff_sg.groupby(["Anio", "Subpartida"], observed=True)["CIF"]
 top_sp_names = top_sp["Subpartida"].tolist()
 evol_top = evol[evol["Subpartida"].isin(top_sp_names)]
 
+import plotly.express as px   # diferido: solo con un subgrupo seleccionado
 fig2 = px.line(
     evol_top, x="Anio", y="CIF", color="Subpartida",
     labels={"CIF": "Millones USD (CIF)", "Anio": "Año"},
@@ -162,6 +217,12 @@ sp_opts = (dff_sg.groupby(["Cod_Subpartida", "Subpartida"], observed=True)["CIF"
 sp_opts["Label"] = (sp_opts["Cod_Subpartida"].astype(str)
                     + " – " + sp_opts["Subpartida"].astype(str).str[:60])
 
+cod_objetivo = objetivo.pop("subpartida", None)
+if cod_objetivo:
+    labels_obj = sp_opts.loc[sp_opts["Cod_Subpartida"].astype(str) == cod_objetivo, "Label"]
+    if not labels_obj.empty:
+        st.session_state["drill_sp_det"] = labels_obj.iloc[0]
+
 sp_sel_label = st.selectbox(
     "Seleccionar subpartida",
     sp_opts["Label"].tolist(),
@@ -169,8 +230,18 @@ sp_sel_label = st.selectbox(
 )
 
 cod_sp_sel = sp_sel_label.split(" – ")[0]
-dfsp = dff_sg[dff_sg["Cod_Subpartida"] == cod_sp_sel].copy()
-nombre_sp = str(dfsp["Subpartida"].iloc[0]) if len(dfsp) > 0 else cod_sp_sel
+nombre_sp = sp_sel_label.split(" – ", 1)[1]
+
+# Serie precalculada de la subpartida (store mmap); respaldo: filtrar dff_sg
+dfsp = load_serie_subpartida(cod_sp_sel)
+if dfsp is not None:
+    cod_subgrupo_sel = subgrupo_sel.split(" – ", 1)[0]
+    dfsp = dfsp[(dfsp["Cod_Subgrupo"] == cod_subgrupo_sel)
+                & (dfsp["Anio"] >= rango[0]) & (dfsp["Anio"] <= rango[1])]
+    if paises:
+        dfsp = dfsp[dfsp["Pais_Origen"].isin(paises)]
+else:
+    dfsp = dff_sg[dff_sg["Cod_Subpartida"] == cod_sp_sel]
 
 cif_sp  = dfsp["CIF"].sum()
 tm_sp   = dfsp["TM"].sum()
@@ -182,6 +253,9 @@ k2.metric("Volumen Total (TM)", f"{tm_sp:,.0f}")
 k3.metric("Precio Implícito", f"${precio_imp:,.0f} USD/TM")
 k4.metric("N° Países de Origen", f"{dfsp['Pais_Origen'].nunique()}")
 
+boton_exportar("exp_drill_sp", f"Exportar filas de la subpartida {cod_sp_sel}",
+               cod_subpartidas=[cod_sp_sel], **filtros_export)
+
 col_anual, col_paises = st.columns(2)
 
 with col_anual:
@@ -0,0 +1,173 @@
+"""
+Módulo 5: Drilldown inverso por país de origen.
+
+Jerarquía de selección: País de origen → Subgrupo CUODE → Subpartidas
+Al seleccionar un país, se muestran:
+  1. KPIs del país: CIF total, TM, N° subgrupos, N° subpartidas
+  2. Evolución anual por grupo CUODE (barras apiladas)
+  3. Canasta por subgrupo (Top N por CIF, barras horizontales)
+  4. Subpartidas del subgrupo elegido: Top N y evolución anual
+
+Estrategia de carga:
+  - load_data_aggregated() solo para ordenar el selector de países (~390K filas)
+  - load_indice_paises(): tabla de subpartidas ordenada por país con offsets,
+    el slice de un país es un rango contiguo (sin máscara sobre 6.7M filas)
+CIF en millones USD | TM en toneladas métricas
+"""
+import streamlit as st
+import plotly.graph_objects as go
+from data_loader import (load_data_aggregated, load_indice_paises, slice_pais,
+                         GRUPO_COLORS, SUBGRUPO_COLORS, _FALLBACK_COLORS)
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
+
+st.set_page_config(page_title="Drilldown País – Importaciones", page_icon="🌎", layout="wide")
+st.title("Drilldown por País de Origen")
+st.caption("Canasta completa importada desde un país: subgrupos CUODE y subpartidas | Valores en millones USD (CIF)")
+
+PLOT_BG    = "white"
+GRID_COLOR = "#f0f0f0"
+
+df_agg = load_data_aggregated()
+
+# ── Filtros en sidebar ────────────────────────────────────────────────
+st.sidebar.title("Filtros")
+anio_min, anio_max = int(df_agg["Anio"].min()), int(df_agg["Anio"].max())
+rango = st.sidebar.slider("Rango de años", anio_min, anio_max,
+                          (anio_min, anio_max), key="dpais_anio")
+
+paises_ord = (df_agg.groupby("Pais_Origen")["CIF"].sum()
+              .sort_values(ascending=False).index.tolist())
+pais_sel = st.selectbox(
+    "País de origen", [""] + paises_ord,
+    format_func=lambda x: "Seleccionar país..." if x == "" else x,
+    key="dpais_pais",
+)
+
+if not pais_sel:
+    st.info("Selecciona un país de origen para explorar su canasta de importaciones.", icon="👆")
+    st.stop()
+
+with st.spinner("Cargando índice por país..."):
+    indice = load_indice_paises()
+
+dfp = slice_pais(indice, pais_sel)
+dfp = dfp[(dfp["Anio"] >= rango[0]) & (dfp["Anio"] <= rango[1])]
+
+if dfp.empty:
+    st.warning("No hay importaciones desde este país en el rango seleccionado.")
+    st.stop()
+
+# ── KPIs ─────────────────────────────────────────────────────────────
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("CIF Total", f"${dfp['CIF'].sum():,.1f} M")
+k2.metric("Volumen Total (TM)", f"{dfp['TM'].sum():,.0f}")
+k3.metric("Subgrupos CUODE", f"{dfp['Subgrupo'].nunique()}")
+k4.metric("Subpartidas", f"{dfp['Cod_Subpartida'].nunique()}")
+
+st.divider()
+
+# ── 1. Evolución anual por grupo CUODE ────────────────────────────────
+st.subheader(f"1. Importaciones anuales desde {pais_sel} por grupo CUODE")
+grupo_anual = (dfp.groupby(["Anio", "Grupo"], observed=True)["CIF"]
+               .sum().reset_index())
+grupos_ord = (grupo_anual.groupby("Grupo", observed=True)["CIF"].sum()
+              .sort_values(ascending=False).index.tolist())
+fig1 = go.Figure()
+for i, grupo in enumerate(grupos_ord):
+    sub = grupo_anual[grupo_anual["Grupo"] == grupo]
+    fig1.add_trace(go.Bar(
+        x=sub["Anio"], y=sub["CIF"], name=str(grupo),
+        marker_color=GRUPO_COLORS.get(str(grupo), _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)]),
+        hovertemplate=f"<b>{grupo}</b><br>%{{x}}: $%{{y:,.1f}} M<extra></extra>",
+    ))
+fig1.update_layout(
+    barmode="stack", height=420, plot_bgcolor=PLOT_BG, margin=dict(t=20, b=30),
+    yaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor=GRID_COLOR),
+    legend=dict(orientation="h", y=-0.2, font=dict(size=10)),
+)
+fig1.update_xaxes(gridcolor=GRID_COLOR)
+st.plotly_chart(fig1, width="stretch")
+
+st.divider()
+
+# ── 2. Canasta por subgrupo ───────────────────────────────────────────
+st.subheader(f"2. Canasta por subgrupo CUODE — {pais_sel}")
+n_sg = st.slider("Subgrupos a mostrar", 3, 20, 10, key="dpais_n_sg")
+top_sg = (dfp.groupby(["Cod_Subgrupo", "Subgrupo"], observed=True)["CIF"]
+          .sum().sort_values(ascending=False).head(n_sg).reset_index())
+fig2 = go.Figure(go.Bar(
+    x=top_sg["CIF"],
+    y=[f"{r.Cod_Subgrupo} – {r.Subgrupo}" for r in top_sg.itertuples()],
+    orientation="h",
+    marker_color=[SUBGRUPO_COLORS.get(str(s), _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)])
+                  for i, s in enumerate(top_sg["Subgrupo"])],
+    hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
+))
+fig2.update_layout(
+    height=max(300, 32 * len(top_sg)), plot_bgcolor=PLOT_BG,
+    xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor=GRID_COLOR),
+    yaxis=dict(autorange="reversed"),
+    margin=dict(l=300, t=10, b=30, r=20),
+)
+st.plotly_chart(fig2, width="stretch")
+
+st.divider()
+
+# ── 3. Subpartidas de un subgrupo ─────────────────────────────────────
+st.subheader("3. Subpartidas importadas")
+sg_opts = (dfp.groupby(["Cod_Subgrupo", "Subgrupo"], observed=True)["CIF"]
+           .sum().sort_values(ascending=False).reset_index())
+sg_labels = [f"{r.Cod_Subgrupo} – {r.Subgrupo}" for r in sg_opts.itertuples()]
+sg_sel = st.selectbox("Subgrupo", ["(todos)"] + sg_labels, key="dpais_subgrupo")
+
+dfp_sg = dfp
+if sg_sel != "(todos)":
+    dfp_sg = dfp[dfp["Cod_Subgrupo"] == sg_sel.split(" – ", 1)[0]]
+
+n_sp = st.slider("Subpartidas a mostrar", 3, 15, 10, key="dpais_n_sp")
+top_sp = (dfp_sg.groupby(["Cod_Subpartida", "Subpartida"], observed=True)["CIF"]
+          .sum().sort_values(ascending=False).head(n_sp).reset_index())
+
+col_bar, col_evol = st.columns(2)
+with col_bar:
+    fig3a = go.Figure(go.Bar(
+        x=top_sp["CIF"],
+        y=[f"{str(r.Cod_Subpartida)[:10]} – {str(r.Subpartida)[:40]}" for r in top_sp.itertuples()],
+        orientation="h", marker_color="#2563eb",
+        hovertemplate="<b>%{y}</b><br>CIF: $%{x:,.1f} M<extra></extra>",
+    ))
+    fig3a.update_layout(
+        height=450, plot_bgcolor=PLOT_BG,
+        xaxis=dict(title="Millones USD (CIF)", tickformat=",.1f", gridcolor=GRID_COLOR),
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=330, t=10, b=30, r=20),
+    )
+    st.plotly_chart(fig3a, width="stretch")
+
+with col_evol:
+    evol = (dfp_sg[dfp_sg["Cod_Subpartida"].isin(top_sp["Cod_Subpartida"])]
+            .groupby(["Anio", "Cod_Subpartida"], observed=True)["CIF"]
+            .sum().reset_index())
+    evol["Cod_Subpartida"] = evol["Cod_Subpartida"].astype(str)
+    import plotly.express as px   # diferido: solo con un país seleccionado
+    fig3b = px.line(
+        evol, x="Anio", y="CIF", color="Cod_Subpartida",
+        labels={"CIF": "Millones USD (CIF)", "Anio": "Año", "Cod_Subpartida": "Subpartida"},
+    )
+    fig3b.update_layout(
+        height=450, plot_bgcolor=PLOT_BG, margin=dict(t=10, b=30),
+        yaxis=dict(tickformat=",.1f", gridcolor=GRID_COLOR),
+        legend=dict(orientation="h", y=-0.2, font=dict(size=9)),
+        hovermode="x unified",
+    )
+    fig3b.update_xaxes(gridcolor=GRID_COLOR)
+    st.plotly_chart(fig3b, width="stretch")
+
+# Tabla completa: subpartida × año
+tabla = (dfp_sg.groupby(["Cod_Subpartida", "Subpartida", "Anio"], observed=True)["CIF"]
+         .sum().unstack("Anio", fill_value=0))
+tabla["Total"] = tabla.sum(axis=1)
+tabla = tabla.sort_values("Total", ascending=False).reset_index()
+st.dataframe(tabla, hide_index=True, width="stretch", height=400)
@@ -0,0 +1,148 @@
+"""
+Módulo 6: Matriz de crecimiento Subgrupo × País de origen.
+
+Crecimiento interanual (mes vs mismo mes del año anterior) y 12M vs 12M
+previos para todas las parejas, calculado en un solo paso sobre el cubo
+meses × subgrupos × países (crecimiento.py). Sirve para detectar cambios de
+proveedor: qué países ganan o pierden peso dentro de cada subgrupo.
+CIF en millones USD
+"""
+import streamlit as st
+import plotly.graph_objects as go
+import numpy as np
+
+from data_loader import load_data_aggregated, filtros_sidebar, figura_cacheada, firma_vigente
+from crecimiento import (cubo_mensual, matrices_crecimiento, tabla_crecimiento,
+                         HISTORIA_12M, HISTORIA_INTERANUAL)
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
+
+st.set_page_config(page_title="Crecimiento – Importaciones", page_icon="🔥", layout="wide")
+st.title("Crecimiento por Subgrupo × País")
+st.caption("Crecimiento del CIF por pareja subgrupo × país de origen | "
+           "Interanual mensual o suma 12M vs 12M previos | Valores en millones USD")
+
+df = load_data_aggregated()
+dff, rango, grupos_sel, paises = filtros_sidebar(df, key_prefix="cr")
+firma = firma_vigente()
+
+if dff.empty:
+    st.warning("No hay datos para los filtros seleccionados.")
+    st.stop()
+
+# ── Controles ────────────────────────────────────────────────────────
+c1, c2, c3 = st.columns(3)
+with c1:
+    metrica = st.radio("Métrica", ["12M vs 12M previos", "Interanual (mes)"],
+                       horizontal=True, key="cr_metrica")
+    filas = st.radio("Filas", ["Subgrupo", "Grupo"], horizontal=True, key="cr_filas")
+with c2:
+    n_paises = st.slider("Países (columnas, top por CIF 12M)", 5, 40, 15, key="cr_npaises")
+    umbral = st.slider("Umbral de color (±%)", 10, 200, 50, step=10, key="cr_umbral",
+                       help="Crecimientos por encima del umbral se muestran con el color extremo.")
+with c3:
+    min_base = st.number_input("CIF mínimo del periodo base (millones USD)", 0.0, value=1.0,
+                               step=0.5, key="cr_min_base",
+                               help="Evita crecimientos enormes sobre bases casi nulas.")
+    orden = st.selectbox("Ordenar filas por", ["CIF 12M", "Crecimiento del total", "Nombre"],
+                         key="cr_orden")
+
+col_metrica = "Crec_12M" if metrica == "12M vs 12M previos" else "Interanual"
+historia = HISTORIA_12M if col_metrica == "Crec_12M" else HISTORIA_INTERANUAL
+
+t_min, t_max = int(dff["Mes_ord"].min()), int(dff["Mes_ord"].max())
+if t_max - t_min + 1 < historia:
+    st.warning(f"Se necesitan al menos {historia} meses en el rango de años seleccionado.")
+    st.stop()
+mes = st.select_slider(
+    "Mes de evaluación", options=list(range(t_min + historia - 1, t_max + 1)), value=t_max,
+    format_func=lambda t: f"{t % 12 + 1:02d}/{t // 12}",
+    key=f"cr_mes_{t_min}_{t_max}_{historia}",   # opciones distintas → widget nuevo
+)
+
+# ── Cálculo: todas las parejas a la vez ──────────────────────────────
+cubo, t0, etq_filas, etq_paises = cubo_mensual(dff, filas, "Pais_Origen")
+matrices = matrices_crecimiento(cubo, t0, mes, min_base)
+totales = matrices_crecimiento(cubo.sum(axis=2, keepdims=True), t0, mes, min_base)
+
+# Columnas: top países por CIF 12M; filas según el orden elegido
+top_c = np.argsort(-matrices["CIF_12M"].sum(axis=0))[:n_paises]
+top_c = top_c[matrices["CIF_12M"][:, top_c].sum(axis=0) > 0]
+if orden == "CIF 12M":
+    orden_f = np.argsort(-totales["CIF_12M"][:, 0])
+elif orden == "Crecimiento del total":
+    orden_f = np.argsort(-np.nan_to_num(totales[col_metrica][:, 0], nan=-np.inf))
+else:
+    orden_f = np.argsort(etq_filas.astype(str))
+orden_f = orden_f[matrices["CIF_12M"][orden_f].sum(axis=1) > 0]
+
+k1, k2, k3 = st.columns(3)
+total = matrices_crecimiento(cubo.sum(axis=(1, 2), keepdims=True), t0, mes)
+k1.metric("CIF 12M", f"${total['CIF_12M'][0, 0]:,.1f} M",
+          f"{total['Crec_12M'][0, 0]:+.1f}% vs 12M previos"
+          if not np.isnan(total["Crec_12M"][0, 0]) else None)
+k2.metric("Parejas con importaciones", f"{int((matrices['CIF_12M'] > 0).sum()):,}")
+k3.metric("Parejas que crecen más del umbral",
+          f"{int((np.nan_to_num(matrices[col_metrica]) > umbral).sum()):,}")
+
+st.divider()
+
+# ── 1. Heatmap ───────────────────────────────────────────────────────
+st.subheader(f"1. {metrica} — {filas} × País de origen")
+
+
+def _fig_heatmap():
+    z = matrices[col_metrica][np.ix_(orden_f, top_c)]
+    base = "CIF_12M" if col_metrica == "Crec_12M" else "Mes"
+    custom = np.dstack([matrices[base][np.ix_(orden_f, top_c)],
+                        matrices[base + "_previo"][np.ix_(orden_f, top_c)]])
+    fig = go.Figure(go.Heatmap(
+        z=z, x=etq_paises[top_c].astype(str), y=etq_filas[orden_f].astype(str),
+        customdata=custom,
+        colorscale="RdBu_r", zmid=0, zmin=-umbral, zmax=umbral,
+        colorbar=dict(title="%", ticksuffix="%"),
+        hovertemplate=("<b>%{y}</b> · %{x}<br>Crecimiento: %{z:+.1f}%"
+                       "<br>Actual: $%{customdata[0]:,.1f} M"
+                       "<br>Base: $%{customdata[1]:,.1f} M<extra></extra>"),
+        hoverongaps=False,
+    ))
+    fig.update_layout(
+        height=max(400, 24 * len(orden_f) + 120), plot_bgcolor="#f3f4f6",
+        margin=dict(l=10, t=10, b=10), xaxis=dict(side="top", tickangle=-45),
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig
+
+
+st.plotly_chart(
+    figura_cacheada("cr_heatmap",
+                    firma + (filas, col_metrica, mes, n_paises, umbral, min_base, orden),
+                    _fig_heatmap),
+    width="stretch",
+)
+st.caption("Celdas grises: sin base suficiente (CIF del periodo base menor al mínimo) "
+           "o sin importaciones.")
+
+st.divider()
+
+# ── 2. Tabla ordenable de todas las parejas ───────────────────────────
+st.subheader("2. Todas las parejas (ordenable por columna)")
+tabla = tabla_crecimiento(matrices, etq_filas, etq_paises, nombre_filas=filas)
+tabla = (tabla.assign(_abs=tabla[col_metrica].abs())
+              .sort_values("_abs", ascending=False, na_position="last")
+              .drop(columns=["_abs"]))
+st.dataframe(
+    tabla[[filas, "Pais_Origen", "CIF_12M", "CIF_12M_previo", "Crec_12M",
+           "Mes", "Mes_previo", "Interanual"]],
+    hide_index=True, width="stretch", height=420,
+    column_config={
+        "Pais_Origen":    st.column_config.TextColumn("País de origen"),
+        "CIF_12M":        st.column_config.NumberColumn("CIF 12M", format="%.1f"),
+        "CIF_12M_previo": st.column_config.NumberColumn("CIF 12M previo", format="%.1f"),
+        "Crec_12M":       st.column_config.NumberColumn("12M vs 12M (%)", format="%+.1f"),
+        "Mes":            st.column_config.NumberColumn("CIF mes", format="%.1f"),
+        "Mes_previo":     st.column_config.NumberColumn("CIF mes año ant.", format="%.1f"),
+        "Interanual":     st.column_config.NumberColumn("Interanual (%)", format="%+.1f"),
+    },
+)
@@ -0,0 +1,180 @@
+"""
+Módulo 7: Concentración de proveedores por subgrupo y subpartida.
+
+Ranking de las importaciones más concentradas en pocos países de origen:
+HHI, participación del primer y de los tres primeros proveedores, por año
+calendario o sobre los últimos 12 meses. Todas las series se calculan a la
+vez con reducciones agrupadas (concentracion.py), también a nivel de las
+~5.400 subpartidas.
+CIF en millones USD | HHI entre 0 y 10.000
+"""
+import streamlit as st
+import plotly.graph_objects as go
+
+from data_loader import (load_data_aggregated, load_data_reciente, version_dataset,
+                         resultado_cacheado,
+                         SUBGRUPO_MAP, SUBGRUPO_COLORS, _FALLBACK_COLORS)
+from agregados import mes_ordinal, fecha_mes
+from concentracion import concentracion, concentracion_12m
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
+
+st.set_page_config(page_title="Concentración – Importaciones", page_icon="🎯", layout="wide")
+st.title("Concentración de Proveedores")
+st.caption("HHI = Σ participación² × 10.000 por país de origen | "
+           "Top 1 / Top 3 = participación del primer / de los tres primeros países | "
+           "Valores en millones USD (CIF)")
+
+PLOT_BG    = "white"
+GRID_COLOR = "#f0f0f0"
+HHI_MODERADO, HHI_ALTO = 1_500, 2_500   # umbrales habituales de concentración
+
+version = version_dataset()
+df_agg = load_data_aggregated(version)
+
+# ── Filtros en sidebar ────────────────────────────────────────────────
+st.sidebar.title("Filtros")
+nivel = st.sidebar.radio("Nivel", ["Subgrupo", "Subpartida"], key="conc_nivel")
+base = st.sidebar.radio("Periodo", ["Año calendario", "Últimos 12 meses"], key="conc_base",
+                        help="12 meses: ventana móvil que termina en el último mes "
+                             "disponible del año elegido.")
+anios = sorted(df_agg["Anio"].unique().tolist())
+anio = st.sidebar.selectbox("Año", anios[::-1], key="conc_anio")
+subgrupos_sel = st.sidebar.multiselect("Subgrupo CUODE", sorted(df_agg["Subgrupo"].unique()),
+                                       key="conc_subgrupos")
+min_cif = st.sidebar.number_input("CIF mínimo de la serie (millones USD)", 0.0, value=1.0,
+                                  step=0.5, key="conc_min")
+
+
+@st.cache_data(ttl=3600)
+def calcular_concentracion(nivel, base, anio, version):
+    """Métricas de concentración de todas las series del nivel en el periodo."""
+    return resultado_cacheado("conc_ranking", (nivel, base, anio),
+                              lambda: _concentracion(nivel, base, anio, version), version)
+
+
+def _concentracion(nivel, base, anio, version):
+    if nivel == "Subgrupo":
+        datos = load_data_aggregated(version)
+        por = ["Subgrupo"]
+    else:
+        datos = load_data_reciente(anio - 1 if base == "Últimos 12 meses" else anio, anio,
+                                   version=version)
+        datos = datos.assign(Mes_ord=mes_ordinal(datos["Anio"], datos["Mes"]))
+        por = ["Cod_Subgrupo", "Cod_Subpartida"]
+
+    if base == "Año calendario":
+        res = concentracion(datos[datos["Anio"] == anio], por, "Anio")
+    else:
+        t = datos["Mes_ord"]
+        mes_final = int(min(mes_ordinal(anio, 12), t[datos["Anio"] <= anio].max()))
+        res = concentracion_12m(datos, por, mes_final=mes_final)
+
+    if nivel == "Subpartida":
+        nombres = (datos[["Cod_Subpartida", "Subpartida"]]
+                   .drop_duplicates("Cod_Subpartida").astype(str))
+        res = res.astype({"Cod_Subgrupo": str, "Cod_Subpartida": str})
+        res = res.merge(nombres, on="Cod_Subpartida", how="left")
+        res["Subgrupo"] = res["Cod_Subgrupo"].map(SUBGRUPO_MAP).fillna("Otro")
+    return res
+
+
+@st.cache_data(ttl=3600)
+def hhi_movil_subgrupos(version):
+    """HHI 12M de cada subgrupo en todos los meses (expansión sobre el agregado)."""
+    return resultado_cacheado("conc_hhi_movil", (),
+                              lambda: concentracion_12m(load_data_aggregated(version), ["Subgrupo"]),
+                              version)
+
+
+with st.spinner("Calculando concentración de todas las series..."):
+    res = calcular_concentracion(nivel, base, anio, version)
+if subgrupos_sel:
+    res = res[res["Subgrupo"].isin(subgrupos_sel)]
+res = res[res["Total"] >= min_cif].sort_values("HHI", ascending=False)
+
+if res.empty:
+    st.warning("Ninguna serie cumple los criterios seleccionados.")
+    st.stop()
+
+# ── KPIs ─────────────────────────────────────────────────────────────
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("Series evaluadas", f"{len(res):,}")
+k2.metric("Altamente concentradas (HHI > 2.500)", f"{int((res['HHI'] > HHI_ALTO).sum()):,}")
+k3.metric("Un solo proveedor", f"{int((res['N_proveedores'] == 1).sum()):,}")
+ponderado = (res["HHI"] * res["Total"]).sum() / res["Total"].sum()
+k4.metric("HHI medio ponderado por CIF", f"{ponderado:,.0f}")
+
+st.divider()
+
+# ── 1. Ranking ───────────────────────────────────────────────────────
+st.subheader(f"1. {nivel}s más concentrados por país de origen")
+n_top = st.slider("Número de series a mostrar", 10, 50, 25, key="conc_ntop")
+top = res.head(n_top).iloc[::-1]
+if nivel == "Subgrupo":
+    etiquetas = top["Subgrupo"].astype(str)
+else:
+    etiquetas = top["Cod_Subpartida"] + " – " + top["Subpartida"].fillna("").str[:45]
+fig1 = go.Figure(go.Bar(
+    x=top["HHI"], y=etiquetas, orientation="h",
+    marker=dict(color=top["Top1"], colorscale="Reds", cmin=0, cmax=100,
+                colorbar=dict(title="Top 1 %")),
+    customdata=top[["Principal", "Top1", "Top3", "N_proveedores", "Total"]].to_numpy(),
+    hovertemplate=("<b>%{y}</b><br>HHI: %{x:,.0f}"
+                   "<br>Principal: %{customdata[0]} (%{customdata[1]:.1f}%)"
+                   "<br>Top 3: %{customdata[2]:.1f}% | Proveedores: %{customdata[3]}"
+                   "<br>CIF: $%{customdata[4]:,.1f} M<extra></extra>"),
+))
+fig1.add_vline(x=HHI_MODERADO, line_dash="dot", line_color="#9ca3af")
+fig1.add_vline(x=HHI_ALTO, line_dash="dot", line_color="#dc2626")
+fig1.update_layout(
+    height=max(400, 22 * len(top) + 80), plot_bgcolor=PLOT_BG,
+    margin=dict(l=10, t=10, b=30, r=20),
+    xaxis=dict(title="HHI", range=[0, 10_000], gridcolor=GRID_COLOR, tickformat=",.0f"),
+)
+st.plotly_chart(fig1, width="stretch")
+
+# ── 2. Tabla completa ────────────────────────────────────────────────
+st.subheader("2. Todas las series (ordenable por columna)")
+cols = (["Subgrupo"] if nivel == "Subgrupo" else ["Cod_Subpartida", "Subpartida", "Subgrupo"])
+st.dataframe(
+    res[cols + ["HHI", "Top1", "Top3", "N_proveedores", "N_equiv", "Principal", "Total"]],
+    hide_index=True, width="stretch", height=420,
+    column_config={
+        "HHI":           st.column_config.NumberColumn("HHI", format="%.0f"),
+        "Top1":          st.column_config.NumberColumn("Top 1 (%)", format="%.1f"),
+        "Top3":          st.column_config.NumberColumn("Top 3 (%)", format="%.1f"),
+        "N_proveedores": st.column_config.NumberColumn("Proveedores"),
+        "N_equiv":       st.column_config.NumberColumn("N equivalente", format="%.1f"),
+        "Principal":     st.column_config.TextColumn("Proveedor principal"),
+        "Total":         st.column_config.NumberColumn("CIF (M USD)", format="%.1f"),
+    },
+)
+
+st.divider()
+
+# ── 3. Evolución del HHI 12M por subgrupo ────────────────────────────
+st.subheader("3. Evolución de la concentración (HHI 12M) por subgrupo")
+with st.spinner("Calculando HHI móvil de todos los subgrupos..."):
+    movil = hhi_movil_subgrupos(version)
+mas_concentrados = (res["Subgrupo"].astype(str).drop_duplicates().head(5).tolist())
+sel = st.multiselect("Subgrupos", sorted(movil["Subgrupo"].astype(str).unique()),
+                     default=mas_concentrados, key="conc_evol")
+fig3 = go.Figure()
+for i, sg in enumerate(sel):
+    sub = movil[movil["Subgrupo"] == sg]
+    fig3.add_trace(go.Scatter(
+        x=fecha_mes(sub["Mes_fin"]), y=sub["HHI"], name=sg, mode="lines",
+        line=dict(color=SUBGRUPO_COLORS.get(sg, _FALLBACK_COLORS[i % len(_FALLBACK_COLORS)]),
+                  width=2),
+        hovertemplate=f"<b>{sg}</b><br>%{{x|%b %Y}}: HHI %{{y:,.0f}}<extra></extra>",
+    ))
+fig3.add_hline(y=HHI_ALTO, line_dash="dot", line_color="#dc2626")
+fig3.update_layout(
+    height=420, plot_bgcolor=PLOT_BG, hovermode="x unified", margin=dict(t=20, b=30),
+    yaxis=dict(title="HHI 12M", gridcolor=GRID_COLOR, tickformat=",.0f"),
+    legend=dict(orientation="h", y=-0.15, font=dict(size=10)),
+)
+fig3.update_xaxes(gridcolor=GRID_COLOR)
+st.plotly_chart(fig3, width="stretch")
@@ -0,0 +1,173 @@
+"""
+Módulo 8: Comparación de periodos (ventana A vs ventana B).
+
+Compara dos ventanas de meses arbitrarias —ene–sep 2025 vs ene–sep 2024,
+2020–2024 vs 2015–2019— para todas las series Subgrupo × País de origen. Los
+totales de cada ventana salen de restas sobre el acumulado mensual
+precalculado (comparacion.py), sin volver a filtrar ni agrupar el agregado:
+cambiar las ventanas es instantáneo.
+CIF en millones USD | Aporte en puntos porcentuales del cambio del total
+"""
+import streamlit as st
+import plotly.graph_objects as go
+import numpy as np
+
+from data_loader import load_data_aggregated, version_dataset, figura_cacheada
+from comparacion import (acumulado_mensual, comparar_ventanas, tabla_comparacion,
+                         resumen_por_eje)
+from perfilado import perfilar_pagina
+
+perfilar_pagina(__file__)   # no-op salvo IMPORTACIONES_PERFILAR=1 o ?perfilar=1&admin=<clave>
+
+st.set_page_config(page_title="Comparación – Importaciones", page_icon="⚖️", layout="wide")
+st.title("Comparación de Periodos")
+st.caption("Ventana A (actual) vs ventana B (base) para cada serie Subgrupo × País de origen | "
+           "Aporte = diferencia de la serie / total de B, en puntos porcentuales | "
+           "Valores en millones USD (CIF)")
+
+PLOT_BG    = "white"
+GRID_COLOR = "#f0f0f0"
+COLOR_A, COLOR_B = "#2563eb", "#94a3b8"
+
+
+@st.cache_resource(max_entries=1)
+def acumulado(version):
+    """Acumulado meses × subgrupos × países del agregado de `version` (solo se
+    conserva la versión vigente)."""
+    return acumulado_mensual(load_data_aggregated(version))
+
+
+acum, t0, etq_subgrupos, etq_paises = acumulado(version_dataset())
+t_max = t0 + acum.shape[0] - 2
+meses = list(range(t0, t_max + 1))
+
+
+def _etiqueta(t):
+    return f"{t % 12 + 1:02d}/{t // 12}"
+
+
+# ── Ventanas en sidebar ──────────────────────────────────────────────
+st.sidebar.title("Ventanas")
+preset = st.sidebar.radio(
+    "Comparar", ["Acumulado del año vs año anterior", "Últimos 5 años vs 5 previos",
+                 "Personalizado"], key="cmp_preset")
+if preset == "Acumulado del año vs año anterior":
+    inicio_anio = t_max - t_max % 12
+    ventana_a = (inicio_anio, t_max)
+    ventana_b = (inicio_anio - 12, t_max - 12)
+elif preset == "Últimos 5 años vs 5 previos":
+    fin = t_max if t_max % 12 == 11 else t_max - t_max % 12 - 1   # diciembre del último año completo
+    ventana_a = (fin - 59, fin)
+    ventana_b = (fin - 119, fin - 60)
+else:
+    ventana_a = st.sidebar.select_slider(
+        "Ventana A (actual)", options=meses, value=(max(t0, t_max - 11), t_max),
+        format_func=_etiqueta, key="cmp_a")
+    ventana_b = st.sidebar.select_slider(
+        "Ventana B (base)", options=meses, value=(max(t0, t_max - 23), max(t0, t_max - 12)),
+        format_func=_etiqueta, key="cmp_b")
+ventana_a = (max(ventana_a[0], t0), ventana_a[1])
+ventana_b = (max(ventana_b[0], t0), ventana_b[1])
+nombre_a = f"A: {_etiqueta(ventana_a[0])}–{_etiqueta(ventana_a[1])}"
+nombre_b = f"B: {_etiqueta(ventana_b[0])}–{_etiqueta(ventana_b[1])}"
+st.sidebar.caption(f"{nombre_a}\n\n{nombre_b}")
+if ventana_a[1] - ventana_a[0] != ventana_b[1] - ventana_b[0]:
+    st.warning("Las ventanas tienen distinto número de meses: la variación compara totales, "
+               "no promedios mensuales.")
+
+# ── Cálculo: restas sobre el acumulado ───────────────────────────────
+matrices = comparar_ventanas(acum, t0, ventana_a, ventana_b)
+por_subgrupo = resumen_por_eje(matrices, eje=1)
+total_a, total_b = matrices["A"].sum(), matrices["B"].sum()
+firma = (ventana_a, ventana_b)
+
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("CIF ventana A", f"${total_a:,.1f} M")
+k2.metric("CIF ventana B", f"${total_b:,.1f} M")
+k3.metric("Diferencia", f"${total_a - total_b:+,.1f} M",
+          f"{(total_a / total_b - 1) * 100:+.1f}%" if total_b > 0 else None)
+k4.metric("Series comparadas", f"{int(((matrices['A'] != 0) | (matrices['B'] != 0)).sum()):,}")
+
+st.divider()
+
+# ── 1. A vs B por subgrupo ────────────────────────────────────────────
+st.subheader("1. Ventana A vs ventana B por subgrupo CUODE")
+n_sg = st.slider("Subgrupos a mostrar (por CIF de A)", 5, 35, 15, key="cmp_nsg")
+
+
+def _fig_subgrupos():
+    orden = np.argsort(-np.maximum(por_subgrupo["A"], por_subgrupo["B"]))[:n_sg][::-1]
+    etiquetas = etq_subgrupos[orden].astype(str)
+    var = por_subgrupo["Variacion"][orden]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=etiquetas, x=por_subgrupo["B"][orden], name=nombre_b,
+                         orientation="h", marker_color=COLOR_B,
+                         hovertemplate="<b>%{y}</b><br>B: $%{x:,.1f} M<extra></extra>"))
+    fig.add_trace(go.Bar(y=etiquetas, x=por_subgrupo["A"][orden], name=nombre_a,
+                         orientation="h", marker_color=COLOR_A,
+                         text=[f"{v:+.1f}%" if np.isfinite(v) else "" for v in var],
+                         textposition="outside",
+                         hovertemplate="<b>%{y}</b><br>A: $%{x:,.1f} M (%{text})<extra></extra>"))
+    fig.update_layout(
+        barmode="group", height=max(400, 34 * len(orden) + 80), plot_bgcolor=PLOT_BG,
+        margin=dict(l=10, t=10, b=30, r=40), legend=dict(orientation="h", y=1.05),
+        xaxis=dict(title="CIF (millones USD)", gridcolor=GRID_COLOR, tickformat=",.1f"),
+    )
+    return fig
+
+
+st.plotly_chart(figura_cacheada("cmp_subgrupos", firma + (n_sg,), _fig_subgrupos),
+                width="stretch")
+
+st.divider()
+
+# ── 2. Aporte al cambio ──────────────────────────────────────────────
+st.subheader("2. Aporte al cambio del total (subgrupo × país)")
+n_aporte = st.slider("Series a cada lado", 5, 25, 10, key="cmp_naporte")
+tabla = tabla_comparacion(matrices, etq_subgrupos, etq_paises)
+
+
+def _fig_aporte():
+    orden = tabla.sort_values("Aporte")
+    extremos = (orden.head(n_aporte) if len(orden) <= n_aporte
+                else orden.iloc[np.r_[:n_aporte, len(orden) - n_aporte:len(orden)]])
+    extremos = extremos.drop_duplicates()
+    etiquetas = extremos["Subgrupo"].astype(str) + " · " + extremos["Pais_Origen"].astype(str)
+    fig = go.Figure(go.Bar(
+        x=extremos["Aporte"], y=etiquetas, orientation="h",
+        marker_color=np.where(extremos["Aporte"] >= 0, "#16a34a", "#dc2626"),
+        customdata=extremos[["A", "B", "Diferencia"]].to_numpy(),
+        hovertemplate=("<b>%{y}</b><br>Aporte: %{x:+.2f} pp"
+                       "<br>A: $%{customdata[0]:,.1f} M | B: $%{customdata[1]:,.1f} M"
+                       "<br>Diferencia: $%{customdata[2]:+,.1f} M<extra></extra>"),
+    ))
+    fig.update_layout(
+        height=max(400, 22 * len(extremos) + 80), plot_bgcolor=PLOT_BG,
+        margin=dict(l=10, t=10, b=30, r=20),
+        xaxis=dict(title="Aporte al cambio del total (pp)", gridcolor=GRID_COLOR,
+                   zeroline=True, zerolinecolor="#9ca3af"),
+    )
+    return fig
+
+
+st.plotly_chart(figura_cacheada("cmp_aporte", firma + (n_aporte,), _fig_aporte),
+                width="stretch")
+st.caption(f"La suma de todos los aportes es la variación del total: "
+           f"{tabla['Aporte'].sum():+.2f} pp.")
+
+st.divider()
+
+# ── 3. Tabla de todas las series ─────────────────────────────────────
+st.subheader("3. Todas las series (ordenable por columna)")
+st.dataframe(
+    tabla.sort_values("Aporte", key=np.abs, ascending=False),
+    hide_index=True, width="stretch", height=420,
+    column_config={
+        "Pais_Origen": st.column_config.TextColumn("País de origen"),
+        "A":           st.column_config.NumberColumn("CIF A", format="%.1f"),
+        "B":           st.column_config.NumberColumn("CIF B", format="%.1f"),
+        "Diferencia":  st.column_config.NumberColumn("Diferencia", format="%+.1f"),
+        "Variacion":   st.column_config.NumberColumn("Variación (%)", format="%+.1f"),
+        "Aporte":      st.column_config.NumberColumn("Aporte (pp)", format="%+.2f"),
+    },
+)
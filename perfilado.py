@@ -0,0 +1,172 @@
+"""
+Perfilado opcional de cada rerun de las páginas (cProfile).
+
+Se activa con IMPORTACIONES_PERFILAR=1 (todo el servidor) o, solo para
+administradores, con los parámetros de URL ?perfilar=1&admin=<clave>, donde
+<clave> es el valor de IMPORTACIONES_ADMIN (sin esa variable el parámetro de
+URL no tiene efecto). Cada página llama a
+perfilar_pagina(__file__) antes de st.set_page_config: si el perfilado está
+activo, vuelve a ejecutar el script completo bajo cProfile, guarda el perfil
+del rerun en perfiles_rerun/ junto con la firma de filtros vigente y detiene
+la ejecución original. Así se reproduce "la página X es lenta con estos
+filtros" sin adivinar el rerun exacto.
+
+En modo perfilado, y solo con la clave de administrador, la barra lateral
+muestra los perfiles guardados: tabla, funciones con más tiempo acumulado y
+descarga del .prof (snakeviz, pstats). Se conservan los MAX_PERFILES más
+recientes.
+
+cProfile admite un solo perfilador activo por proceso, así que los reruns
+perfilados se ejecutan de a uno: con IMPORTACIONES_PERFILAR=1 todas las
+sesiones del servidor esperan su turno. Es un modo de diagnóstico, no para
+producción con usuarios concurrentes.
+"""
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import runpy
+import threading
+import time
+
+import streamlit as st
+
+PERFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfiles_rerun")
+INDICE_PATH  = os.path.join(PERFILES_DIR, "indice.jsonl")
+MAX_LISTADO  = 50
+MAX_PERFILES = 200   # .prof conservados en disco; los más antiguos se borran
+
+_local = threading.local()   # un rerun por hilo: marca la ejecución anidada
+# Un solo perfilador activo por proceso (desde Python 3.12 cProfile es global)
+_lock_perfil = threading.Lock()
+
+
+def es_admin():
+    """La sesión trae ?admin=<IMPORTACIONES_ADMIN>. Sin la variable, nadie lo es."""
+    clave = os.environ.get("IMPORTACIONES_ADMIN", "")
+    return bool(clave) and hmac.compare_digest(st.query_params.get("admin", ""), clave)
+
+
+def perfilado_activo():
+    if os.environ.get("IMPORTACIONES_PERFILAR", "0") == "1":
+        return True
+    return st.query_params.get("perfilar") == "1" and es_admin()
+
+
+def perfilar_pagina(ruta_script):
+    """Ejecuta el script `ruta_script` bajo cProfile y detiene la ejecución
+    original. Sin perfilado activo (o dentro de la ejecución perfilada) no hace nada.
+    Serializa los reruns perfilados de todo el proceso (ver _lock_perfil)."""
+    if getattr(_local, "en_curso", False) or not perfilado_activo():
+        return
+    perfil = cProfile.Profile()
+    with _lock_perfil:
+        _local.en_curso = True
+        t0 = time.perf_counter()
+        try:
+            perfil.enable()
+            runpy.run_path(ruta_script, run_name="__main__")
+        finally:
+            # st.stop() y st.rerun() de la página también pasan por aquí
+            perfil.disable()
+            _local.en_curso = False
+            _guardar(perfil, ruta_script, time.perf_counter() - t0)
+    if es_admin():
+        panel_perfiles()   # lista firmas de otras sesiones: solo administradores
+    st.stop()
+
+
+def _guardar(perfil, ruta_script, segundos):
+    from data_loader import firma_vigente, version_dataset
+
+    os.makedirs(PERFILES_DIR, exist_ok=True)
+    pagina = os.path.splitext(os.path.basename(ruta_script))[0]
+    nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{pagina}-{os.getpid()}-{threading.get_ident()}.prof"
+    perfil.dump_stats(os.path.join(PERFILES_DIR, nombre))
+    firma = firma_vigente()
+    registro = {"archivo": nombre, "pagina": pagina, "segundos": round(segundos, 3),
+                "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "firma": json.loads(json.dumps(firma, default=str)) if firma else None,
+                "version": version_dataset()}
+    with open(INDICE_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    _podar()
+
+
+def _podar(maximo=MAX_PERFILES):
+    """Borra los .prof más antiguos por encima de `maximo` y quita sus líneas
+    del índice. El nombre empieza con la fecha: orden alfabético = cronológico."""
+    perfiles = sorted(f for f in os.listdir(PERFILES_DIR) if f.endswith(".prof"))
+    if len(perfiles) <= maximo:
+        return
+    for nombre in perfiles[:-maximo]:
+        try:
+            os.remove(os.path.join(PERFILES_DIR, nombre))
+        except FileNotFoundError:   # otro proceso ya lo borró
+            pass
+    vigentes = set(perfiles[-maximo:])
+    lineas = []
+    with open(INDICE_PATH, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                if json.loads(linea)["archivo"] in vigentes:
+                    lineas.append(linea)
+            except (ValueError, KeyError):
+                continue
+    tmp = INDICE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(lineas)
+    os.replace(tmp, INDICE_PATH)
+
+
+def listar_perfiles(limite=MAX_LISTADO):
+    """Últimos perfiles guardados (más reciente primero)."""
+    try:
+        with open(INDICE_PATH, encoding="utf-8") as f:
+            lineas = f.readlines()
+    except FileNotFoundError:
+        return []
+    registros = []
+    for linea in reversed(lineas):
+        try:
+            registros.append(json.loads(linea))
+        except ValueError:
+            continue
+        if len(registros) >= limite:
+            break
+    return [r for r in registros if os.path.exists(os.path.join(PERFILES_DIR, r["archivo"]))]
+
+
+def resumen_perfil(archivo, n=30, orden="cumulative"):
+    """Texto de pstats con las `n` funciones de mayor tiempo `orden`."""
+    salida = io.StringIO()
+    pstats.Stats(os.path.join(PERFILES_DIR, archivo), stream=salida) \
+          .strip_dirs().sort_stats(orden).print_stats(n)
+    return salida.getvalue()
+
+
+def panel_perfiles():
+    """Sección de administración en la barra lateral: perfiles guardados."""
+    with st.sidebar.expander("Perfiles de rendimiento", expanded=False):
+        registros = listar_perfiles()
+        if not registros:
+            st.caption("Aún no hay perfiles guardados.")
+            return
+        st.dataframe(
+            [{"Fecha": r["fecha"], "Página": r["pagina"], "s": r["segundos"],
+              "Firma": str(r["firma"])} for r in registros],
+            hide_index=True, width="stretch", height=200,
+        )
+        archivo = st.selectbox(
+            "Perfil", [r["archivo"] for r in registros], key="_perfil_sel",
+            format_func=lambda a: next(f"{r['fecha']} · {r['pagina']} · {r['segundos']}s"
+                                       for r in registros if r["archivo"] == a),
+        )
+        orden = st.radio("Ordenar por", ["cumulative", "tottime"], horizontal=True,
+                         key="_perfil_orden")
+        st.code(resumen_perfil(archivo, orden=orden), language="text")
+        with open(os.path.join(PERFILES_DIR, archivo), "rb") as f:
+            st.download_button("Descargar .prof", f.read(), file_name=archivo,
+                               key="_perfil_descarga")
@@ -0,0 +1,176 @@
+"""
+Reportes en lote sin Streamlit: mismos agregados del dashboard para muchas
+combinaciones de filtros.
+
+Uso:
+    python reportes_batch.py specs.json --salida reportes --formato parquet
+    python reportes_batch.py --por-pais --por-grupo --rango 2015 2025 --formato html
+
+specs.json es una lista de objetos con los mismos filtros del sidebar:
+    [{"nombre": "china_5a", "rango": [2021, 2025], "paises": ["CHINA"]},
+     {"nombre": "capital", "grupos": ["Bienes de Capital Industrial"]}]
+
+El parquet se carga una sola vez en el proceso principal; con el método
+"fork" los workers del pool heredan el DataFrame sin copiarlo ni re-leerlo.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from agregados import aplicar_filtros, serie_anual, top_n, participacion_region, suma_movil_12m
+from data_loader import leer_agregado
+
+FORMATOS = ("parquet", "csv", "html")
+_CLAVES_FILTRO = ("rango", "grupos", "subgrupos", "regiones", "paises")
+_CLAVES_SPEC   = ("nombre",) + _CLAVES_FILTRO
+
+# DataFrame compartido por los workers (heredado vía fork o cargado en _init_worker)
+_DF = None
+
+
+def _init_worker(path):
+    global _DF
+    if _DF is None:
+        _DF = leer_agregado(path)
+
+
+def _slug(texto):
+    return re.sub(r"[^a-z0-9]+", "_", str(texto).lower()).strip("_") or "reporte"
+
+
+def validar_specs(specs):
+    """Rechaza antes de procesar nada los specs con claves desconocidas (un
+    filtro mal escrito se ignoraría en silencio) y los nombres cuyo slug se
+    repite (sus reportes se sobrescribirían en la misma carpeta)."""
+    errores, carpetas = [], {}
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            errores.append(f"spec {i}: se esperaba un objeto, llegó {type(spec).__name__}")
+            continue
+        desconocidas = sorted(set(spec) - set(_CLAVES_SPEC))
+        if desconocidas:
+            errores.append(f"spec {i} ({spec.get('nombre', 'sin nombre')}): claves desconocidas "
+                           f"{desconocidas}; válidas: {list(_CLAVES_SPEC)}")
+        slug = _slug(spec.get("nombre", "reporte"))
+        if slug in carpetas:
+            errores.append(f"spec {i} ({spec.get('nombre', 'sin nombre')}): la carpeta '{slug}' "
+                           f"ya es del spec {carpetas[slug]}; usa otro nombre")
+        else:
+            carpetas[slug] = i
+    if errores:
+        raise ValueError("specs inválidos:\n  " + "\n  ".join(errores))
+
+
+def calcular_reporte(df, spec):
+    """Agregados de un spec de filtros: {nombre_tabla: DataFrame}."""
+    dff = aplicar_filtros(df, **{k: spec[k] for k in _CLAVES_FILTRO if k in spec})
+    return {
+        "serie_anual":     serie_anual(dff),
+        "top10_subgrupos": top_n(dff, "Subgrupo", 10),
+        "top10_paises":    top_n(dff, "Pais_Origen", 10),
+        "regiones":        participacion_region(dff),
+        "suma_movil_12m":  suma_movil_12m(dff),
+    }
+
+
+def _figura(nombre, tabla):
+    """Gráfico estático (HTML) de una tabla del reporte."""
+    import plotly.graph_objects as go
+    if nombre == "serie_anual":
+        fig = go.Figure(go.Bar(x=tabla["Anio"], y=tabla["CIF"], marker_color="#2563eb"))
+        fig.update_layout(yaxis_title="CIF (millones USD)")
+    elif nombre == "suma_movil_12m":
+        fig = go.Figure(go.Scatter(x=tabla["Fecha"], y=tabla["CIF_12M"], mode="lines",
+                                   line=dict(color="#2563eb", width=2)))
+        fig.update_layout(yaxis_title="CIF suma móvil 12M (millones USD)")
+    elif nombre == "regiones":
+        fig = go.Figure(go.Pie(labels=tabla["Region"], values=tabla["CIF"], hole=0.45))
+    else:
+        col = tabla.columns[0]
+        fig = go.Figure(go.Bar(x=tabla["CIF"], y=tabla[col].astype(str),
+                               orientation="h", marker_color="#2563eb"))
+        fig.update_layout(yaxis=dict(autorange="reversed"), xaxis_title="CIF (millones USD)")
+    fig.update_layout(title=nombre.replace("_", " ").capitalize(), plot_bgcolor="white")
+    return fig
+
+
+def _procesar(spec, salida, formato):
+    t0 = time.perf_counter()
+    tablas = calcular_reporte(_DF, spec)
+    carpeta = os.path.join(salida, _slug(spec.get("nombre", "reporte")))
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, tabla in tablas.items():
+        destino = os.path.join(carpeta, f"{nombre}.{formato}")
+        if formato == "parquet":
+            tabla.to_parquet(destino, index=False)
+        elif formato == "csv":
+            tabla.to_csv(destino, index=False)
+        else:
+            _figura(nombre, tabla).write_html(destino, include_plotlyjs="cdn")
+    return carpeta, time.perf_counter() - t0
+
+
+def specs_automaticos(df, por_pais=False, por_grupo=False, rango=None):
+    """Un spec por país de origen y/o por grupo CUODE."""
+    specs = []
+    base = {"rango": list(rango)} if rango else {}
+    if por_pais:
+        for pais in sorted(df["Pais_Origen"].unique()):
+            specs.append({"nombre": f"pais_{pais}", "paises": [pais], **base})
+    if por_grupo:
+        for grupo in sorted(df["Grupo"].unique()):
+            specs.append({"nombre": f"grupo_{grupo}", "grupos": [grupo], **base})
+    return specs
+
+
+def main(argv=None):
+    global _DF
+    parser = argparse.ArgumentParser(description="Reportes de importaciones en lote")
+    parser.add_argument("specs", nargs="?", help="JSON con la lista de filtros")
+    parser.add_argument("--salida", default="reportes", help="Directorio de salida")
+    parser.add_argument("--formato", choices=FORMATOS, default="parquet")
+    parser.add_argument("--por-pais", action="store_true", help="Un reporte por país")
+    parser.add_argument("--por-grupo", action="store_true", help="Un reporte por grupo CUODE")
+    parser.add_argument("--rango", nargs=2, type=int, metavar=("DESDE", "HASTA"),
+                        help="Rango de años para los reportes automáticos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--parquet", default=None,
+                        help="Parquet a nivel subpartida (por defecto: agregado materializado)")
+    args = parser.parse_args(argv)
+
+    print("Cargando datos agregados...")
+    _DF = leer_agregado(args.parquet)
+
+    specs = []
+    if args.specs:
+        with open(args.specs, encoding="utf-8") as f:
+            specs.extend(json.load(f))
+    specs.extend(specs_automaticos(_DF, args.por_pais, args.por_grupo, args.rango))
+    if not specs:
+        parser.error("Indica un archivo de specs o --por-pais / --por-grupo")
+    try:
+        validar_specs(specs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # fork: los workers heredan _DF; spawn (Windows/macOS): cada worker lo lee una vez
+    metodo = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    print(f"{len(specs)} reportes, {args.workers} workers ({metodo})")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers,
+                             mp_context=mp.get_context(metodo),
+                             initializer=_init_worker,
+                             initargs=(args.parquet,)) as pool:
+        futuros = {pool.submit(_procesar, s, args.salida, args.formato): s for s in specs}
+        for fut in as_completed(futuros):
+            carpeta, segundos = fut.result()
+            print(f"  {carpeta} ({segundos:.2f}s)")
+    print(f"\nListo: {len(specs)} reportes en {time.perf_counter() - t0:.1f}s → {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Screener de precio implícito en lote (CIF 12M / TM 12M) para miles de series.
+
+Misma definición que el Módulo 3 (suma móvil 12M, media y desviación de 24
+meses, banda ±2σ), pero calculada para todas las series a la vez sobre un
+arreglo denso series × meses: sin bucle Python por serie. Solo se necesitan
+los últimos 12 + 24 - 1 = 35 meses para evaluar el mes final.
+"""
+import numpy as np
+
+from agregados import mes_ordinal
+
+VENTANA = 12   # meses de la suma móvil
+BANDA   = 24   # meses de la media/desviación de referencia
+
+
+def screener_precios(df, claves, mes_final=None, min_cif_12m=0.0):
+    """Precio implícito 12M y banda ±2σ en el mes final para cada serie.
+
+    df: filas con Anio, Mes, CIF (millones USD), TM y las columnas de `claves`.
+    Devuelve una fila por serie evaluable con Precio, MA24, Std24, Upper,
+    Lower, Z y Fuera_banda, ordenada por |Z| descendente."""
+    n_meses = VENTANA + BANDA - 1
+    t = mes_ordinal(df["Anio"], df["Mes"])
+    if mes_final is None:
+        mes_final = int(t.max())
+    t0 = mes_final - n_meses + 1
+    en_ventana = (t >= t0) & (t <= mes_final)
+    datos = df.loc[en_ventana, claves + ["CIF", "TM"]]
+    col = t[en_ventana] - t0
+
+    # Id denso por serie y acumulación en arreglo (series × meses)
+    sid = datos.groupby(claves, observed=True, sort=False).ngroup().to_numpy()
+    n_series = int(sid.max()) + 1 if len(sid) else 0
+    plano = sid * n_meses + col
+    tam = n_series * n_meses
+    cif = np.bincount(plano, weights=datos["CIF"].to_numpy(dtype="float64"),
+                      minlength=tam).reshape(n_series, n_meses)
+    tm  = np.bincount(plano, weights=datos["TM"].to_numpy(dtype="float64"),
+                      minlength=tam).reshape(n_series, n_meses)
+
+    # Suma móvil 12M por diferencia de acumulados → (series × 24)
+    def _movil(x):
+        c = np.concatenate([np.zeros((x.shape[0], 1)), np.cumsum(x, axis=1)], axis=1)
+        return c[:, VENTANA:] - c[:, :-VENTANA]
+
+    cif12, tm12 = _movil(cif), _movil(tm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precio = np.where(tm12 > 0, cif12 / tm12 * 1_000_000, np.nan)
+
+    # Igual que rolling(24): exige las 24 observaciones de precio
+    completas = ~np.isnan(precio).any(axis=1)
+    ma  = precio.mean(axis=1)
+    std = precio.std(axis=1, ddof=1)
+    actual = precio[:, -1]
+    upper = ma + 2 * std
+    lower = np.clip(ma - 2 * std, 0, None)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std > 0, (actual - ma) / std, 0.0)
+
+    series = (datos[claves].assign(_sid=sid)
+                           .drop_duplicates("_sid")
+                           .sort_values("_sid")
+                           .reset_index(drop=True))
+    res = series.assign(
+        CIF_12M=cif12[:, -1], TM_12M=tm12[:, -1],
+        Precio=actual, MA24=ma, Std24=std, Upper=upper, Lower=lower, Z=z,
+        Fuera_banda=(actual > upper) | (actual < lower),
+    ).drop(columns=["_sid"])
+    res = res[completas & (res["CIF_12M"] >= min_cif_12m)]
+    return (res.assign(_abs_z=res["Z"].abs())
+               .sort_values("_abs_z", ascending=False)
+               .drop(columns=["_abs_z"])
+               .reset_index(drop=True))
@@ -0,0 +1,73 @@
+"""
+Store de series mensuales por subpartida (Arrow IPC, memory-mapped).
+
+Una fila por (Subpartida, Subgrupo, País, Año, Mes) con CIF/FOB/TM, ordenada
+por código de subpartida. Un índice aparte guarda el rango [inicio, inicio+n)
+de cada código, de modo que leer una subpartida es un slice zero-copy del
+archivo mapeado en memoria (unos KB) en lugar de filtrar millones de filas.
+
+Lo genera etl_zips_to_parquet.py; lo consume data_loader.load_serie_subpartida(),
+que completa el slice con los meses anexados después (actualizacion_mensual.py).
+"""
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_BASE        = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH   = os.path.join(_BASE, "subpartidas_series.arrow")
+INDICE_PATH  = os.path.join(_BASE, "subpartidas_series_idx.parquet")
+
+_CLAVES = ["Cod_Subpartida", "Cod_Subgrupo", "Pais_Origen", "Anio", "Mes"]
+
+
+def agregar_series(df):
+    """Filas del parquet → filas del store (Subpartida, Subgrupo, País, Año, Mes)."""
+    serie = (df.groupby(_CLAVES, observed=True)
+               .agg(CIF=("CIF", "sum"), FOB=("FOB", "sum"), TM=("TM", "sum"))
+               .reset_index())
+    for col in ["Cod_Subpartida", "Cod_Subgrupo", "Pais_Origen"]:
+        serie[col] = serie[col].astype(str).str.strip().astype("category")
+    serie["Anio"] = serie["Anio"].astype("int16")
+    serie["Mes"]  = serie["Mes"].astype("int8")
+    return serie.sort_values(_CLAVES, kind="stable").reset_index(drop=True)
+
+
+def construir_store(df, store_path=STORE_PATH, indice_path=INDICE_PATH):
+    """Agrega df (formato del parquet del ETL) y escribe store + índice de offsets."""
+    serie = agregar_series(df)
+
+    # Índice: código → (inicio, n) sobre el orden anterior
+    codigos = serie["Cod_Subpartida"].astype(str)
+    inicio  = codigos.ne(codigos.shift()).to_numpy().nonzero()[0]
+    indice  = pd.DataFrame({
+        "Cod_Subpartida": codigos.iloc[inicio].to_numpy(),
+        "inicio":         inicio.astype("int64"),
+    })
+    indice["n"] = indice["inicio"].shift(-1, fill_value=len(serie)) - indice["inicio"]
+
+    # Sin compresión: requisito para que el mmap sea zero-copy
+    tabla = pa.Table.from_pandas(serie, preserve_index=False)
+    with pa.OSFile(store_path, "wb") as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+    indice.to_parquet(indice_path, index=False)
+    return len(serie), len(indice)
+
+
+def abrir_store(store_path=STORE_PATH, indice_path=INDICE_PATH):
+    """Mapea el store en memoria. Devuelve (tabla Arrow, {código: (inicio, n)}) o None."""
+    if not (os.path.exists(store_path) and os.path.exists(indice_path)):
+        return None
+    tabla  = pa.ipc.open_file(pa.memory_map(store_path, "r")).read_all()
+    indice = pq.read_table(indice_path).to_pandas()
+    offsets = dict(zip(indice["Cod_Subpartida"],
+                       zip(indice["inicio"].tolist(), indice["n"].tolist())))
+    return tabla, offsets
+
+
+def leer_subpartida(store, cod_subpartida):
+    """Serie mensual de una subpartida (DataFrame) o vacío si el código no existe."""
+    tabla, offsets = store
+    inicio, n = offsets.get(str(cod_subpartida).strip(), (0, 0))
+    return tabla.slice(inicio, n).to_pandas()
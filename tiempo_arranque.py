@@ -0,0 +1,71 @@
+"""
+Reporte de tiempo de arranque en frío por página y por módulo importado.
+
+Uso:
+    python tiempo_arranque.py [--presupuesto 1500] [--top 8]
+
+Para cada script (app.py y pages/*.py) toma solo sus imports de nivel
+superior (los imports diferidos dentro de funciones no cuentan), los ejecuta
+en un intérprete nuevo con `python -X importtime` y reporta el tiempo total
+y los módulos más pesados (tiempo acumulado, incluye ejecutar el cuerpo del
+módulo, p. ej. las tablas de data_loader). Termina con código 1 si alguna
+página supera el presupuesto en ms: apto para CI y para vigilar el
+time-to-first-byte de procesos nuevos del servidor.
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRESUPUESTO_MS = 1_500
+
+
+def _imports_superiores(ruta):
+    """Código con los import/from-import de nivel superior del script."""
+    with open(ruta, encoding="utf-8") as f:
+        arbol = ast.parse(f.read(), ruta)
+    return "\n".join(ast.unparse(n) for n in arbol.body
+                     if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+
+def medir_imports(codigo):
+    """{módulo de primer nivel: ms acumulados} y ms totales en un intérprete nuevo."""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                            cwd=BASE_DIR, capture_output=True, text=True, check=True).stderr
+    modulos = {}
+    for linea in salida.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea.split("|", 2)
+        if not acumulado.strip().isdigit() or nombre[1:].startswith(" "):
+            continue   # encabezado o submódulo (indentado bajo su padre)
+        modulos[nombre.strip()] = int(acumulado) / 1000
+    return modulos, sum(modulos.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_MS,
+                        help="ms máximos de imports por página")
+    parser.add_argument("--top", type=int, default=8, help="módulos más pesados a mostrar")
+    args = parser.parse_args(argv)
+
+    scripts = ["app.py"] + sorted(glob.glob(os.path.join("pages", "*.py"), root_dir=BASE_DIR))
+    excedidos = 0
+    for script in scripts:
+        modulos, total = medir_imports(_imports_superiores(os.path.join(BASE_DIR, script)))
+        marca = "EXCEDE" if total > args.presupuesto else "ok"
+        excedidos += total > args.presupuesto
+        print(f"\n{script:<36}{total:>9.0f} ms  [{marca}]")
+        for nombre, ms in sorted(modulos.items(), key=lambda m: -m[1])[:args.top]:
+            print(f"    {nombre:<32}{ms:>9.0f} ms")
+    print(f"\nPresupuesto: {args.presupuesto:.0f} ms por página; {excedidos} página(s) lo exceden.")
+    return 1 if excedidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Registro anónimo de los estados de filtros por página y de su costo de cálculo.
+
+filtros_sidebar anota una "vista" cada vez que cambia el estado de filtros
+de la sesión (no en cada rerun: los sliders propios de un gráfico no cuentan)
+y figura_cacheada anota un "cálculo" (segundos) cada vez que construye una
+figura que no estaba en caché. Solo se guardan la página (key_prefix de
+filtros_sidebar) y el estado de los filtros (rango, grupos, subgrupos, regiones, países): ni
+sesión, ni usuario, ni hora. calentar_cache.py usa el resumen para
+precalcular los estados más frecuentes y más costosos.
+
+El registro es append-only; al pasar de MAX_BYTES se compacta a una línea
+por (página, estado) con el número de vistas y por (página, estado, versión,
+consulta) con los segundos, así que su tamaño queda acotado por los estados
+distintos y no por el tráfico.
+
+IMPORTACIONES_REGISTRO_USO=0 desactiva el registro.
+"""
+import json
+import os
+import threading
+from collections import defaultdict
+
+REGISTRO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uso_firmas.jsonl")
+ACTIVO = os.environ.get("IMPORTACIONES_REGISTRO_USO", "1") == "1"
+MAX_BYTES = 5 * 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def estado_filtros(rango, grupo_labels=(), subgrupo_labels=(), regiones=(), paises=()):
+    """Estado canónico (JSON, independiente del orden de selección) de los widgets."""
+    return {
+        "rango":           [int(a) for a in rango],
+        "grupo_labels":    sorted(grupo_labels),
+        "subgrupo_labels": sorted(subgrupo_labels),
+        "regiones":        sorted(regiones),
+        "paises":          sorted(paises),
+    }
+
+
+def _anotar(evento):
+    if not ACTIVO:
+        return
+    linea = json.dumps(evento, ensure_ascii=False, sort_keys=True) + "\n"
+    try:
+        # Una línea corta por write en modo append: procesos concurrentes no se mezclan
+        with _lock:
+            with open(REGISTRO_PATH, "a", encoding="utf-8") as f:
+                f.write(linea)
+                grande = f.tell() > MAX_BYTES
+            if grande:
+                compactar()
+    except OSError:
+        pass
+
+
+def _eventos(path):
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for linea in f:
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                continue   # línea truncada por un proceso interrumpido
+
+
+def compactar(path=REGISTRO_PATH):
+    """Reescribe el registro con una línea por clave (vistas y segundos sumados).
+    Las líneas que otro proceso anexe durante la reescritura se pierden: es
+    una estadística aproximada."""
+    vistas = defaultdict(int)
+    segundos = defaultdict(float)
+    for ev in _eventos(path):
+        estado = json.dumps(ev.get("estado"), sort_keys=True)
+        if ev.get("e") == "vista":
+            vistas[(ev.get("pagina"), estado)] += ev.get("n", 1)
+        elif ev.get("e") == "calculo":
+            segundos[(ev.get("pagina"), estado, ev.get("v"), ev.get("consulta"))] += ev.get("s", 0.0)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for (pagina, estado), n in vistas.items():
+            f.write(json.dumps({"e": "vista", "pagina": pagina, "estado": json.loads(estado),
+                                "n": n}, ensure_ascii=False, sort_keys=True) + "\n")
+        for (pagina, estado, v, consulta), s in segundos.items():
+            f.write(json.dumps({"e": "calculo", "pagina": pagina, "estado": json.loads(estado),
+                                "consulta": consulta, "s": round(s, 4), "v": v},
+                               ensure_ascii=False, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def registrar_vista(pagina, estado):
+    _anotar({"e": "vista", "pagina": pagina, "estado": estado})
+
+
+def registrar_calculo(pagina, estado, consulta, segundos, version):
+    _anotar({"e": "calculo", "pagina": pagina, "estado": estado, "consulta": consulta,
+             "s": round(segundos, 4), "v": version})
+
+
+def resumen(path=REGISTRO_PATH):
+    """Una fila por (página, estado): vistas y segundos de cálculo en frío
+    (suma de sus figuras, máximo entre versiones del dataset)."""
+    vistas = defaultdict(int)
+    costo = defaultdict(lambda: defaultdict(float))
+    for ev in _eventos(path):
+        clave = (ev.get("pagina"), json.dumps(ev.get("estado"), sort_keys=True))
+        if ev.get("e") == "vista":
+            vistas[clave] += ev.get("n", 1)   # "n": líneas ya compactadas
+        elif ev.get("e") == "calculo":
+            costo[clave][ev.get("v")] += ev.get("s", 0.0)
+    return [
+        {"pagina": pagina, "estado": json.loads(estado), "vistas": vistas[(pagina, estado)],
+         "segundos": max(costo[(pagina, estado)].values(), default=0.0)}
+        for pagina, estado in set(vistas) | set(costo)
+    ]
+
+
+def seleccionar(filas, n_frecuentes=20, n_costosos=10):
+    """Unión (sin repetidos) de los estados más vistos y los más costosos."""
+    por_vistas = sorted(filas, key=lambda f: -f["vistas"])[:n_frecuentes]
+    por_costo = sorted(filas, key=lambda f: -f["segundos"])[:n_costosos]
+    elegidos, vistos = [], set()
+    for f in por_vistas + por_costo:
+        clave = (f["pagina"], json.dumps(f["estado"], sort_keys=True))
+        if clave not in vistos:
+            vistos.add(clave)
+            elegidos.append(f)
+    return elegidos